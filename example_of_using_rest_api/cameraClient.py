@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+
+import argparse
+import collections
+import concurrent.futures
+import cv2 as cv
+import numpy as np
+import rawFrame
+import requests
+import requests.adapters
+import struct
+import threading
+import time
+
+
+# Must match POINTCLOUD_HEADER in rest_api/flask_server/pointcloud.py
+POINTCLOUD_MAGIC = b'PCLD'
+POINTCLOUD_VERSION = 1
+POINTCLOUD_HEADER = struct.Struct('<4sHHIHBxd')
+
+# Wątki pobierające klatki w tle (frames()), wspólne dla wszystkich wywołań jednego klienta
+PREFETCH_THREADS = 4
+
+IMAGE_FORMATS = ('png', 'jpeg', 'webp', 'depth_png', 'depth_jpeg')
+FRAME_FORMATS = ('raw', 'rgb+d', 'rgbd') + IMAGE_FORMATS
+
+# Pole konfiguracji => typ wartości (zakresy sprawdza serwer)
+VECTOR3 = 'vector3'
+NAMES = 'names'
+DEVICE = 'device'
+
+CONFIG_TYPES = {
+	'camera_width': int,
+	'camera_height': int,
+	'camera_frame_reuse_window': float,
+	'worker_ros_topic_color': str,
+	'worker_ros_topic_depth': str,
+	'worker_ros_host': str,
+	'worker_ros_port': int,
+	'worker_ros_sync_slop': float,
+	'upload_ros_topic_color': str,
+	'upload_ros_topic_depth': str,
+	'upload_ros_topic_pointcloud': str,
+	'upload_ros_host': str,
+	'upload_ros_port': int,
+	'upload_ros_rate': float,
+	'worker_opencv_device': DEVICE,
+	'worker_opencv_idle_timeout': float,
+	'worker_pybullet_mode': str,
+	'worker_pybullet_host': str,
+	'worker_pybullet_port': int,
+	'worker_pybullet_eye_position': VECTOR3,
+	'worker_pybullet_eye_up_vector': VECTOR3,
+	'worker_pybullet_target_position': VECTOR3,
+	'worker_pybullet_fov': float,
+	'worker_pybullet_aspect': float,
+	'worker_pybullet_near_distance': float,
+	'worker_pybullet_far_distance': float,
+	'worker_pybullet_linear_depth': bool,
+	'worker_replay_name': str,
+	'worker_replay_realtime': bool,
+	'worker_replay_loop': bool,
+	'recording_directory': str,
+	'backends_preload': NAMES,
+	'profiling_enabled': bool,
+	'profiling_keep': int,
+	'output_image_png_compression_level': int,
+	'output_image_jpeg_quality': int,
+	'output_image_webp_quality': int,
+}
+
+# color: (height, width, 3) uint8 RGB albo None, depth: (height, width) uint16 [mm] albo None,
+# timestamp: czas zrobienia zdjęcia (sekundy od epoki) albo None gdy format go nie przenosi
+Frame = collections.namedtuple('Frame', ['color', 'depth', 'timestamp'])
+
+# points: (n, 3) float32 [m], colors: (n, 3) uint8 albo None
+PointCloud = collections.namedtuple('PointCloud', ['points', 'colors', 'timestamp'])
+
+
+class CameraClientError(Exception):
+	def __init__(self, status, message):
+		super().__init__("{}: {}".format(status, message))
+		self.status = status
+		self.message = message
+
+
+def decodeRGB_D(data):
+	(width, height) = (data['width'], data['height'])
+	color = np.array(data['color'], dtype=np.uint8).reshape(height, width, data['color_bpp'])
+	depth = np.array(data['depth'], dtype=np.uint8).view('<u2').reshape(height, width)
+
+	return Frame(color, depth, None)
+
+
+def decodeRGBD(data):
+	(width, height, colorBpp) = (data['width'], data['height'], data['color_bpp'])
+	pixels = np.array(data['rgbd'], dtype=np.uint8).reshape(width * height, colorBpp + data['depth_bpp'])
+
+	color = np.ascontiguousarray(pixels[:, :colorBpp]).reshape(height, width, colorBpp)
+	depth = np.ascontiguousarray(pixels[:, colorBpp:]).view('<u2').reshape(height, width)
+
+	return Frame(color, depth, None)
+
+
+# Obrazek z odpowiedzi => tablica; 16-bitowy png głębokości zostaje uint16
+def decodeImage(data, output):
+	buffer = np.frombuffer(data, dtype=np.uint8)
+
+	if output == 'depth_png':
+		return Frame(None, cv.imdecode(buffer, cv.IMREAD_ANYDEPTH), None)
+
+	return Frame(cv.cvtColor(cv.imdecode(buffer, cv.IMREAD_COLOR), cv.COLOR_BGR2RGB), None, None)
+
+
+def decodePointCloud(data):
+	(magic, version, headerSize, count, pointStep, fields, timestamp) = POINTCLOUD_HEADER.unpack_from(data)
+
+	if magic != POINTCLOUD_MAGIC:
+		raise ValueError("Wrong magic in point cloud: {}".format(magic))
+	if version != POINTCLOUD_VERSION:
+		raise ValueError("Unsupported point cloud version: {}".format(version))
+
+	values = np.frombuffer(data, dtype='<f4', count=count * pointStep // 4, offset=headerSize).reshape(count, pointStep // 4)
+
+	colors = None
+	if fields == 1:
+		packed = values[:, 3].view('<u4')
+		colors = np.stack([(packed >> 16) & 0xff, (packed >> 8) & 0xff, packed & 0xff], axis=1).astype(np.uint8)
+
+	return PointCloud(values[:, :3], colors, timestamp)
+
+
+def decodeFrame(response, output):
+	if output == 'raw':
+		(header, color, depth) = rawFrame.decodeRawFrame(response.content)
+		return Frame(color, depth, header['timestamp'])
+	elif output == 'rgb+d':
+		return decodeRGB_D(response.json())
+	elif output == 'rgbd':
+		return decodeRGBD(response.json())
+	elif output in IMAGE_FORMATS:
+		return decodeImage(response.content, output)
+	elif output == 'pointcloud':
+		return decodePointCloud(response.content)
+	else:
+		raise NotImplementedError("Output format can not be decoded: {}".format(output))
+
+
+def _encodeConfigValue(field, value):
+	kind = CONFIG_TYPES.get(field)
+
+	if kind is None:
+		raise ValueError("Unknown config field: {}".format(field))
+	elif kind is bool:
+		if not isinstance(value, bool):
+			raise TypeError("{} must be bool, got {!r}".format(field, value))
+		return 'true' if value else 'false'
+	elif kind is int:
+		if isinstance(value, bool) or not isinstance(value, int):
+			raise TypeError("{} must be int, got {!r}".format(field, value))
+		return str(value)
+	elif kind is float:
+		if isinstance(value, bool) or not isinstance(value, (int, float)):
+			raise TypeError("{} must be number, got {!r}".format(field, value))
+		return repr(float(value))
+	elif kind is str:
+		if not isinstance(value, str):
+			raise TypeError("{} must be str, got {!r}".format(field, value))
+		return value
+	elif kind == VECTOR3:
+		if len(value) != 3:
+			raise TypeError("{} must be 3 numbers, got {!r}".format(field, value))
+		return [repr(float(v)) for v in value]
+	elif kind == NAMES:
+		if isinstance(value, str):
+			raise TypeError("{} must be list of names, got {!r}".format(field, value))
+		# Empty field clears the list
+		return [str(v) for v in value] or ['']
+	elif kind == DEVICE:
+		if not isinstance(value, (int, str)) or isinstance(value, bool):
+			raise TypeError("{} must be device number or path, got {!r}".format(field, value))
+		return str(value)
+
+
+def _decodeConfigValue(field, value):
+	kind = CONFIG_TYPES.get(field)
+
+	if kind == VECTOR3:
+		return tuple(float(v) for v in value)
+	elif kind == NAMES:
+		return list(value)
+	elif kind in (int, float, bool, str):
+		return kind(value)
+
+	return value
+
+
+class CameraClient:
+	"""
+	Client of REST service.
+
+	Every thread using the client has its own requests.Session, so
+	connections are kept alive and reused (no TCP handshake per frame) and
+	prefetching threads never share one session. Prefetching threads
+	(at most `prefetchThreads`) are created on first use of frames() and
+	reused by every next call, so number of sessions does not grow.
+	"""
+
+	def __init__(self, host='127.0.0.1', port=5000, timeout=15.0, prefetchThreads=PREFETCH_THREADS):
+		if ":" in host:
+			raise NotImplementedError("IPv6 support is not implemented")
+
+		self.baseUrl = "http://{}:{}".format(host, port)
+		self.timeout = timeout
+		self.prefetchThreads = max(prefetchThreads, 1)
+		self.__local = threading.local()
+		self.__lock = threading.Lock()
+		self.__sessions = []
+		self.__executor = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+		return False
+
+	def close(self):
+		with self.__lock:
+			executor = self.__executor
+			self.__executor = None
+
+		# Najpierw wątki w tle, żeby po zamknięciu sesji nie otworzyły nowych
+		if executor is not None:
+			executor.shutdown(wait=True)
+
+		with self.__lock:
+			sessions = self.__sessions
+			self.__sessions = []
+
+		for session in sessions:
+			session.close()
+
+	def __session(self):
+		session = getattr(self.__local, 'session', None)
+		if session is None:
+			session = requests.Session()
+			session.mount('http://', requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1))
+			self.__local.session = session
+
+			with self.__lock:
+				self.__sessions.append(session)
+
+		return session
+
+	def __prefetchExecutor(self):
+		with self.__lock:
+			if self.__executor is None:
+				self.__executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.prefetchThreads, thread_name_prefix="camera-client")
+
+			return self.__executor
+
+	def __request(self, method, path, **kwargs):
+		response = self.__session().request(method, self.baseUrl + path, timeout=self.timeout, **kwargs)
+
+		if response.status_code != 200:
+			try:
+				message = response.json()['error']
+			except (ValueError, KeyError, TypeError):
+				message = response.reason
+			raise CameraClientError(response.status_code, message)
+
+		return response
+
+	# Surowa odpowiedź (np. do zapisania pliku)
+	def get(self, input, output, **params):
+		return self.__request('GET', "/camera/{}/{}".format(input, output), params=params)
+
+	# Jedna klatka jako tablice numpy; `params` to parametry zapytania (roi, stride, scale, quality, ...)
+	def getFrame(self, input, output='raw', **params):
+		if output not in FRAME_FORMATS:
+			raise NotImplementedError("Not a frame format: {}".format(output))
+
+		return decodeFrame(self.get(input, output, **params), output)
+
+	def getPointCloud(self, input, **params):
+		return decodePointCloud(self.get(input, 'pointcloud', **params).content)
+
+	def frames(self, input, output='raw', prefetch=2, count=None, distinct=True, **params):
+		"""
+		Iterator of frames (Frame, or PointCloud for output "pointcloud").
+
+		Up to `prefetch` requests (downloading and decoding) run in background
+		while caller processes current frame, so loop is limited by camera
+		and server, not by round trips; more than `prefetchThreads` of the
+		client wait in queue. With `distinct` frames with the same
+		timestamp as previous one (the server shares one frame between
+		concurrent requests) are skipped; formats without timestamp are
+		never skipped.
+		"""
+
+		def fetch():
+			return decodeFrame(self.get(input, output, **params), output)
+
+		executor = self.__prefetchExecutor()
+		pending = collections.deque()
+		returned = 0
+		last = None
+
+		try:
+			while count is None or returned < count:
+				while len(pending) < max(prefetch, 1):
+					pending.append(executor.submit(fetch))
+
+				frame = pending.popleft().result()
+				if distinct and frame.timestamp is not None and frame.timestamp == last:
+					continue
+
+				last = frame.timestamp
+				returned = returned + 1
+				yield frame
+		finally:
+			for future in pending:
+				future.cancel()
+
+	# Konfiguracja z wartościami zamienionymi na typy z CONFIG_TYPES
+	def getConfig(self):
+		data = self.__request('GET', "/camera/request_config").json()
+		return {field: _decodeConfigValue(field, value) for (field, value) in data.items()}
+
+	# Zmiana wybranych pól, np. setConfig(camera_width=640, camera_height=480); typy są sprawdzane przed wysłaniem
+	def setConfig(self, **values):
+		form = {field: _encodeConfigValue(field, value) for (field, value) in values.items()}
+		return self.__request('POST', "/camera/request_config", data=form).json()
+
+
+def parseArgs():
+	parser = argparse.ArgumentParser()
+
+	parser.add_argument(
+		"--host",
+		metavar="IPv4",
+		help="IP address of REST API server (default: 127.0.0.1)",
+		type=str,
+		default="127.0.0.1")
+	parser.add_argument(
+		"--port",
+		help="port number of REST API server (default: 5000)",
+		type=int,
+		default=5000)
+	parser.add_argument(
+		"--inputMethod",
+		help="input method for REST API (default: usb_realsense)",
+		type=str,
+		default="usb_realsense",
+		choices=["opencv", "pybullet", "ros", "usb_realsense", "synthetic", "replay"])
+	parser.add_argument(
+		"--output",
+		help="output format (default: raw)",
+		type=str,
+		default="raw",
+		choices=FRAME_FORMATS + ('pointcloud',))
+	parser.add_argument(
+		"--frames",
+		help="number of frames to download (default: 100)",
+		type=int,
+		default=100)
+	parser.add_argument(
+		"--prefetch",
+		help="number of requests running in background (default: 2)",
+		type=int,
+		default=2)
+
+	return parser.parse_args()
+
+
+if __name__ == "__main__":
+	# Parse arguments passed to program
+	args = parseArgs()
+
+	with CameraClient(args.host, args.port, prefetchThreads=args.prefetch) as client:
+		start = time.perf_counter()
+		for frame in client.frames(args.inputMethod, args.output, prefetch=args.prefetch, count=args.frames):
+			pass
+		seconds = time.perf_counter() - start
+
+	print("Frames: {} in {:.2f} s ({:.1f} fps)".format(args.frames, seconds, args.frames / seconds))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import argparse
+import numpy as np
+import struct
+import requests
+
+
+# Must match RAW_HEADER in rest_api/flask_server/camera.py
+RAW_MAGIC = b'RGBD'
+RAW_VERSION = 1
+RAW_BYTE_ORDER_LITTLE = 0
+RAW_BYTE_ORDER_BIG = 1
+RAW_HEADER = struct.Struct('<4sHHIIBBBBd4x')
+
+
+def decodeRawFrame(data):
+	if len(data) < RAW_HEADER.size:
+		raise ValueError("Raw frame is shorter than header")
+
+	(magic, version, headerSize, width, height, colorBpp, depthBpp, byteOrder, _reserved, timestamp) = RAW_HEADER.unpack_from(data)
+
+	if magic != RAW_MAGIC:
+		raise ValueError("Wrong magic in raw frame: {}".format(magic))
+	if version != RAW_VERSION:
+		raise ValueError("Unsupported raw frame version: {}".format(version))
+	if colorBpp != 3 or depthBpp != 2:
+		raise ValueError("Unsupported bytes per pixel: color={} depth={}".format(colorBpp, depthBpp))
+
+	colorLength = width * height * colorBpp
+	depthLength = width * height * depthBpp
+	if len(data) != headerSize + colorLength + depthLength:
+		raise ValueError("Raw frame has wrong length: {}".format(len(data)))
+
+	depthType = '<u2' if byteOrder == RAW_BYTE_ORDER_LITTLE else '>u2'
+
+	# Views into data, no copying
+	color = np.frombuffer(data, dtype=np.uint8, count=colorLength, offset=headerSize).reshape(height, width, 3)
+	depth = np.frombuffer(data, dtype=depthType, count=width * height, offset=headerSize + colorLength).reshape(height, width)
+
+	header = {
+		'width': width,
+		'height': height,
+		'color_bpp': colorBpp,
+		'depth_bpp': depthBpp,
+		'timestamp': timestamp,
+	}
+
+	return (header, color, depth)
+
+
+def readRawFromAPI(host, port, inputMethod):
+	if ":" in host:
+		raise NotImplementedError("IPv6 support is not implemented")
+
+	r = requests.get("http://{}:{}/camera/{}/raw".format(host, port, inputMethod))
+
+	if r.status_code != 200:
+		print("REST API returned response code different than 200: {}. Aborting...".format(r.status_code))
+		raise ConnectionError
+
+	return decodeRawFrame(r.content)
+
+
+def parseArgs():
+	parser = argparse.ArgumentParser()
+
+	parser.add_argument(
+		"--host",
+		metavar="IPv4",
+		help="IP address of REST API server (default: 127.0.0.1)",
+		type=str,
+		default="127.0.0.1")
+	parser.add_argument(
+		"--port",
+		help="port number of REST API server (default: 5000)",
+		type=int,
+		default=5000)
+	parser.add_argument(
+		"--inputMethod",
+		help="input method for REST API (default: usb_realsense)",
+		type=str,
+		default="usb_realsense",
+		choices=["opencv", "pybullet", "ros", "usb_realsense"])
+
+	return parser.parse_args()
+
+
+if __name__ == "__main__":
+	# Parse arguments passed to program
+	args = parseArgs()
+
+	header, color, depth = readRawFromAPI(args.host, args.port, args.inputMethod)
+
+	print("Resolution: {}x{}".format(header['width'], header['height']))
+	print("Timestamp: {}".format(header['timestamp']))
+	print("Depth: min={} max={}".format(depth.min(), depth.max()))
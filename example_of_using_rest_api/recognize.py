@@ -2,13 +2,12 @@
 
 import argparse
 import cv2 as cv
-import io
 import numpy as np
 import math
 import pathlib
 import tempfile
 import time
-import requests
+from cameraClient import CameraClient, CameraClientError
 
 
 def detectCircles(image, param2=40):
@@ -99,30 +98,21 @@ def readFromFile(imgPath):
 
 
 def readFromAPI(host, port, inputMethod):
-	if ":" in host:
-		raise NotImplementedError("IPv6 support is not implemented")
-
 	# Download png image
-	r = requests.get("http://{}:{}/camera/{}/png".format(host, port, inputMethod))
-
-	if r.status_code != 200:
-		print("REST API returned response code different than 200: {}. Aborting...".format(r.status_code))
-		raise ConnectionError
-
-	# Create file-like object
-	imgIO = io.BytesIO()
-	for x in r.json()["png"]:
-		imgIO.write(x.to_bytes(1, "big"))
+	with CameraClient(host, port) as client:
+		try:
+			r = client.get(inputMethod, "png")
+		except CameraClientError as e:
+			print("REST API returned response code different than 200: {}. Aborting...".format(e))
+			raise ConnectionError
 
 	# DEBUG
-	#imgIO.seek(0)
 	#with tempfile.NamedTemporaryFile(delete=False) as f:
-	#	f.write(imgIO.read())
+	#	f.write(r.content)
 	#	print("PNG saved at: {}".format(f.name))
 
-	# Read image
-	imgIO.seek(0)
-	return cv.imdecode(np.frombuffer(imgIO.read(), dtype=np.uint8), cv.IMREAD_COLOR)
+	# Read image (response body is png file)
+	return cv.imdecode(np.frombuffer(r.content, dtype=np.uint8), cv.IMREAD_COLOR)
 
 
 def parseArgs():
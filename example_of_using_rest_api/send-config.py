@@ -1,38 +1,38 @@
 #!/usr/bin/env python
 
 import argparse
-import requests
+from cameraClient import CameraClient
 
 
 def worker_opencv():
 	return {
-		"camera_width": "640",
-		"camera_height": "480",
+		"camera_width": 640,
+		"camera_height": 480,
 		"worker_opencv_device": 0,
 	}
 
 
 def worker_usb_realsense():
 	return {
-		"camera_width": "640",
-		"camera_height": "480",
+		"camera_width": 640,
+		"camera_height": 480,
 	}
 
 
 def worker_pybullet():
 	return {
-		"camera_width": "640",
-		"camera_height": "480",
+		"camera_width": 640,
+		"camera_height": 480,
 		"worker_pybullet_aspect": 1.33,
-		"worker_pybullet_eye_position": [0,0,4],
-		"worker_pybullet_eye_up_vector": [0,1,0],
+		"worker_pybullet_eye_position": (0, 0, 4),
+		"worker_pybullet_eye_up_vector": (0, 1, 0),
 		"worker_pybullet_far_distance": 10,
 		"worker_pybullet_fov": 45,
 		"worker_pybullet_host": "127.0.0.1",
 		"worker_pybullet_mode": "tcp",
 		"worker_pybullet_near_distance": 0.1,
 		"worker_pybullet_port": 6667,
-		"worker_pybullet_target_position": [0,0,0],
+		"worker_pybullet_target_position": (0, 0, 0),
 	}
 
 
@@ -97,7 +97,8 @@ if __name__ == "__main__":
 	if args.usb_realsense:
 		payload = worker_usb_realsense()
 
-	r = requests.post("http://{}:{}/camera/request_config".format(args.host, args.port), data=payload)
-	r.raise_for_status()
+	# Typy wartości są sprawdzane przed wysłaniem (cameraClient.CONFIG_TYPES)
+	with CameraClient(args.host, args.port) as client:
+		client.setConfig(**payload)
 
 	print("DONE!")
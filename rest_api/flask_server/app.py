@@ -1,15 +1,59 @@
 #!/usr/bin/env python3
 
 from flask import Flask
+from flask import Response
 from flask import jsonify
 from flask import request
+from flask_sock import Sock
+import backendRegistry
 import camera
+import captureScheduler
 import config
+import frameArchive
+import framePush
+import frameTransform
+import json
+import math
+import metrics
+import pointcloud
+import profiling
+import reconfigure
+import streaming
+import time
 
 app = Flask(__name__)
+sock = Sock(app)
 
 
-def getFrame(input, output):
+# Backendy z [backends] preload są importowane od razu, pozostałe przy pierwszym użyciu
+def preloadBackends():
+	for (name, error) in backendRegistry.registry.preload(config.getConfig()['backends']['preload']).items():
+		app.logger.warning("Backend %s was not loaded: %s", name, error)
+
+
+preloadBackends()
+
+
+@app.before_request
+def startTiming():
+	metrics.startRequest()
+
+
+# Czasy etapów tego zapytania; dane binarne idą do klienta już po nagłówkach, więc ich wysyłanie nie jest liczone
+@app.after_request
+def addServerTiming(response):
+	timing = metrics.serverTiming()
+	if timing is not None:
+		response.headers['Server-Timing'] = timing
+	return response
+
+
+# Nagrania są w katalogu z sekcji [recording]
+def workerReplayCfg(cfg):
+	return dict(cfg['worker_replay'], directory=cfg['recording']['directory'])
+
+
+def getFrame(input, output, shared=True):
 	cfg = config.getConfig()
 	width = cfg['camera']['width']
 	height = cfg['camera']['height']
@@ -17,8 +61,125 @@ def getFrame(input, output):
 	ros2 = cfg['upload_ros']
 	opencv = cfg['worker_opencv']
 	pybullet = cfg['worker_pybullet']
+	replay = workerReplayCfg(cfg)
+	image = cfg['output_image']
+	reuseWindow = cfg['camera']['frame_reuse_window']
+
+	return camera.getFrame(input=input, output=output, width=width, height=height, workerRosCfg=ros, workerOpencvCfg=opencv, workerPybulletCfg=pybullet, uploadRosCfg=ros2,
+		outputImageCfg=image, params=request.args, reuseWindow=reuseWindow, workerReplayCfg=replay, shared=shared)
+
+
+# Samo zdjęcie (bez eksportu), konfiguracja czytana przy każdym wywołaniu
+def captureFrame(input):
+	cfg = config.getConfig()
+	width = cfg['camera']['width']
+	height = cfg['camera']['height']
+
+	return camera.captureFrame(input, width, height, workerRosCfg=cfg['worker_ros'], workerPybulletCfg=cfg['worker_pybullet'], workerOpencvCfg=cfg['worker_opencv'],
+		workerReplayCfg=workerReplayCfg(cfg), reuseWindow=cfg['camera']['frame_reuse_window'])
+
+
+# Dane binarne wysyłamy bezpośrednio, resztę jako JSON
+def makeResponse(data, input='', output=''):
+	if isinstance(data, camera.BinaryOutput):
+		response = Response(data.chunks, mimetype=data.mimetype)
+		if data.length is not None:
+			response.content_length = data.length
+		return response
+
+	with metrics.span('jsonify', input, output):
+		return jsonify(data)
+
+
+# Rodzaj strumienia => eksport jednej klatki (quality dla jpeg, compression dla png)
+STREAM_KINDS = {
+	'color': lambda frame, quality, compression: camera.exportToJPEG(frame, quality=quality),
+	'depth_png': lambda frame, quality, compression: camera.exportToDepthPNG(frame, compressLevel=compression),
+	'depth_colormap': lambda frame, quality, compression: camera.exportToDepthJPEG(frame, quality=quality),
+}
+
+
+# multipart/x-mixed-replace; wszyscy widzowie tego samego strumienia dzielą jednego producenta
+def streamResponse(input):
+	cfg = config.getConfig()
+
+	kind = request.args.get('kind', 'color')
+	if kind not in STREAM_KINDS:
+		return jsonify({'error': "Unknown stream kind: {} (expected one of: {})".format(kind, ", ".join(STREAM_KINDS))}), 400
+
+	# Te same zakresy co dla pojedynczego zdjęcia (ExportParamError to też ValueError)
+	try:
+		fps = float(request.args.get('fps', streaming.DEFAULT_FPS))
+		quality = camera._quality(request.args, cfg['output_image']['jpeg_quality'])
+		compression = camera._compression(request.args, cfg['output_image'])
+	except ValueError as e:
+		return jsonify({'error': str(e)}), 400
+
+	if not (math.isfinite(fps) and fps > 0):
+		return jsonify({'error': "fps must be positive: {}".format(fps)}), 400
+	fps = min(fps, streaming.MAX_FPS)
+
+	def encode(frame):
+		output = STREAM_KINDS[kind](frame, quality, compression)
+		return (output.mimetype, b''.join(output.chunks))
+
+	producer = streaming.hub.join((input, kind, fps, quality, compression), lambda: captureFrame(input), encode, fps)
+
+	return Response(streaming.multipart(producer), mimetype="multipart/x-mixed-replace; boundary={}".format(streaming.BOUNDARY))
+
 
-	return camera.getFrame(input=input, output=output, width=width, height=height, workerRosCfg=ros, workerOpencvCfg=opencv, workerPybulletCfg=pybullet, uploadRosCfg=ros2)
+# Etykieta w metrykach dla nieznanych formatów (nazwa z URL-a tworzyłaby nowe serie bez końca)
+UNKNOWN_OUTPUT = 'other'
+
+
+def cameraResponse(input, dataFormat):
+	if dataFormat == "stream":
+		return streamResponse(input)
+
+	# Nieznany format: bez robienia zdjęcia
+	if dataFormat not in backendRegistry.registry.names(backendRegistry.OUTPUT):
+		metrics.registry.countRequest(input, UNKNOWN_OUTPUT, 404)
+		return jsonify({'error': "Not recognised output format: {}".format(dataFormat)}), 404
+
+	try:
+		if request.args.get('profile', '0') not in ('', '0'):
+			(response, status) = _profiledResponse(input, dataFormat)
+		else:
+			(response, status) = _cameraResponse(input, dataFormat)
+	except Exception:
+		metrics.registry.countRequest(input, dataFormat, 500)
+		raise
+
+	metrics.registry.countRequest(input, dataFormat, status)
+	return response, status
+
+
+# ?profile=1 (tylko gdy profiling_enabled): zdjęcie bez silnika, w wątku zapytania, żeby profiler widział kod wejścia
+def _profiledResponse(input, dataFormat):
+	cfg = config.getConfig()['profiling']
+	if not cfg['enabled']:
+		return jsonify({'error': PROFILING_DISABLED}), 403
+
+	((response, status), profile) = profiling.profiler.run(lambda: _cameraResponse(input, dataFormat, shared=False),
+		request.full_path, input, dataFormat, keep=cfg['keep'], describe=lambda result: result[1])
+
+	response.headers['X-Profile-Id'] = str(profile.id)
+	response.headers['X-Profile'] = "/profiles/{}".format(profile.id)
+
+	return response, status
+
+
+def _cameraResponse(input, dataFormat, shared=True):
+	try:
+		return makeResponse(getFrame(input=input, output=dataFormat, shared=shared), input, dataFormat), 200
+	except (frameTransform.FrameTransformError, pointcloud.PointCloudError, camera.ExportParamError) as e:
+		return jsonify({'error': str(e)}), 400
+	except captureScheduler.CaptureTimeout as e:
+		return jsonify({'error': str(e)}), 504
+	except frameArchive.ArchiveError as e:
+		return jsonify({'error': str(e)}), 404
+	except backendRegistry.BackendUnavailable as e:
+		return jsonify({'error': str(e)}), 503
 
 
 @app.route("/")
@@ -28,13 +189,25 @@ def homepage():
 		<p>/camera/ros</p>
 		<p>/camera/opencv</p>
 		<p>/camera/pybullet</p>
+		<p>/camera/synthetic (sztuczne klatki bez sprzętu)</p>
+		<p>/camera/replay (odtwarzanie nagrania)</p>
 		<br/>
 		<p>/camera/request_config (parametry wysyłane do kamery do zrobienia zdjęcia)</p>
+		<br/>
+		<p>/ros_bridge/start, /ros_bridge/stop, /ros_bridge/status (ciągłe wysyłanie zdjęć do serwera ROS)</p>
+		<br/>
+		<p>/push/rgbd (WebSocket, binarne klatki RGB-D), /push/status</p>
+		<br/>
+		<p>/recording/start, /recording/stop, /recording/status (nagrywanie klatek), /replay/seek</p>
+		<br/>
+		<p>/metrics (czasy etapów i liczniki zapytań w formacie Prometheusa)</p>
+		<br/>
+		<p>/backends (dostępne wejścia i wyjścia)</p>
 	"""
 
 
 def supportedFormats():
-	return "<p>Supported formats: rgb+d rgbd png ros</p>"
+	return "<p>Supported formats: rgb+d rgbd raw png jpeg webp depth_png depth_jpeg pointcloud pointcloud_ros ros stream</p>"
 
 
 @app.route("/camera/usb_realsense")
@@ -44,12 +217,12 @@ def workerUSBRealsenseHelp():
 
 @app.route("/camera/usb_realsense/<string:dataFormat>")
 def workerUSBRealsense(dataFormat):
-	return jsonify(getFrame(input="usb_realsense", output=dataFormat))
+	return cameraResponse("usb_realsense", dataFormat)
 
 
 @app.route("/camera/opencv/<string:dataFormat>")
 def workerOpencv(dataFormat):
-	return jsonify(getFrame(input="opencv", output=dataFormat))
+	return cameraResponse("opencv", dataFormat)
 
 
 @app.route("/camera/opencv")
@@ -64,7 +237,7 @@ def workerROSHelp():
 
 @app.route("/camera/ros/<string:dataFormat>")
 def workerROS(dataFormat):
-	return jsonify(getFrame(input="ros", output=dataFormat))
+	return cameraResponse("ros", dataFormat)
 
 
 @app.route("/camera/pybullet")
@@ -74,109 +247,359 @@ def workerPybulletHelp():
 
 @app.route("/camera/pybullet/<string:dataFormat>")
 def workerPybullet(dataFormat):
-	return jsonify(getFrame(input="pybullet", output=dataFormat))
+	return cameraResponse("pybullet", dataFormat)
 
 
-@app.route("/camera/request_config", methods=["GET", "POST"])
-def requestConfig():
+@app.route("/camera/synthetic")
+def workerSyntheticHelp():
+	return supportedFormats()
+
+
+@app.route("/camera/synthetic/<string:dataFormat>")
+def workerSynthetic(dataFormat):
+	return cameraResponse("synthetic", dataFormat)
+
+
+@app.route("/camera/replay")
+def workerReplayHelp():
+	return supportedFormats()
+
+
+@app.route("/camera/replay/<string:dataFormat>")
+def workerReplay(dataFormat):
+	return cameraResponse("replay", dataFormat)
+
+
+# /ros_bridge potrzebuje tego samego co wyjście ros; roslibpy jest importowany dopiero tutaj
+def rosUploadModule():
+	backendRegistry.registry.get(backendRegistry.OUTPUT, 'ros')
+
+	import rosUpload
+	return rosUpload
+
+
+@app.errorhandler(backendRegistry.BackendUnavailable)
+def backendUnavailable(e):
+	return jsonify({'error': str(e)}), 503
+
+
+@app.route("/ros_bridge/start", methods=["POST"])
+def rosBridgeStart():
+	rosUpload = rosUploadModule()
 	cfg = config.getConfig()
+	ros2 = cfg['upload_ros']
 
-	if request.method == 'POST':
-		# [camera]
-		if 'camera_width' in request.form:
-			cfg['camera']['width'] = int(request.form['camera_width'])
+	input = request.form.get('input', 'usb_realsense')
+	if input not in ('usb_realsense', 'opencv', 'pybullet', 'synthetic', 'replay'):
+		return jsonify({'error': "Input method can not be republished: {}".format(input)}), 400
 
-		if 'camera_height' in request.form:
-			cfg['camera']['height'] = int(request.form['camera_height'])
+	try:
+		rate = float(request.form.get('rate', ros2['rate']))
+	except ValueError as e:
+		return jsonify({'error': "Wrong value of rate: {}".format(e)}), 400
 
-		# [worker_ros]
-		if 'worker_ros_topic_color' in request.form:
-			cfg['worker_ros']['topic_color'] = request.form['worker_ros_topic_color']
+	if not (math.isfinite(rate) and rate > 0):
+		return jsonify({'error': "Rate must be positive: {}".format(rate)}), 400
 
-		if 'worker_ros_topic_depth' in request.form:
-			cfg['worker_ros']['topic_depth'] = request.form['worker_ros_topic_depth']
+	rosUpload.republisher.start(
+		input,
+		capture=lambda: captureFrame(input),
+		getUploader=lambda: rosUpload.uploaders.getUploader(ros2['host'], ros2['port']),
+		topicColor=ros2['topic_color'],
+		topicDepth=ros2['topic_depth'],
+		rate=rate)
 
-		if 'worker_ros_host' in request.form:
-			cfg['worker_ros']['host'] = request.form['worker_ros_host']
+	return jsonify(rosUpload.republisher.status())
 
-		if 'worker_ros_port' in request.form:
-			cfg['worker_ros']['port'] = int(request.form['worker_ros_port'])
 
-		# [upload_ros]
-		if 'upload_ros_topic_color' in request.form:
-			cfg['upload_ros']['topic_color'] = request.form['upload_ros_topic_color']
+@app.route("/ros_bridge/stop", methods=["POST"])
+def rosBridgeStop():
+	rosUpload = rosUploadModule()
+	rosUpload.republisher.stop()
+	return jsonify(rosUpload.republisher.status())
 
-		if 'upload_ros_topic_depth' in request.form:
-			cfg['upload_ros']['topic_depth'] = request.form['upload_ros_topic_depth']
 
-		if 'upload_ros_host' in request.form:
-			cfg['upload_ros']['host'] = request.form['upload_ros_host']
+@app.route("/ros_bridge/status")
+def rosBridgeStatus():
+	return jsonify(rosUploadModule().republisher.status())
 
-		if 'upload_ros_port' in request.form:
-			cfg['upload_ros']['port'] = int(request.form['upload_ros_port'])
 
-		# [worker_opencv]
-		if 'worker_opencv_device' in request.form:
-			try:
-				dev = int(request.form['worker_opencv_device'])
-			except ValueError:
-				dev = request.form['worker_opencv_device']
-			cfg['worker_opencv']['device'] = dev
+# Nagrywanie klatek z jednego wejścia do archiwum (frameArchive)
+@app.route("/recording/start", methods=["POST"])
+def recordingStart():
+	cfg = config.getConfig()
 
-		# [worker_pybullet]
-		if 'worker_pybullet_mode' in request.form:
-			cfg['worker_pybullet']['mode'] = request.form['worker_pybullet_mode']
+	input = request.form.get('input', 'usb_realsense')
+	if input not in ('usb_realsense', 'ros', 'opencv', 'pybullet', 'synthetic'):
+		return jsonify({'error': "Input method can not be recorded: {}".format(input)}), 400
 
-		if 'worker_pybullet_host' in request.form:
-			cfg['worker_pybullet']['host'] = request.form['worker_pybullet_host']
+	overwrite = _boolean([request.form.get('overwrite', '0')])
 
-		if 'worker_pybullet_port' in request.form:
-			cfg['worker_pybullet']['port'] = int(request.form['worker_pybullet_port'])
+	try:
+		frameArchive.recorder.start(input, cfg['recording']['directory'], request.form.get('name', cfg['worker_replay']['name']), overwrite)
+	except frameArchive.ArchiveExists as e:
+		return jsonify({'error': "{} (post overwrite=1 to replace it)".format(e)}), 409
+	except frameArchive.ArchiveError as e:
+		return jsonify({'error': str(e)}), 400
 
-		if 'worker_pybullet_eye_position' in request.form:
-			cfg['worker_pybullet']['eye_position'] = map(int, request.form.getlist('worker_pybullet_eye_position'))
+	return jsonify(frameArchive.recorder.status())
 
-		if 'worker_pybullet_eye_up_vector' in request.form:
-			cfg['worker_pybullet']['eye_up_vector'] = map(int, request.form.getlist('worker_pybullet_eye_up_vector'))
 
-		if 'worker_pybullet_target_position' in request.form:
-			cfg['worker_pybullet']['target_position'] = map(int, request.form.getlist('worker_pybullet_target_position'))
+@app.route("/recording/stop", methods=["POST"])
+def recordingStop():
+	frameArchive.recorder.stop()
+	return jsonify(frameArchive.recorder.status())
 
-		if 'worker_pybullet_fov' in request.form:
-			cfg['worker_pybullet']['fov'] = float(request.form['worker_pybullet_fov'])
 
-		if 'worker_pybullet_aspect' in request.form:
-			cfg['worker_pybullet']['aspect'] = float(request.form['worker_pybullet_aspect'])
+@app.route("/recording/status")
+def recordingStatus():
+	return jsonify(frameArchive.recorder.status())
 
-		if 'worker_pybullet_near_distance' in request.form:
-			cfg['worker_pybullet']['near_distance'] = float(request.form['worker_pybullet_near_distance'])
 
-		if 'worker_pybullet_far_distance' in request.form:
-			cfg['worker_pybullet']['far_distance'] = float(request.form['worker_pybullet_far_distance'])
+# Przewiń odtwarzanie do danego czasu nagrania (timestamp klatki, sekundy od epoki)
+@app.route("/replay/seek", methods=["POST"])
+def replaySeek():
+	replay = workerReplayCfg(config.getConfig())
+
+	try:
+		timestamp = float(request.form['timestamp'])
+		return jsonify(frameArchive.player.seek(replay['directory'], replay['name'], timestamp))
+	except (KeyError, ValueError) as e:
+		return jsonify({'error': "Wrong value of timestamp: {}".format(e)}), 400
+	except frameArchive.ArchiveError as e:
+		return jsonify({'error': str(e)}), 400
+
+
+# WebSocket: każda wiadomość binarna to jedna klatka w formacie `raw`
+# Błędy są wysyłane jako wiadomość tekstowa JSON, po czym połączenie jest zamykane
+@sock.route("/push/rgbd")
+def pushRGBD(ws):
+	input = request.args.get('input', 'usb_realsense')
+
+	try:
+		if input not in ('usb_realsense', 'ros', 'opencv', 'pybullet', 'synthetic', 'replay'):
+			raise ValueError("Unknown input method: {}".format(input))
+
+		factor = int(request.args.get('downscale', 1))
+		fps = float(request.args.get('fps', framePush.MAX_FPS))
+		queueSize = int(request.args.get('queue', framePush.QUEUE_SIZE))
+
+		# nan przechodzi przez `fps <= 0`, a wydawca liczy z niego okres między klatkami
+		if factor < 1 or not (math.isfinite(fps) and fps > 0) or queueSize < 1:
+			raise ValueError("downscale, fps and queue must be positive: downscale={}, fps={}, queue={}".format(factor, fps, queueSize))
+	except ValueError as e:
+		ws.send(json.dumps({'error': str(e)}))
+		return
+
+	subscription = framePush.hub.subscribe(input, lambda: captureFrame(input), factor, fps, queueSize)
+	try:
+		while True:
+			data = subscription.get()
+			if data is None:
+				break
+			ws.send(data)
+
+		error = subscription.status()['error']
+		if error is not None:
+			ws.send(json.dumps({'error': error}))
+	finally:
+		framePush.hub.unsubscribe(subscription)
+
+
+# Wejścia i wyjścia: czy są załadowane, czy da się ich użyć i dlaczego nie
+@app.route("/backends")
+def backendsStatus():
+	return jsonify({'backends': backendRegistry.registry.status()})
+
+
+@app.route("/metrics")
+def metricsEndpoint():
+	return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
+PROFILING_DISABLED = "Profiling is disabled (set profiling_enabled)"
+
+
+# Profile są dostępne tylko gdy profiling_enabled (serwer nie ma innej autoryzacji)
+def _profileResponse(id, make):
+	if not config.getConfig()['profiling']['enabled']:
+		return jsonify({'error': PROFILING_DISABLED}), 403
+
+	profile = profiling.profiler.get(id)
+	if profile is None:
+		return jsonify({'error': "No profile {} (only last ones are kept)".format(id)}), 404
+
+	return make(profile)
+
+
+@app.route("/profiles")
+def profiles():
+	if not config.getConfig()['profiling']['enabled']:
+		return jsonify({'error': PROFILING_DISABLED}), 403
+
+	return jsonify({'profiles': profiling.profiler.profiles()})
+
+
+@app.route("/profiles/<int:id>")
+def profileText(id):
+	return _profileResponse(id, lambda profile: Response(profile.text(), mimetype="text/plain"))
+
+
+@app.route("/profiles/<int:id>/pstats")
+def profilePstats(id):
+	def make(profile):
+		response = Response(profile.pstatsDump(), mimetype="application/octet-stream")
+		response.headers['Content-Disposition'] = 'attachment; filename="profile-{}.pstats"'.format(id)
+		return response
+
+	return _profileResponse(id, make)
+
+
+@app.route("/profiles/<int:id>/collapsed")
+def profileCollapsed(id):
+	return _profileResponse(id, lambda profile: Response(profile.collapsed, mimetype="text/plain"))
+
+
+@app.route("/push/status")
+def pushStatus():
+	return jsonify(framePush.hub.status())
+
+
+# Konwersja i walidacja pól formularza; dostają listę wartości pola
+def _integer(minimum=None, maximum=None):
+	return _number(int, minimum, maximum)
+
+
+def _real(minimum=None, maximum=None):
+	return _number(float, minimum, maximum)
+
+
+def _number(convert, minimum, maximum):
+	def parse(values):
+		value = convert(values[0])
+		if minimum is not None and value < minimum:
+			raise ValueError("{} is smaller than {}".format(value, minimum))
+		if maximum is not None and value > maximum:
+			raise ValueError("{} is bigger than {}".format(value, maximum))
+		return value
+	return parse
+
+
+def _text(values):
+	if values[0] == '':
+		raise ValueError("empty value")
+	return values[0]
+
+
+def _choice(*choices):
+	def parse(values):
+		if values[0] not in choices:
+			raise ValueError("{} is not one of: {}".format(values[0], ", ".join(choices)))
+		return values[0]
+	return parse
+
+
+def _boolean(values):
+	return values[0].lower() in ('1', 'true', 'yes')
+
+
+def _vector3(values):
+	if len(values) != 3:
+		raise ValueError("expected 3 numbers, got {}".format(len(values)))
+	return [float(v) for v in values]
+
+
+# Lista nazw (pole formularza powtórzone), pusta wartość to pusta lista
+def _names(values):
+	return [v.strip() for v in values if v.strip()]
+
+
+def _device(values):
+	try:
+		return int(values[0])
+	except ValueError:
+		return _text(values)
+
+
+# pole formularza => (sekcja, klucz, konwersja)
+CONFIG_FIELDS = {
+	# [camera]
+	'camera_width': ('camera', 'width', _integer(1)),
+	'camera_height': ('camera', 'height', _integer(1)),
+	'camera_frame_reuse_window': ('camera', 'frame_reuse_window', _real(0.0)),
+	# [worker_ros]
+	'worker_ros_topic_color': ('worker_ros', 'topic_color', _text),
+	'worker_ros_topic_depth': ('worker_ros', 'topic_depth', _text),
+	'worker_ros_host': ('worker_ros', 'host', _text),
+	'worker_ros_port': ('worker_ros', 'port', _integer(1, 65535)),
+	'worker_ros_sync_slop': ('worker_ros', 'sync_slop', _real(0.0)),
+	# [upload_ros]
+	'upload_ros_topic_color': ('upload_ros', 'topic_color', _text),
+	'upload_ros_topic_depth': ('upload_ros', 'topic_depth', _text),
+	'upload_ros_topic_pointcloud': ('upload_ros', 'topic_pointcloud', _text),
+	'upload_ros_host': ('upload_ros', 'host', _text),
+	'upload_ros_port': ('upload_ros', 'port', _integer(1, 65535)),
+	'upload_ros_rate': ('upload_ros', 'rate', _real(0.001)),
+	# [worker_opencv]
+	'worker_opencv_device': ('worker_opencv', 'device', _device),
+	'worker_opencv_idle_timeout': ('worker_opencv', 'idle_timeout', _real(0.0)),
+	# [worker_pybullet]
+	'worker_pybullet_mode': ('worker_pybullet', 'mode', _choice('tcp', 'udp', 'direct', 'shared_memory')),
+	'worker_pybullet_host': ('worker_pybullet', 'host', _text),
+	'worker_pybullet_port': ('worker_pybullet', 'port', _integer(1, 65535)),
+	'worker_pybullet_eye_position': ('worker_pybullet', 'eye_position', _vector3),
+	'worker_pybullet_eye_up_vector': ('worker_pybullet', 'eye_up_vector', _vector3),
+	'worker_pybullet_target_position': ('worker_pybullet', 'target_position', _vector3),
+	'worker_pybullet_fov': ('worker_pybullet', 'fov', _real(0.001, 179.999)),
+	'worker_pybullet_aspect': ('worker_pybullet', 'aspect', _real(0.001)),
+	'worker_pybullet_near_distance': ('worker_pybullet', 'near_distance', _real(0.0)),
+	'worker_pybullet_far_distance': ('worker_pybullet', 'far_distance', _real(0.0)),
+	'worker_pybullet_linear_depth': ('worker_pybullet', 'linear_depth', _boolean),
+	# [worker_replay]
+	'worker_replay_name': ('worker_replay', 'name', _text),
+	'worker_replay_realtime': ('worker_replay', 'realtime', _boolean),
+	'worker_replay_loop': ('worker_replay', 'loop', _boolean),
+	# [recording]
+	'recording_directory': ('recording', 'directory', _text),
+	# [backends]
+	'backends_preload': ('backends', 'preload', _names),
+	# [profiling]
+	'profiling_enabled': ('profiling', 'enabled', _boolean),
+	'profiling_keep': ('profiling', 'keep', _integer(1)),
+	# [output_image]
+	'output_image_png_compression_level': ('output_image', 'png_compression_level', _integer(0, 9)),
+	'output_image_jpeg_quality': ('output_image', 'jpeg_quality', _integer(0, 100)),
+	'output_image_webp_quality': ('output_image', 'webp_quality', _integer(0, 100)),
+}
+
+
+@app.route("/camera/request_config", methods=["GET", "POST"])
+def requestConfig():
+	cfg = config.getConfig()
+
+	if request.method == 'POST':
+		start = time.perf_counter()
+
+		for (field, (section, key, parse)) in CONFIG_FIELDS.items():
+			if field not in request.form:
+				continue
+
+			try:
+				cfg[section][key] = parse(request.form.getlist(field))
+			except ValueError as e:
+				return jsonify({'error': "Wrong value of {}: {}".format(field, e)}), 400
+
+		if cfg['worker_pybullet']['near_distance'] >= cfg['worker_pybullet']['far_distance']:
+			return jsonify({'error': "worker_pybullet_near_distance must be smaller than worker_pybullet_far_distance"}), 400
+
+		changed = reconfigure.diff(config.getConfig(), cfg)
+		backends = config.saveConfig(cfg)
 
-		config.saveConfig(cfg)
-		return jsonify({})
-	elif request.method == 'GET':
 		return jsonify({
-			'camera_width': cfg['camera']['width'],
-			'camera_height': cfg['camera']['height'],
-			'worker_ros_topic_color': cfg['worker_ros']['topic_color'],
-			'worker_ros_topic_depth': cfg['worker_ros']['topic_depth'],
-			'worker_ros_host': cfg['worker_ros']['host'],
-			'worker_ros_port': cfg['worker_ros']['port'],
-			'upload_ros_topic_color': cfg['upload_ros']['topic_color'],
-			'upload_ros_topic_depth': cfg['upload_ros']['topic_depth'],
-			'upload_ros_host': cfg['upload_ros']['host'],
-			'upload_ros_port': cfg['upload_ros']['port'],
-			'worker_opencv_device': cfg['worker_opencv']['device'],
-			'worker_pybullet_mode': cfg['worker_pybullet']['mode'],
-			'worker_pybullet_host': cfg['worker_pybullet']['host'],
-			'worker_pybullet_port': cfg['worker_pybullet']['port'],
-			'worker_pybullet_eye_position': cfg['worker_pybullet']['eye_position'],
-			'worker_pybullet_eye_up_vector': cfg['worker_pybullet']['eye_up_vector'],
-			'worker_pybullet_target_position': cfg['worker_pybullet']['target_position'],
-			'worker_pybullet_fov': cfg['worker_pybullet']['fov'],
-			'worker_pybullet_aspect': cfg['worker_pybullet']['aspect'],
-			'worker_pybullet_near_distance': cfg['worker_pybullet']['near_distance'],
-			'worker_pybullet_far_distance': cfg['worker_pybullet']['far_distance'],
+			'changed': sorted(changed),
+			'backends': backends,
+			'version': config.getVersion(),
+			'seconds': time.perf_counter() - start,
 		})
+	elif request.method == 'GET':
+		return jsonify({field: cfg[section][key] for (field, (section, key, _parse)) in CONFIG_FIELDS.items()})
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+
+import importlib
+import importlib.util
+import threading
+import time
+
+
+INPUT = 'input'
+OUTPUT = 'output'
+
+# Komunikat dla nieznanej nazwy (jak wcześniej w camera.py)
+KIND_NAMES = {
+	INPUT: 'input method',
+	OUTPUT: 'output format',
+}
+
+
+class BackendUnavailable(Exception):
+	pass
+
+
+class Backend:
+	"""
+	One input or output.
+
+	Plugin backend is attribute `attribute` of module `module`, imported on
+	first use (not at server start). Before importing, libraries from
+	`requires` are looked up without importing them, so missing library is
+	reported with its name. Failed import is remembered and reported by
+	status() and every next use.
+
+	Builtin backend is given directly as `target` (needs nothing more than the
+	server itself).
+	"""
+
+	def __init__(self, kind, name, module=None, attribute=None, requires=(), target=None):
+		self.kind = kind
+		self.name = name
+		self.module = module
+		self.attribute = attribute
+		self.requires = tuple(requires)
+		self.__lock = threading.Lock()
+		self.__target = target
+		self.__error = None
+		self.__seconds = None
+
+	@property
+	def builtin(self):
+		return self.module is None
+
+	@property
+	def loaded(self):
+		return self.__target is not None
+
+	def load(self):
+		target = self.__target
+		if target is not None:
+			return target
+
+		with self.__lock:
+			if self.__target is None and self.__error is None:
+				self.__import()
+
+			if self.__error is not None:
+				raise BackendUnavailable("{} {} is not available: {}".format(self.kind.capitalize(), self.name, self.__error))
+
+			return self.__target
+
+	def __import(self):
+		missing = [r for r in self.requires if importlib.util.find_spec(r) is None]
+		if missing:
+			self.__error = "missing {}".format(", ".join(missing))
+			return
+
+		start = time.perf_counter()
+		try:
+			module = importlib.import_module(self.module)
+			self.__target = getattr(module, self.attribute)
+		except Exception as e:
+			self.__error = "{}: {}".format(type(e).__name__, e)
+		finally:
+			self.__seconds = time.perf_counter() - start
+
+	# Czy da się użyć (bez importowania, gdy jeszcze nie był ładowany)
+	def available(self):
+		if self.__target is not None:
+			return True
+		if self.__error is not None:
+			return False
+
+		return all(importlib.util.find_spec(r) is not None for r in self.requires)
+
+	def status(self):
+		with self.__lock:
+			return {
+				'kind': self.kind,
+				'name': self.name,
+				'module': self.module,
+				'requires': list(self.requires),
+				'loaded': self.loaded,
+				'available': self.available(),
+				'error': self.__error,
+				'import_seconds': self.__seconds,
+			}
+
+
+class BackendRegistry:
+	"""
+	Inputs and outputs by name.
+
+	Input plugin is function `capture(width, height, cfg)` returning
+	InternalFrameFormat, where `cfg` is configuration section of the input
+	(or None). Output plugin is function
+	`export(frame, params, uploadRosCfg, outputImageCfg)` returning data for
+	response (dict for JSON or camera.BinaryOutput).
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__backends = {}
+
+	def add(self, backend):
+		with self.__lock:
+			self.__backends[(backend.kind, backend.name)] = backend
+
+	def addPlugin(self, kind, name, module, attribute, requires=()):
+		self.add(Backend(kind, name, module=module, attribute=attribute, requires=requires))
+
+	def addBuiltin(self, kind, name, target):
+		self.add(Backend(kind, name, target=target))
+
+	def backend(self, kind, name):
+		with self.__lock:
+			backend = self.__backends.get((kind, name))
+
+		if backend is None:
+			raise NotImplementedError("Not recognised {}: {}".format(KIND_NAMES[kind], name))
+
+		return backend
+
+	# Funkcja backendu (import modułu przy pierwszym użyciu)
+	def get(self, kind, name):
+		return self.backend(kind, name).load()
+
+	def names(self, kind):
+		with self.__lock:
+			return [n for (k, n) in self.__backends if k == kind]
+
+	def status(self):
+		with self.__lock:
+			backends = list(self.__backends.values())
+
+		return [b.status() for b in backends]
+
+	# Załaduj od razu podane backendy ("input:nazwa" albo "output:nazwa", sama nazwa to wejście);
+	# zwraca błędy zamiast je rzucać, żeby brak biblioteki nie blokował startu serwera
+	def preload(self, names):
+		errors = {}
+
+		for name in names:
+			(kind, _, backendName) = name.rpartition(':')
+			try:
+				self.get(kind or INPUT, backendName)
+			except (NotImplementedError, BackendUnavailable, KeyError) as e:
+				errors[name] = str(e)
+
+		return errors
+
+
+registry = BackendRegistry()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+# Backendy ładowane przy starcie serwera ([backends] preload) w kolejnych pomiarach startu
+STARTUP_SCENARIOS = {
+	'none': [],
+	'synthetic': ['synthetic'],
+	'opencv': ['opencv'],
+	'usb_realsense': ['usb_realsense'],
+	'pybullet': ['pybullet'],
+	'ros': ['ros', 'output:ros'],
+	'all': ['usb_realsense', 'ros', 'opencv', 'pybullet', 'synthetic', 'replay', 'output:ros'],
+}
+
+# Start serwera to osobny proces, więc powtórzeń jest mniej
+STARTUP_REPEAT = 5
+
+# Median slower by more than this fraction of baseline is reported as regression
+REGRESSION_THRESHOLD = 0.10
+
+
+# Czas wykonania `fn` (w sekundach) dla `repeat` powtórzeń
+def measure(fn, repeat):
+	times = []
+	for _ in range(repeat):
+		start = time.perf_counter()
+		fn()
+		times.append(time.perf_counter() - start)
+
+	return {
+		'min': min(times),
+		'median': statistics.median(times),
+		'mean': statistics.mean(times),
+	}
+
+
+# Czas, przepustowość (klatki/s, MB/s wyniku) i szczytowa pamięć (tracemalloc, osobne wywołanie)
+# `size(result)` zwraca liczbę bajtów wyniku
+def measureStage(fn, repeat, size=None):
+	result = measure(fn, repeat)
+
+	tracemalloc.start()
+	try:
+		output = fn()
+		(_current, peak) = tracemalloc.get_traced_memory()
+	finally:
+		tracemalloc.stop()
+
+	result['fps'] = 1.0 / result['median'] if result['median'] > 0 else None
+	result['peak_memory'] = peak
+	if size is not None:
+		result['bytes'] = size(output)
+		result['mb_per_s'] = result['bytes'] / result['median'] / 1e6 if result['median'] > 0 else None
+
+	return result
+
+
+# Eksport binarny jest leniwy, więc liczymy czas razem z przejściem przez wszystkie kawałki
+def _binaryChunks(output):
+	return list(output.chunks)
+
+
+def _chunksSize(chunks):
+	return sum(len(chunk) for chunk in chunks)
+
+
+# Osobna konfiguracja w katalogu tymczasowym, żeby nie ruszać config.toml użytkownika
+# (przed importem app, który czyta konfigurację przy starcie)
+def _benchConfig(width, height):
+	import config
+
+	config.configPath = os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'config.toml')
+	cfg = config.getConfig()
+	cfg['camera']['width'] = width
+	cfg['camera']['height'] = height
+	cfg['camera']['frame_reuse_window'] = 0.0
+	config.saveConfig(cfg)
+
+
+# Poszczególne etapy na sztucznej kamerze: pozyskanie, konwersja, eksporty, JSON i zapytanie HTTP
+def benchSynthetic(width, height, repeat):
+	_benchConfig(width, height)
+
+	import app
+	import camera
+	import opencvPool
+	import syntheticCamera
+
+	client = app.app.test_client()
+
+	sequence = iter(range(1 << 62))
+	(color, _depth) = syntheticCamera.syntheticArrays(width, height, 0)
+	bgr = color[:, :, ::-1].copy()
+	frame = syntheticCamera.syntheticFrame(width, height, 0)
+	rgb_d = camera.exportToRGB_D(frame)
+
+	def http(path):
+		response = client.get(path)
+		assert response.status_code == 200, response.status_code
+		return response.data
+
+	return {
+		'acquire': measureStage(lambda: syntheticCamera.syntheticArrays(width, height, next(sequence)), repeat),
+		'convert': measureStage(lambda: opencvPool.convertFrame(bgr), repeat),
+		'export_rgb_d': measureStage(lambda: camera.exportToRGB_D(frame), repeat),
+		'export_rgbd': measureStage(lambda: camera.exportToRGBD(frame), repeat),
+		'export_png': measureStage(lambda: b''.join(camera.exportToPNG(frame).chunks), repeat, len),
+		'export_raw': measureStage(lambda: _binaryChunks(camera.exportToRaw(frame)), repeat, _chunksSize),
+		'json_rgb_d': measureStage(lambda: json.dumps(rgb_d), repeat, len),
+		'http_rgb_d': measureStage(lambda: http('/camera/synthetic/rgb+d'), repeat, len),
+		'http_png': measureStage(lambda: http('/camera/synthetic/png'), repeat, len),
+		'http_raw': measureStage(lambda: http('/camera/synthetic/raw'), repeat, len),
+	}
+
+
+# Render w pybullet (tryb DIRECT) vs konwersja wyniku na InternalFrameFormat
+def benchPybulletConvert(width, height, repeat):
+	import pybullet as pb
+	import pybulletClient
+
+	clientId = pb.connect(pb.DIRECT)
+	try:
+		view = pybulletClient.viewMatrix((0, 0, 3), (0, 0, 0), (0, 1, 0))
+		projection = pybulletClient.projectionMatrix(45.0, width / height, 0.1, 3.1)
+
+		def render():
+			return pb.getCameraImage(width=width, height=height, viewMatrix=view, projectionMatrix=projection, physicsClientId=clientId)
+
+		(w, h, rgbaImg, depthImg, _segImg) = render()
+
+		results = {
+			'render': measure(render, repeat),
+			'convert': measure(lambda: pybulletClient.convertCameraImage(w, h, rgbaImg, depthImg, 0.1, 3.1), repeat),
+			'convert_linear': measure(lambda: pybulletClient.convertCameraImage(w, h, rgbaImg, depthImg, 0.1, 3.1, linearDepth=True), repeat),
+		}
+	finally:
+		pb.disconnect(clientId)
+
+	results['convert_share'] = results['convert']['median'] / (results['render']['median'] + results['convert']['median'])
+
+	return results
+
+
+# Wykonywane w nowym procesie: import serwera z podaną konfiguracją
+_STARTUP_CODE = '''
+import time
+start = time.perf_counter()
+import config
+config.configPath = {configPath!r}
+import app
+seconds = time.perf_counter() - start
+
+import backendRegistry
+import json
+import resource
+import sys
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{
+	'seconds': seconds,
+	'max_rss': rss if sys.platform == 'darwin' else rss * 1024,
+	'modules': len(sys.modules),
+	'unavailable': [s['kind'] + ':' + s['name'] for s in backendRegistry.registry.status() if s['error']],
+}}))
+'''
+
+
+def _startupOnce(preload):
+	import config
+	import toml
+
+	configPath = os.path.join(tempfile.mkdtemp(prefix='benchmark-'), 'config.toml')
+	cfg = toml.loads(config.defaultConfig)
+	cfg['backends']['preload'] = preload
+	with open(configPath, 'w') as f:
+		toml.dump(cfg, f)
+
+	start = time.perf_counter()
+	output = subprocess.run([sys.executable, '-c', _STARTUP_CODE.format(configPath=configPath)], cwd=os.path.dirname(os.path.realpath(__file__)),
+		capture_output=True, text=True, check=True).stdout
+	result = json.loads(output.splitlines()[-1])
+	result['process_seconds'] = time.perf_counter() - start
+
+	return result
+
+
+# Czas importu serwera (w procesie i razem ze startem interpretera), pamięć (maksymalny RSS)
+# i liczba modułów w zależności od backendów ładowanych przy starcie
+def benchStartup(width, height, repeat):
+	results = {}
+
+	for (name, preload) in STARTUP_SCENARIOS.items():
+		runs = [_startupOnce(preload) for _ in range(min(repeat, STARTUP_REPEAT))]
+		times = [r['seconds'] for r in runs]
+
+		results[name] = {
+			'min': min(times),
+			'median': statistics.median(times),
+			'mean': statistics.mean(times),
+			'process_median': statistics.median(r['process_seconds'] for r in runs),
+			'max_rss': statistics.median(r['max_rss'] for r in runs),
+			'modules': runs[-1]['modules'],
+			'unavailable': runs[-1]['unavailable'],
+		}
+
+	return results
+
+
+BENCHMARKS = {
+	'pybullet_convert': benchPybulletConvert,
+	'startup': benchStartup,
+	'synthetic': benchSynthetic,
+}
+
+# Wynik nie zależy od rozdzielczości, mierzone raz
+RESOLUTION_INDEPENDENT = {'startup'}
+
+
+def _gitCommit():
+	try:
+		return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.realpath(__file__)),
+			capture_output=True, text=True, check=True).stdout.strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def environment():
+	import numpy
+
+	return {
+		'commit': _gitCommit(),
+		'time': time.time(),
+		'python': platform.python_version(),
+		'numpy': numpy.__version__,
+		'machine': platform.machine(),
+		'platform': platform.platform(),
+	}
+
+
+# Porównaj mediany z poprzednim wynikiem; zwraca listę etapów wolniejszych o więcej niż `threshold`
+def compare(baseline, results, threshold=REGRESSION_THRESHOLD):
+	old = {}
+	for r in baseline['results']:
+		for (stage, value) in r['results'].items():
+			if isinstance(value, dict):
+				old[(r['benchmark'], r['width'], r['height'], stage)] = value['median']
+
+	regressions = []
+	for r in results:
+		for (stage, value) in r['results'].items():
+			key = (r['benchmark'], r['width'], r['height'], stage)
+			if not isinstance(value, dict) or key not in old or old[key] <= 0:
+				continue
+
+			change = value['median'] / old[key] - 1
+			if change > threshold:
+				regressions.append({
+					'benchmark': r['benchmark'],
+					'width': r['width'],
+					'height': r['height'],
+					'stage': stage,
+					'baseline': old[key],
+					'median': value['median'],
+					'change': change,
+				})
+
+	return regressions
+
+
+def parseArgs():
+	parser = argparse.ArgumentParser()
+
+	parser.add_argument(
+		"--benchmark",
+		help="benchmark to run (default: all)",
+		type=str,
+		action="append",
+		choices=sorted(BENCHMARKS.keys()))
+	parser.add_argument(
+		"--repeat",
+		help="number of repetitions of every measurement (default: 20)",
+		type=int,
+		default=20)
+	parser.add_argument(
+		"--json",
+		metavar="PATH",
+		help="write results to file in JSON format",
+		type=str)
+	parser.add_argument(
+		"--resolution",
+		metavar="WIDTHxHEIGHT",
+		help="resolution to measure (default: {})".format(", ".join("{}x{}".format(w, h) for (w, h) in RESOLUTIONS)),
+		type=lambda value: tuple(int(v) for v in value.split('x')),
+		action="append")
+	parser.add_argument(
+		"--compare",
+		metavar="PATH",
+		help="compare with results written earlier by --json and exit with code 1 on regression",
+		type=str)
+	parser.add_argument(
+		"--threshold",
+		help="relative slowdown of median reported as regression (default: {})".format(REGRESSION_THRESHOLD),
+		type=float,
+		default=REGRESSION_THRESHOLD)
+
+	return parser.parse_args()
+
+
+if __name__ == "__main__":
+	# Parse arguments passed to program
+	args = parseArgs()
+
+	results = []
+	for name in args.benchmark or sorted(BENCHMARKS.keys()):
+		resolutions = [(None, None)] if name in RESOLUTION_INDEPENDENT else args.resolution or RESOLUTIONS
+
+		for (width, height) in resolutions:
+			r = BENCHMARKS[name](width, height, args.repeat)
+			results.append({'benchmark': name, 'width': width, 'height': height, 'results': r})
+
+			print(name if width is None else "{} {}x{}".format(name, width, height))
+			for (stage, value) in r.items():
+				if isinstance(value, dict) and 'max_rss' in value:
+					print("  {:<16} median {:8.3f} ms   min {:8.3f} ms   process {:8.3f} ms   rss {:8.1f} MB   {:5d} modules{}".format(
+						stage, value['median'] * 1000, value['min'] * 1000, value['process_median'] * 1000, value['max_rss'] / 1e6, value['modules'],
+						"   unavailable: {}".format(", ".join(value['unavailable'])) if value['unavailable'] else ""))
+				elif isinstance(value, dict):
+					print("  {:<16} median {:8.3f} ms   min {:8.3f} ms   {:8.1f} fps   peak {:8.1f} MB".format(
+						stage, value['median'] * 1000, value['min'] * 1000, value.get('fps') or 0.0, value.get('peak_memory', 0) / 1e6))
+				else:
+					print("  {:<16} {:.3f}".format(stage, value))
+
+	if args.json:
+		with open(args.json, 'w') as f:
+			json.dump({'environment': environment(), 'results': results}, f, indent=2)
+
+	if args.compare:
+		with open(args.compare) as f:
+			regressions = compare(json.load(f), results, args.threshold)
+
+		for r in regressions:
+			print("REGRESSION {benchmark} {width}x{height} {stage}: {baseline_ms:.3f} ms => {median_ms:.3f} ms (+{percent:.0f}%)".format(
+				baseline_ms=r['baseline'] * 1000, median_ms=r['median'] * 1000, percent=r['change'] * 100, **r))
+
+		if regressions:
+			sys.exit(1)
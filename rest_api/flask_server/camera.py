@@ -1,78 +1,63 @@
 #!/usr/bin/env python3
 
-import base64
-import cv2 as cv
+import backendRegistry
+import captureScheduler
+from frameFormat import InternalFrameFormat
+import frameArchive
+import frameTransform
 import io
-import itertools
+import metrics
 import numpy as np
 from PIL import Image
-import pybullet as pb
-import pyrealsense2 as rs
-import roslibpy
-import rosMsgs
+import PIL.features
+import pointcloud
+import struct
+import sys
 import tempfile
-import time
 
+# Zły parametr zapytania wyjścia (np. quality=abc)
+class ExportParamError(ValueError):
+	pass
 
-class InternalFrameFormat:
-	def __init__(self, width = 0, height = 0, color = [], depth = []):
-		self.width = width
-		self.height = height
-		self.color = color
-		self.depth = depth
 
-		resolution = width * height
-
-		if resolution != 0:
-			self.color_bpp = len(color) // resolution
-			self.depth_bpp = len(depth) // resolution
-		else:
-			self.color_bpp = 0
-			self.depth_bpp = 0
-
-		assert(self.width >= 0)
-		assert(self.height >= 0)
-		assert(self.color_bpp % 3 == 0)
-		if resolution != 0:
-			assert(len(color) % resolution == 0)
-			assert(len(depth) % resolution == 0)
-		else:
-			assert(len(color) == 0)
-			assert(len(depth) == 0)
+# Dane binarne, które nie przechodzą przez JSON
+class BinaryOutput:
+	def __init__(self, mimetype, chunks, length=None):
+		self.mimetype = mimetype
+		self.chunks = chunks
+		self.length = length
 
 
 # Osobno obrazek RGB i osobno głębokości
 def exportToRGB_D(frame: InternalFrameFormat):
+	with metrics.span('flatten', output='rgb+d'):
+		color = frame.colorBytes().tolist()
+		depth = frame.depthBytes().tolist()
+
 	return {
 		'width': frame.width,
 		'height': frame.height,
-		'color': frame.color,
-		'color_length': len(frame.color),
+		'color': color,
+		'color_length': len(color),
 		'color_bpp': frame.color_bpp,
-		'depth': frame.depth,
-		'depth_length': len(frame.depth),
+		'depth': depth,
+		'depth_length': len(depth),
 		'depth_bpp': frame.depth_bpp,
 	}
 
 
 # Jedna lista w której są na przemian piksele koloru i głębokości
 def exportToRGBD(frame: InternalFrameFormat):
-	color_length = len(frame.color)
-	depth_length = len(frame.depth)
-
-	rgbd = []
-	i = 0
-	j = 0
-	n = 0
-	while i < color_length and j < depth_length:
-		for k in range(0, frame.color_bpp):
-			rgbd.append(frame.color[i + k])
-			n = n + 1
-		for k in range(0, frame.depth_bpp):
-			rgbd.append(frame.depth[j + k])
-			n = n + 1
-		i = i + frame.color_bpp
-		j = j + frame.depth_bpp
+	resolution = frame.width * frame.height
+
+	# Each row is one pixel: color bytes followed by depth bytes
+	interleaved = np.empty((resolution, frame.color_bpp + frame.depth_bpp), dtype=np.uint8)
+	interleaved[:, :frame.color_bpp] = frame.colorBytes().reshape(resolution, frame.color_bpp)
+	interleaved[:, frame.color_bpp:] = frame.depthBytes().reshape(resolution, frame.depth_bpp)
+
+	with metrics.span('flatten', output='rgbd'):
+		rgbd = interleaved.reshape(-1).tolist()
+	n = len(rgbd)
 
 	return {
 		'width': frame.width,
@@ -84,318 +69,249 @@ def exportToRGBD(frame: InternalFrameFormat):
 	}
 
 
-# Obrazek w formacie png
-def exportToPNG(frame: InternalFrameFormat):
-	png = []
+# Zakodowany obrazek (png, jpeg, webp) wysyłany jako plik
+def _encodeImage(image, mimetype, **saveArgs):
 	bytIO = io.BytesIO()
+	with metrics.span('encode', output=saveArgs['format'].lower()):
+		image.save(bytIO, **saveArgs)
+
+	data = bytIO.getvalue()
 
-	if frame.color_bpp > 3:
-		raise NotImplemented()
-
-	i = 0
-	rgbArray = []
-	for _ in range(frame.height):
-		for _ in range(frame.width):
-			pixel = []
-			for _ in range(frame.color_bpp):
-				pixel.append(frame.color[i])
-				i = i + 1
-			rgbArray.append(tuple(pixel))
-
-	newimage = Image.new('RGB', (frame.width, frame.height))
-	newimage.putdata(rgbArray)
-	newimage.save(bytIO, format="png")
-
-	bytIO.seek(0)
-	png = [int(x) for x in bytIO.read()]
-
-	#bytIO.seek(0)
 	#with tempfile.NamedTemporaryFile(delete=False) as f:
-	#	f.write(bytIO.read())
-	#	print("PNG file saved at: {}".format(f.name))
+	#	f.write(data)
+	#	print("Image file saved at: {}".format(f.name))
 
-	return {
-		'width': frame.width,
-		'height': frame.height,
-		'png': png,
-		'png_length': len(png),
-	}
+	return BinaryOutput(mimetype, [data], len(data))
 
 
-# Wyślij obrazek do serwera Rosa
-class UploaderRos:
-	def __init__(self, host, port):
-		self.__ros = roslibpy.Ros(host=host, port=port)
-		self.__ros.run()
-		self.__talker_color = None
-		self.__talker_depth = None
+# Obrazek w formacie png
+def exportToPNG(frame: InternalFrameFormat, compressLevel=6):
+	if frame.color_bpp > 3:
+		raise NotImplementedError()
 
-	def __del__(self):
-		if self.__ros.is_connected:
-			self.__ros.close()  # BUG (see below)
+	return _encodeImage(Image.fromarray(frame.color), 'image/png', format='PNG', compress_level=compressLevel)
 
-	def exportToRos(self, frame: InternalFrameFormat, topicColor, topicDepth):
-		self.__talker_color = roslibpy.Topic(self.__ros, topicColor, rosMsgs.Image.msg_type)
-		self.__talker_depth = roslibpy.Topic(self.__ros, topicDepth, rosMsgs.Image.msg_type)
-		self.__talker_color.advertise()
-		self.__talker_depth.advertise()
 
-		header = roslibpy.Header(1, roslibpy.Time.now(), 'frame???')  # TODO: set frame_id
-		bigEndian = 0  # What order of bytes?
+# Obrazek w formacie jpeg
+def exportToJPEG(frame: InternalFrameFormat, quality=90):
+	return _encodeImage(Image.fromarray(frame.color), 'image/jpeg', format='JPEG', quality=quality)
 
-		assert(frame.color_bpp == 3)
-		assert(frame.depth_bpp == 2)
 
-		color_image = rosMsgs.Image(header, frame.height, frame.width, 'RGB8', bigEndian, frame.color_bpp, frame.color)
-		depth_image = rosMsgs.Image(header, frame.height, frame.width, 'Z16', bigEndian, frame.depth_bpp, frame.depth)
+# Obrazek w formacie webp
+def exportToWebP(frame: InternalFrameFormat, quality=80):
+	if not PIL.features.check('webp'):
+		raise NotImplementedError("Pillow was built without WebP support")
 
-		self.__talker_color.publish(color_image)
-		self.__talker_depth.publish(depth_image)
+	return _encodeImage(Image.fromarray(frame.color), 'image/webp', format='WEBP', quality=quality)
 
-		self.__talker_color.unadvertise()
-		self.__talker_depth.unadvertise()
 
+# Głębokość jako 16-bitowy png w skali szarości (bezstratnie)
+def exportToDepthPNG(frame: InternalFrameFormat, compressLevel=6):
+	return _encodeImage(Image.fromarray(frame.depth), 'image/png', format='PNG', compress_level=compressLevel)
 
-# Pobranie przez bilbiotekę realsense w pythonie
-class WorkerUSBRealsense:
-	def getFrame(self, width, height):
-		cfg = rs.config()
-		cfg.enable_stream(rs.stream.color, width=width, height=height, format=rs.format.rgb8)
-		cfg.enable_stream(rs.stream.depth, width=width, height=height, format=rs.format.z16)
 
-		pipe = rs.pipeline()
-		pipe.start(cfg)
+# Paleta "jet" (256 kolorów) do podglądu głębokości
+def _jetColormap():
+	x = np.linspace(0.0, 1.0, 256)
+	rgb = np.stack([
+		np.clip(1.5 - np.abs(4 * x - 3), 0, 1),
+		np.clip(1.5 - np.abs(4 * x - 2), 0, 1),
+		np.clip(1.5 - np.abs(4 * x - 1), 0, 1),
+	], axis=1)
+	return (rgb * 255).astype(np.uint8)
 
-		# Ignore frames in the beginning, so autoexposure apply
-		for i in range(0, 100):
-			frames = pipe.wait_for_frames()
-			color = frames.get_color_frame()
-			depth = frames.get_depth_frame()
 
-		# Get 1 frame
-		frames = pipe.wait_for_frames()
-		color = frames.get_color_frame()
-		depth = frames.get_depth_frame()
+JET_COLORMAP = _jetColormap()
 
-		width = color.get_width()
-		height = color.get_height()
 
-		# Convert to list of ints
-		colorData = self.__flatten(np.asanyarray(color.get_data(), dtype=np.uint8).tolist(), 2)
-		assert(width * height * 3 == len(colorData))
+# Głębokość jako kolorowy obrazek: blisko czerwony, daleko niebieski, brak danych czarny
+def colorizeDepth(depth):
+	valid = depth > 0
+	if not valid.any():
+		return np.zeros(depth.shape + (3,), dtype=np.uint8)
 
-		# Convert to list of ints
-		depthData = self.__flatten(np.asanyarray(depth.get_data(), dtype=np.uint16).tolist())
-		depthData = self.__flatten([[x % 256, x // 256] for x in depthData])  # What order of bytes?
-		assert(width * height * 2 == len(depthData))
+	near = int(depth[valid].min())
+	far = int(depth[valid].max())
 
-		pipe.stop()
+	index = (depth.astype(np.float32) - near) * (255.0 / max(far - near, 1))
+	index = 255 - np.clip(index, 0, 255).astype(np.uint8)
 
-		return InternalFrameFormat(width=width, height=height, color=colorData, depth=depthData)
+	color = JET_COLORMAP[index]
+	color[~valid] = 0
 
-	def __flatten(self, data, n=1):
-		if n <= 0:
-			return data
-		return self.__flatten(list(itertools.chain.from_iterable(data)), n-1)
+	return color
 
 
-# Pobierz z serwera ros-owego
-class WorkerRos:
-	def __init__(self, host, port):
-		self.__ros = roslibpy.Ros(host=host, port=port)
-		self.__ros.run()
-		self.__colorMsg = None
-		self.__depthMsg = None
-		self.__listenerColor = None
-		self.__listenerDepth = None
+# Pokolorowana głębokość w formacie jpeg (podgląd, nie do obliczeń)
+def exportToDepthJPEG(frame: InternalFrameFormat, quality=90):
+	return _encodeImage(Image.fromarray(colorizeDepth(frame.depth)), 'image/jpeg', format='JPEG', quality=quality)
 
-	def __del__(self):
-		if self.__ros.is_connected:
-			# BUG
-			# For some reason calling close()
-			# causes error "server did not drop TCP connection in time"
-			# in websocket library. This error causes situation that
-			# you can not reconnect again until you restart program.
 
-			self.__ros.close()
+RAW_MAGIC = b'RGBD'
+RAW_VERSION = 1
+RAW_BYTE_ORDER_LITTLE = 0
+RAW_BYTE_ORDER_BIG = 1
 
-	def getFrame(self, topicColor, topicDepth):
-		((cw, ch, cd), (dw, dh, dd)) = self.__getOneFrame(topicColor, topicDepth)
+# magic, version, header size, width, height, color_bpp, depth_bpp, byte order, reserved, timestamp
+RAW_HEADER = struct.Struct('<4sHHIIBBBBd4x')
+RAW_CHUNK_SIZE = 1 << 20
 
-		assert(cw == dw)
-		assert(ch == dh)
 
-		return InternalFrameFormat(width=cw, height=ch, color=cd, depth=dd)
+def _bufferChunks(array):
+	view = memoryview(array).cast('B')
+	for i in range(0, len(view), RAW_CHUNK_SIZE):
+		yield bytes(view[i:i + RAW_CHUNK_SIZE])
 
-	def __callbackColor(self, msg):
-		if self.__colorMsg is None:
-			self.__colorMsg = msg
 
-		self.__listenerColor.unsubscribe()
+# Nagłówek i surowe bajty koloru i głębokości (bez JSON-a)
+def exportToRaw(frame: InternalFrameFormat):
+	byteOrder = RAW_BYTE_ORDER_LITTLE if sys.byteorder == 'little' else RAW_BYTE_ORDER_BIG
 
-	def __callbackDepth(self, msg):
-		if self.__depthMsg is None:
-			self.__depthMsg = msg
+	header = RAW_HEADER.pack(
+		RAW_MAGIC,
+		RAW_VERSION,
+		RAW_HEADER.size,
+		frame.width,
+		frame.height,
+		frame.color_bpp,
+		frame.depth_bpp,
+		byteOrder,
+		0,
+		frame.timestamp)
 
-		self.__listenerDepth.unsubscribe()
+	def chunks():
+		yield header
+		yield from _bufferChunks(frame.color)
+		yield from _bufferChunks(frame.depth)
 
-	def __getOneFrame(self, topicColor, topicDepth):
-		self.__colorMsg = None
-		self.__depthMsg = None
+	length = RAW_HEADER.size + frame.color.nbytes + frame.depth.nbytes
 
-		self.__listenerColor = roslibpy.Topic(self.__ros, topicColor, 'sensor_msgs/Image')
-		self.__listenerDepth = roslibpy.Topic(self.__ros, topicDepth, 'sensor_msgs/Image')
+	return BinaryOutput('application/octet-stream', chunks(), length)
 
-		self.__listenerColor.subscribe((lambda s: s.__callbackColor)(self))
-		self.__listenerDepth.subscribe((lambda s: s.__callbackDepth)(self))
 
-		while self.__listenerColor.is_subscribed or self.__listenerDepth.is_subscribed:
-			time.sleep(0.2)
+# Chmura punktów: nagłówek pointcloud.POINTCLOUD_HEADER i punkty (float32 little endian)
+def exportToPointCloud(frame: InternalFrameFormat, params=None):
+	cloud = pointcloud.pointCloudFromParams(frame, params or {})
+	data = cloud.toBytes()
 
-		c = self.__colorMsg
-		d = self.__depthMsg
-		self.__colorMsg = None
-		self.__depthMsg = None
+	def chunks():
+		yield pointcloud.header(cloud)
+		yield from _bufferChunks(data)
 
-		colorWidth = c["width"]
-		colorHeight = c["height"]
-		colorData = [int(b) for b in base64.b64decode(c["data"])]
+	return BinaryOutput('application/octet-stream', chunks(), pointcloud.POINTCLOUD_HEADER.size + data.nbytes)
 
-		depthWidth = d["width"]
-		depthHeight = d["height"]
-		depthData = [int(b) for b in base64.b64decode(d["data"])]
 
-		# TODO
-		# Potentially change orders of depth bytes.
-		# Look at:
-		#   d["encoding"], d["is_bigendian"]
+# Wejścia: nazwa => (moduł z funkcją capture(width, height, cfg), biblioteki potrzebne modułowi)
+# Moduły są importowane dopiero przy pierwszym użyciu wejścia (patrz backendRegistry)
+INPUT_PLUGINS = {
+	'usb_realsense': ('inputRealsense', ('pyrealsense2',)),
+	'ros': ('inputRos', ('roslibpy',)),
+	'opencv': ('inputOpencv', ('cv2',)),
+	'pybullet': ('inputPybullet', ('pybullet',)),
+	'synthetic': ('inputSynthetic', ()),
+	'replay': ('inputReplay', ()),
+}
 
-		return ((colorWidth, colorHeight, colorData), (depthWidth, depthHeight, depthData))
+# Wyjścia wysyłające do ROS: nazwa => (moduł, funkcja, biblioteki)
+OUTPUT_PLUGINS = {
+	'ros': ('outputRos', 'exportImages', ('roslibpy',)),
+	'pointcloud_ros': ('outputRos', 'exportPointCloud', ('roslibpy',)),
+}
 
+# Parametr zapytania liczbą całkowitą z zakresu [low, high], `default` gdy go nie ma
+def _intParam(params, name, default, low, high):
+	if name not in params:
+		return default
 
-# Pobierz ze zwykłej kamerki korzystając z opencv
-class WorkerOpencv:
-	def __init__(self, device):
-		self.__videoCapture = cv.VideoCapture(device)
-		if not self.__videoCapture.isOpened():
-			raise Exception("Could not open video device")
+	try:
+		value = int(params[name])
+	except (TypeError, ValueError):
+		raise ExportParamError("{} must be integer: {}".format(name, params[name]))
 
-	def __del__(self):
-		self.__videoCapture.release()
+	if not low <= value <= high:
+		raise ExportParamError("{} must be in range [{}, {}]: {}".format(name, low, high, value))
 
-	def getFrame(self, width, height):
-		self.__videoCapture.set(cv.CAP_PROP_FRAME_WIDTH, width)
-		self.__videoCapture.set(cv.CAP_PROP_FRAME_HEIGHT, height)
+	return value
 
-		(rc, frame) = self.__videoCapture.read()
-		if not rc:
-			raise Exception("Could not get frame from video device")
 
-		frameRGB = frame[:,:,::-1]  # BGR => RGB
-		color = self.__flatten(np.asanyarray(frameRGB, dtype=np.uint8).tolist(), 2)
+def _compression(params, outputImageCfg):
+	return _intParam(params, 'compression', outputImageCfg['png_compression_level'], 0, 9)
 
-		width = len(frameRGB[0])
-		height = len(frameRGB)
-		depth = [0] * (width * height * 2)
 
-		return InternalFrameFormat(width=width, height=height, color=color, depth=depth)
+def _quality(params, default):
+	return _intParam(params, 'quality', default, 0, 100)
 
-	def __flatten(self, data, n=1):
-		if n <= 0:
-			return data
-		return self.__flatten(list(itertools.chain.from_iterable(data)), n-1)
 
+# Wbudowane wyjścia (tylko numpy i Pillow): (klatka, parametry zapytania, uploadRosCfg, outputImageCfg) => dane
+BUILTIN_OUTPUTS = {
+	'rgb+d': lambda frame, params, uploadRosCfg, outputImageCfg: exportToRGB_D(frame),
+	'rgbd': lambda frame, params, uploadRosCfg, outputImageCfg: exportToRGBD(frame),
+	'png': lambda frame, params, uploadRosCfg, outputImageCfg: exportToPNG(frame, compressLevel=_compression(params, outputImageCfg)),
+	'jpeg': lambda frame, params, uploadRosCfg, outputImageCfg: exportToJPEG(frame, quality=_quality(params, outputImageCfg['jpeg_quality'])),
+	'webp': lambda frame, params, uploadRosCfg, outputImageCfg: exportToWebP(frame, quality=_quality(params, outputImageCfg['webp_quality'])),
+	'depth_jpeg': lambda frame, params, uploadRosCfg, outputImageCfg: exportToDepthJPEG(frame, quality=_quality(params, outputImageCfg['jpeg_quality'])),
+	'depth_png': lambda frame, params, uploadRosCfg, outputImageCfg: exportToDepthPNG(frame, compressLevel=_compression(params, outputImageCfg)),
+	'raw': lambda frame, params, uploadRosCfg, outputImageCfg: exportToRaw(frame),
+	'pointcloud': lambda frame, params, uploadRosCfg, outputImageCfg: exportToPointCloud(frame, params),
+}
 
-# Pobierz z symulatora pybullet
-class WorkerPybullet:
-	def __init__(self, mode, host, port):
-		if mode == "udp":
-			self.__physicsClientID = pb.connect(pb.UDP, host, port)
-		elif mode == "tcp":
-			self.__physicsClientID = pb.connect(pb.TCP, host, port)
-		else:
-			raise NotImplementedError
+for (name, (module, requires)) in INPUT_PLUGINS.items():
+	backendRegistry.registry.addPlugin(backendRegistry.INPUT, name, module, 'capture', requires)
+for (name, (module, attribute, requires)) in OUTPUT_PLUGINS.items():
+	backendRegistry.registry.addPlugin(backendRegistry.OUTPUT, name, module, attribute, requires)
+for (name, export) in BUILTIN_OUTPUTS.items():
+	backendRegistry.registry.addBuiltin(backendRegistry.OUTPUT, name, export)
 
-	def __del__(self):
-		pb.disconnect(self.__physicsClientID)
 
-	def getFrame(self, width, height, eyePosition, eyeUpVector, targetPosition, fov, aspect, nearDistance, farDistance):
-		viewMatrix = pb.computeViewMatrix(
-			cameraEyePosition=eyePosition,
-			cameraTargetPosition=targetPosition,
-			cameraUpVector=eyeUpVector)
+# Konfiguracja wejścia (sekcja worker_*), None gdy wejście jej nie ma
+def _workerCfg(input, workerRosCfg, workerPybulletCfg, workerOpencvCfg, workerReplayCfg):
+	return {"ros": workerRosCfg, "pybullet": workerPybulletCfg, "opencv": workerOpencvCfg, "replay": workerReplayCfg}.get(input)
 
-		projectionMatrix = pb.computeProjectionMatrixFOV(
-			fov=fov,
-			aspect=aspect,
-			nearVal=nearDistance,
-			farVal=farDistance)
 
-		width2, height2, rgbaImg, depthImg, _segImg = pb.getCameraImage(
-			width=width,
-			height=height,
-			viewMatrix=viewMatrix,
-			projectionMatrix=projectionMatrix,
-			physicsClientId=self.__physicsClientID)
+# Zrób zdjęcie wybraną metodą (bez współdzielenia, patrz captureFrame)
+def captureFrameNow(input, width, height, workerRosCfg=None, workerPybulletCfg=None, workerOpencvCfg=None, workerReplayCfg=None):
+	capture = backendRegistry.registry.get(backendRegistry.INPUT, input)
+	return capture(width, height, _workerCfg(input, workerRosCfg, workerPybulletCfg, workerOpencvCfg, workerReplayCfg))
 
-		colorData = [x for i, x in enumerate(self.__flatten(rgbaImg.tolist(), 2)) if i % 4 != 3]  # RGBA => RGB
 
-		# pybullet returns depth as float in range [0.0 ; 1.0]
-		# Convert it here to uint16 in range [0 ; 65535]
-		depthData = np.array(self.__flatten(depthImg))
+# Zrób zdjęcie wybraną metodą
+# Równoczesne zapytania o to samo wejście dostają jedną, wspólną klatkę (nie wolno jej modyfikować)
+# shared=False: zdjęcie w wątku wołającego, bez silnika (np. żeby profiler widział kod wejścia)
+def captureFrame(input, width, height, workerRosCfg=None, workerPybulletCfg=None, workerOpencvCfg=None, workerReplayCfg=None, reuseWindow=captureScheduler.REUSE_WINDOW,
+		shared=True):
+	key = (width, height, repr(_workerCfg(input, workerRosCfg, workerPybulletCfg, workerOpencvCfg, workerReplayCfg)))
 
-		depthData = (depthData * 65535)  # [0.0 ; 1.0]  => [0 ; 65535]
-		depthData = depthData.astype(int)  # Take integer part
+	# Runs in thread of capture engine: "acquire" is time of one real capture,
+	# "capture" also waiting in queue and includes reused frames
+	def capture():
+		with metrics.span('acquire', input):
+			return captureFrameNow(input, width, height, workerRosCfg=workerRosCfg, workerPybulletCfg=workerPybulletCfg, workerOpencvCfg=workerOpencvCfg, workerReplayCfg=workerReplayCfg)
 
-		# Make sure that range is correct
-		depthData[depthData > 65535] = 65535
-		depthData[depthData < 0] = 0
+	with metrics.span('capture', input):
+		frame = captureScheduler.scheduler.capture(input, key, capture, reuseWindow) if shared else capture()
 
-		# Cast numpy.int64 to simple python int
-		depthData = [int(x) for x in depthData]
+	# Nagrywanie (jeśli włączone dla tego wejścia)
+	frameArchive.recorder.record(input, frame)
 
-		# Change representation to bytes
-		depthData = self.__flatten([[x % 256, x // 256] for x in depthData])  # What order of bytes?
-		assert(width2 * height2 * 2 == len(depthData))
+	return frame
 
-		return InternalFrameFormat(width=width2, height=height2, color=colorData, depth=depthData)
 
-	def __flatten(self, data, n=1):
-		if n <= 0:
-			return data
-		return self.__flatten(list(itertools.chain.from_iterable(data)), n-1)
+# Zamień zdjęcie na wybrany format
+def exportFrame(frame, output, uploadRosCfg=None, outputImageCfg=None, params=None):
+	export = backendRegistry.registry.get(backendRegistry.OUTPUT, output)
+	return export(frame, params or {}, uploadRosCfg, outputImageCfg)
 
 
 # Główna funkcja, która zwraca dane
-def getFrame(input, output, width, height, workerRosCfg=None, workerPybulletCfg=None, workerOpencvCfg=None, uploadRosCfg=None):
-	frame = InternalFrameFormat()
-
-	if input == "usb_realsense":
-		w = WorkerUSBRealsense()
-		frame = w.getFrame(width, height)
-	elif input == "ros":
-		w = WorkerRos(workerRosCfg["host"], workerRosCfg["port"])
-		frame = w.getFrame(workerRosCfg["topic_color"], workerRosCfg["topic_depth"])
-	elif input == "opencv":
-		w = WorkerOpencv(workerOpencvCfg["device"])
-		frame = w.getFrame(width, height)
-	elif input == "pybullet":
-		w = WorkerPybullet(mode=workerPybulletCfg['mode'], host=workerPybulletCfg['host'], port=workerPybulletCfg['port'])
-		frame = w.getFrame(width, height, eyePosition=workerPybulletCfg['eye_position'], eyeUpVector=workerPybulletCfg['eye_up_vector'],
-			targetPosition=workerPybulletCfg['target_position'], fov=workerPybulletCfg['fov'], aspect=workerPybulletCfg['aspect'],
-			nearDistance=workerPybulletCfg['near_distance'], farDistance=workerPybulletCfg['far_distance'])
-	else:
-		raise NotImplementedError("Not recognised input method: {}".format(input))
-
-	if output == "rgb+d":
-		return exportToRGB_D(frame)
-	elif output == "rgbd":
-		return exportToRGBD(frame)
-	elif output == "png":
-		return exportToPNG(frame)
-	elif output == "ros":
-		u = UploaderRos(uploadRosCfg["host"], uploadRosCfg["port"])
-		u.exportToRos(frame, uploadRosCfg["topic_color"], uploadRosCfg["topic_depth"])
-		return {}
-	else:
-		raise NotImplementedError("Not recognised output format: {}".format(output))
+def getFrame(input, output, width, height, workerRosCfg=None, workerPybulletCfg=None, workerOpencvCfg=None, uploadRosCfg=None, outputImageCfg=None, params=None,
+		reuseWindow=captureScheduler.REUSE_WINDOW, workerReplayCfg=None, shared=True):
+	# Nieznane albo niedostępne wyjście: błąd zanim urządzenie zrobi zdjęcie
+	export = backendRegistry.registry.get(backendRegistry.OUTPUT, output)
+
+	frame = captureFrame(input, width, height, workerRosCfg=workerRosCfg, workerPybulletCfg=workerPybulletCfg, workerOpencvCfg=workerOpencvCfg, workerReplayCfg=workerReplayCfg,
+		reuseWindow=reuseWindow, shared=shared)
+	with metrics.span('transform', input, output):
+		frame = frameTransform.transformFrame(frame, params or {})
+
+	with metrics.span('export', input, output):
+		return export(frame, params or {}, uploadRosCfg, outputImageCfg)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+import asyncio
+import concurrent.futures
+import threading
+
+
+# Frame captured at most this many seconds ago is given to next request as is
+REUSE_WINDOW = 0.03
+
+# How long one request waits for frame
+CAPTURE_TIMEOUT = 10.0
+
+
+class CaptureTimeout(Exception):
+	pass
+
+
+class _InputState:
+	def __init__(self, input):
+		self.queue = asyncio.Queue()
+		self.inFlight = {}
+		self.last = None
+		# Blocking native calls of one input run in its own thread, so slow input never delays others
+		self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="capture-{}".format(input))
+		self.task = None
+
+
+class CaptureScheduler:
+	"""
+	Asyncio capture engine running in its own thread.
+
+	Every input has one task which takes capture requests from queue and
+	runs blocking `capture()` in executor of that input. Requests for the
+	same input and settings (`key`) wait for one future (single-flight).
+	Frame finished less than `reuseWindow` seconds ago is returned without
+	capturing. Waiting requests hold only a future, not a thread, and
+	timeout never blocks the engine.
+
+	All state is touched only from the event loop thread. `capture()` is
+	bridge for threads (Flask views), `captureAsync()` is for coroutines
+	running in the engine loop.
+
+	Shared frames must not be modified by callers.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__loop = None
+		self.__inputs = {}
+
+	def __getLoop(self):
+		with self.__lock:
+			if self.__loop is None:
+				loop = asyncio.new_event_loop()
+				threading.Thread(target=loop.run_forever, name="capture-engine", daemon=True).start()
+				self.__loop = loop
+
+			return self.__loop
+
+	# Blokujące wywołanie dla wątków spoza pętli (widoki Flaska)
+	def capture(self, input, key, capture, reuseWindow=REUSE_WINDOW, timeout=CAPTURE_TIMEOUT):
+		future = asyncio.run_coroutine_threadsafe(self.captureAsync(input, key, capture, reuseWindow, timeout), self.__getLoop())
+		return future.result()
+
+	# `capture()` robi zdjęcie; `key` opisuje ustawienia, od których zależy wynik
+	async def captureAsync(self, input, key, capture, reuseWindow=REUSE_WINDOW, timeout=CAPTURE_TIMEOUT):
+		loop = asyncio.get_running_loop()
+		state = self.__state(input)
+
+		if state.last is not None:
+			(lastKey, frame, finished) = state.last
+			if lastKey == key and loop.time() - finished <= reuseWindow:
+				return frame
+
+		future = state.inFlight.get(key)
+		if future is None:
+			future = loop.create_future()
+			# Exception is not lost silently when all requests already timed out
+			future.add_done_callback(lambda f: f.cancelled() or f.exception())
+			state.inFlight[key] = future
+			state.queue.put_nowait((key, capture, future))
+
+		try:
+			# shield: timeout of one request must not cancel capture shared with others
+			return await asyncio.wait_for(asyncio.shield(future), timeout)
+		except asyncio.TimeoutError:
+			raise CaptureTimeout("Timeout while waiting for frame from {}".format(input))
+
+	def __state(self, input):
+		state = self.__inputs.get(input)
+		if state is None:
+			state = _InputState(input)
+			state.task = asyncio.get_running_loop().create_task(self.__runInput(state))
+			self.__inputs[input] = state
+
+		return state
+
+	async def __runInput(self, state):
+		loop = asyncio.get_running_loop()
+
+		while True:
+			(key, capture, future) = await state.queue.get()
+
+			try:
+				frame = await loop.run_in_executor(state.executor, capture)
+				state.last = (key, frame, loop.time())
+				future.set_result(frame)
+			except Exception as e:
+				future.set_exception(e)
+			finally:
+				del state.inFlight[key]
+
+	# Zapomnij ostatnie klatki (np. po zmianie rozdzielczości); False gdy silnik jeszcze nie działał
+	# Następne capture() trafia do pętli po czyszczeniu, więc nie dostanie starej klatki
+	def clear(self):
+		with self.__lock:
+			loop = self.__loop
+
+		if loop is None:
+			return False
+
+		def clearLast():
+			for state in self.__inputs.values():
+				state.last = None
+
+		loop.call_soon_threadsafe(clearLast)
+		return True
+
+
+scheduler = CaptureScheduler()
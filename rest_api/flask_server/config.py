@@ -1,9 +1,10 @@
 #!/usr/bin/env python3
 
+import copy
 import os
 import toml
 import tempfile
-import shutil
+import threading
 
 
 configPath = os.path.normpath(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config.toml'))
@@ -11,15 +12,18 @@ defaultConfig = '''
 [camera]
 width = 1280
 height = 720
+frame_reuse_window = 0.03
 
 [worker_ros]
 host = "127.0.0.1"
 port = 9090
 topic_color = "/camera/color/image_raw"
 topic_depth = "/camera/depth/image_rect_raw"
+sync_slop = 0.05
 
 [worker_opencv]
 device = 0
+idle_timeout = 30.0
 
 [worker_pybullet]
 mode = "tcp"
@@ -32,22 +36,77 @@ fov = 45.0
 aspect = 1.0
 near_distance = 0.1
 far_distance = 3.1
+linear_depth = false
+
+[worker_replay]
+name = "recording"
+realtime = true
+loop = true
+
+[recording]
+directory = "recordings"
+
+[backends]
+preload = []
+
+[profiling]
+enabled = false
+keep = 20
 
 [upload_ros]
 host = "127.0.0.1"
 port = 9090
 topic_color = "/fake_camera/color"
 topic_depth = "/fake_camera/depth"
+topic_pointcloud = "/fake_camera/points"
+rate = 10.0
+
+[output_image]
+png_compression_level = 6
+jpeg_quality = 90
+webp_quality = 80
 '''
 
 
-# Zapisz podaną konfigurację do pliku
+# Sparsowana konfiguracja jest trzymana w pamięci; plik czytamy ponownie
+# tylko gdy zmieni się jego mtime, inode lub rozmiar
+_lock = threading.RLock()
+_cachedStat = None
+_cachedConfig = None
+_version = 0
+_listeners = []
+
+
+def _statKey():
+	st = os.stat(configPath)
+	return (st.st_mtime_ns, st.st_ino, st.st_size)
+
+
+# Zapisz podaną konfigurację do pliku (atomowo, czytelnik nigdy nie zobaczy połowy pliku)
+# Słuchacze są wołani po zwolnieniu _lock
 def saveConfig(cfg):
-	with tempfile.NamedTemporaryFile('wt') as tmp:
-		toml.dump(cfg, tmp)
-		tmp.flush()
+	with _lock:
+		change = _write(cfg)
 
-		shutil.copyfile(tmp.name, configPath)
+	return _notify(change)
+
+
+# Wołane z _lock; zwraca zmianę dla _notify
+def _write(cfg):
+	fd, tmpPath = tempfile.mkstemp(prefix='.config.', suffix='.toml', dir=os.path.dirname(configPath))
+	try:
+		with os.fdopen(fd, 'wt') as tmp:
+			toml.dump(cfg, tmp)
+			tmp.flush()
+			os.fsync(tmp.fileno())
+
+		os.chmod(tmpPath, 0o644)
+		os.replace(tmpPath, configPath)
+	except BaseException:
+		os.unlink(tmpPath)
+		raise
+
+	return _reload()
 
 
 # Stwórz plik z przykładową domyślną konfiguracją
@@ -56,11 +115,79 @@ def genDefault():
 	saveConfig(cfg)
 
 
-# Odczytaj całą konfigurację z pliku
-def getConfig():
-	if not os.path.exists(configPath):
-		genDefault()
+def _reload():
+	global _cachedStat, _cachedConfig, _version
 
+	stat = _statKey()
 	cfg = toml.load(configPath)
 
+	# Uzupełnij brakujące opcje (np. plik z poprzedniej wersji) wartościami domyślnymi
+	default = toml.loads(defaultConfig)
+	for section, values in default.items():
+		cfg[section] = {**values, **cfg.get(section, {})}
+
+	old = _cachedConfig
+	_cachedStat = stat
+	_cachedConfig = cfg
+
+	if cfg != old:
+		_version = _version + 1
+		return (old, copy.deepcopy(cfg))
+
+	return None
+
+
+# Wołane z _lock; zwraca (stara, nowa) konfiguracja gdy plik zmienił się na dysku
+def _refresh():
+	try:
+		stat = _statKey()
+	except FileNotFoundError:
+		# Usunięty plik: domyślna konfiguracja, słuchaczy powiadamia wołający (po zwolnieniu _lock)
+		return _write(toml.loads(defaultConfig))
+
+	if stat != _cachedStat:
+		return _reload()
+
+	return None
+
+
+# Powiadom słuchaczy o zmianie (bez trzymania _lock, restart kamery może trwać)
+def _notify(change):
+	if change is None:
+		return []
+
+	(old, new) = change
+	if old is None:
+		return []
+
+	results = []
+	for listener in list(_listeners):
+		results.extend(listener(old, new) or [])
+
+	return results
+
+
+# `listener(old, new)` jest wołany po każdej zmianie zawartości konfiguracji
+# (przez POST albo ręczną edycję pliku) i zwraca listę wyników
+def addListener(listener):
+	_listeners.append(listener)
+
+
+# Odczytaj całą konfigurację (kopia, którą można modyfikować)
+def getConfig():
+	with _lock:
+		change = _refresh()
+		cfg = copy.deepcopy(_cachedConfig)
+
+	_notify(change)
 	return cfg
+
+
+# Numer wersji konfiguracji; rośnie przy każdej zmianie zawartości pliku
+def getVersion():
+	with _lock:
+		change = _refresh()
+		version = _version
+
+	_notify(change)
+	return version
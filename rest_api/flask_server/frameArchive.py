@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+from frameFormat import Intrinsics
+import math
+import numpy as np
+import os
+import queue
+import struct
+import threading
+import time
+
+
+ARCHIVE_SUFFIX = '.rgbd'
+INDEX_SUFFIX = '.idx'
+
+# Overwritten archive is recorded next to the old one and replaces it on close
+TEMP_SUFFIX = '.tmp'
+
+# magic, version, header size, width, height, color_bpp, depth_bpp, has intrinsics, record size, fx, fy, ppx, ppy
+ARCHIVE_MAGIC = b'RGBDARCH'
+ARCHIVE_VERSION = 1
+ARCHIVE_HEADER = struct.Struct('<8sHHIIBBBxQdddd')
+ARCHIVE_HEADER_SIZE = 64
+
+# Records start at multiples of this, so planes are aligned in mapped memory
+RECORD_ALIGNMENT = 64
+
+INDEX_DTYPE = np.dtype([('timestamp', '<f8'), ('sequence', '<u8'), ('offset', '<u8')])
+
+# Frames waiting for writer thread; when full new frames are dropped
+RECORD_QUEUE_SIZE = 8
+
+
+class ArchiveError(Exception):
+	pass
+
+
+class ArchiveExists(ArchiveError):
+	pass
+
+
+# Relative directories are relative to this file (like config.toml)
+BASE_DIRECTORY = os.path.dirname(os.path.realpath(__file__))
+
+
+# Ścieżki pliku nagrania i indeksu; `name` to sama nazwa (bez katalogów)
+def paths(directory, name):
+	if not name or os.path.basename(name) != name or name.startswith('.'):
+		raise ArchiveError("Wrong archive name: {}".format(name))
+
+	base = os.path.join(BASE_DIRECTORY, directory, name)
+	return (base + ARCHIVE_SUFFIX, base + INDEX_SUFFIX)
+
+
+def recordSize(width, height):
+	size = width * height * 3 + width * height * 2
+	return (size + RECORD_ALIGNMENT - 1) // RECORD_ALIGNMENT * RECORD_ALIGNMENT
+
+
+class ArchiveWriter:
+	"""
+	Appends frames of one resolution as fixed-size records: color plane (RGB8)
+	followed by depth plane (Z16 little endian). Index file gets one entry
+	(timestamp, sequence, offset) per record, written after the record, so
+	reader never sees entry of unfinished record.
+
+	Existing archive is never truncated: without `overwrite` ArchiveExists is
+	raised, with `overwrite` frames go to temporary files which replace the
+	archive in close(). Player may have old archive memory-mapped and its
+	frames stay valid, because replaced file is not changed.
+	"""
+
+	def __init__(self, archivePath, indexPath, overwrite=False):
+		self.__replace = []
+		mode = 'xb'
+		if overwrite:
+			self.__replace = [(archivePath + TEMP_SUFFIX, archivePath), (indexPath + TEMP_SUFFIX, indexPath)]
+			(archivePath, indexPath) = (self.__replace[0][0], self.__replace[1][0])
+			mode = 'wb'
+
+		try:
+			self.__data = open(archivePath, mode)
+		except FileExistsError:
+			raise ArchiveExists("Archive already exists: {}".format(archivePath))
+
+		try:
+			self.__index = open(indexPath, mode)
+		except FileExistsError:
+			self.__data.close()
+			os.remove(archivePath)
+			raise ArchiveExists("Archive already exists: {}".format(indexPath))
+
+		self.__size = None
+		self.__recordSize = None
+		self.__offset = ARCHIVE_HEADER_SIZE
+		self.sequence = 0
+
+	def __writeHeader(self, frame):
+		i = frame.intrinsics
+		header = ARCHIVE_HEADER.pack(
+			ARCHIVE_MAGIC,
+			ARCHIVE_VERSION,
+			ARCHIVE_HEADER_SIZE,
+			frame.width,
+			frame.height,
+			frame.color_bpp,
+			frame.depth_bpp,
+			0 if i is None else 1,
+			self.__recordSize,
+			*((math.nan,) * 4 if i is None else (i.fx, i.fy, i.ppx, i.ppy)))
+
+		self.__data.write(header.ljust(ARCHIVE_HEADER_SIZE, b'\0'))
+
+	def write(self, frame: InternalFrameFormat):
+		if self.__size is None:
+			self.__size = (frame.width, frame.height)
+			self.__recordSize = recordSize(frame.width, frame.height)
+			self.__writeHeader(frame)
+
+		if (frame.width, frame.height) != self.__size:
+			raise ArchiveError("Archive has frames {}x{}, got {}x{}".format(*self.__size, frame.width, frame.height))
+
+		color = frame.colorBytes()
+		depth = frame.depthBytes()
+		self.__data.write(color)
+		self.__data.write(depth)
+		self.__data.write(b'\0' * (self.__recordSize - color.nbytes - depth.nbytes))
+		self.__data.flush()
+
+		entry = np.array([(frame.timestamp, self.sequence, self.__offset)], dtype=INDEX_DTYPE)
+		self.__index.write(entry.tobytes())
+		self.__index.flush()
+
+		self.__offset = self.__offset + self.__recordSize
+		self.sequence = self.sequence + 1
+
+	def close(self):
+		self.__data.close()
+		self.__index.close()
+
+		for (temporary, path) in self.__replace:
+			os.replace(temporary, path)
+
+
+class ArchiveReader:
+	"""
+	Memory-mapped archive. Frames are views into mapped file (no copying, read only).
+	"""
+
+	def __init__(self, archivePath, indexPath):
+		self.stat = (os.stat(archivePath).st_size, os.stat(indexPath).st_size)
+
+		if self.stat[1] < INDEX_DTYPE.itemsize:
+			raise ArchiveError("Archive is empty: {}".format(archivePath))
+
+		self.__data = np.memmap(archivePath, dtype=np.uint8, mode='r')
+		(magic, version, headerSize, width, height, colorBpp, depthBpp, hasIntrinsics, recordSize,
+			fx, fy, ppx, ppy) = ARCHIVE_HEADER.unpack_from(self.__data)
+
+		if magic != ARCHIVE_MAGIC:
+			raise ArchiveError("Not an archive: {}".format(archivePath))
+		if version != ARCHIVE_VERSION:
+			raise ArchiveError("Unsupported archive version: {}".format(version))
+
+		self.width = width
+		self.height = height
+		self.intrinsics = Intrinsics(width, height, fx, fy, ppx, ppy) if hasIntrinsics else None
+
+		# Only whole index entries whose records are complete
+		index = np.memmap(indexPath, dtype=INDEX_DTYPE, mode='r', shape=(self.stat[1] // INDEX_DTYPE.itemsize,))
+		complete = np.searchsorted(index['offset'], len(self.__data) - recordSize, side='right')
+		self.index = index[:complete]
+		self.timestamps = np.asarray(self.index['timestamp'])
+
+		if len(self.index) == 0:
+			raise ArchiveError("Archive is empty: {}".format(archivePath))
+
+	def __len__(self):
+		return len(self.index)
+
+	@property
+	def start(self):
+		return float(self.timestamps[0])
+
+	@property
+	def duration(self):
+		return float(self.timestamps[-1] - self.timestamps[0])
+
+	# Numer ostatniego rekordu nagranego nie później niż `timestamp` (wyszukiwanie binarne w indeksie)
+	def seek(self, timestamp):
+		return max(0, int(np.searchsorted(self.timestamps, timestamp, side='right')) - 1)
+
+	def frame(self, i):
+		offset = int(self.index[i]['offset'])
+		colorLength = self.width * self.height * 3
+
+		color = self.__data[offset:offset + colorLength].reshape(self.height, self.width, 3)
+		depth = self.__data[offset + colorLength:offset + colorLength + self.width * self.height * 2].view('<u2').reshape(self.height, self.width)
+
+		return InternalFrameFormat(width=self.width, height=self.height, color=color, depth=depth,
+			timestamp=float(self.index[i]['timestamp']), intrinsics=self.intrinsics)
+
+
+class ArchiveRecorder:
+	"""
+	Records frames of one input (as captured in camera.getFrame) to archive.
+
+	Writing is done by separate thread, so request does not wait for disk.
+	When writer falls behind, frames are dropped.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__queue = None
+		self.__thread = None
+		self.__input = None
+		self.__name = None
+		self.__lastFrame = None
+		self.__recorded = 0
+		self.__dropped = 0
+		self.__error = None
+
+	# Bez `overwrite` istniejące nagranie nie jest ruszane (ArchiveExists), także gdy trwa jego nagrywanie
+	def start(self, input, directory, name, overwrite=False):
+		(archivePath, indexPath) = paths(directory, name)
+		os.makedirs(os.path.dirname(archivePath), exist_ok=True)
+
+		if not overwrite and (os.path.exists(archivePath) or os.path.exists(indexPath)):
+			raise ArchiveExists("Archive already exists: {}".format(archivePath))
+
+		self.stop()
+
+		writer = ArchiveWriter(archivePath, indexPath, overwrite)
+
+		with self.__lock:
+			self.__queue = queue.Queue(RECORD_QUEUE_SIZE)
+			self.__input = input
+			self.__name = name
+			self.__lastFrame = None
+			self.__recorded = 0
+			self.__dropped = 0
+			self.__error = None
+			self.__thread = threading.Thread(target=self.__run, args=(writer, self.__queue), name="recorder", daemon=True)
+			self.__thread.start()
+
+	def stop(self, timeout=10.0):
+		with self.__lock:
+			q = self.__queue
+			thread = self.__thread
+			self.__queue = None
+			self.__thread = None
+
+		if q is not None:
+			q.put(None)
+			thread.join(timeout)
+
+	def record(self, input, frame):
+		with self.__lock:
+			# The same frame can be given to many requests (see captureScheduler)
+			if self.__queue is None or input != self.__input or frame is self.__lastFrame:
+				return
+
+			self.__lastFrame = frame
+			try:
+				self.__queue.put_nowait(frame)
+			except queue.Full:
+				self.__dropped = self.__dropped + 1
+
+	def status(self):
+		with self.__lock:
+			return {
+				'recording': self.__thread is not None and self.__thread.is_alive(),
+				'input': self.__input,
+				'name': self.__name,
+				'recorded': self.__recorded,
+				'dropped': self.__dropped,
+				'error': None if self.__error is None else str(self.__error),
+			}
+
+	def __run(self, writer, q):
+		try:
+			while True:
+				frame = q.get()
+				if frame is None:
+					return
+
+				writer.write(frame)
+
+				with self.__lock:
+					self.__recorded = self.__recorded + 1
+		except Exception as e:
+			with self.__lock:
+				self.__error = e
+				if self.__queue is q:
+					self.__queue = None
+		finally:
+			writer.close()
+
+
+class ArchivePlayer:
+	"""
+	Serves frames of archive either at original timing (`realtime`) or one
+	after another as fast as they are asked for.
+
+	Reader is opened again when archive file grows (e.g. it is being recorded).
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__paths = None
+		self.__reader = None
+		self.__position = 0
+		self.__startWall = None
+		self.__startArchive = None
+
+	def __getReader(self, archivePath, indexPath):
+		try:
+			stat = (os.stat(archivePath).st_size, os.stat(indexPath).st_size)
+		except FileNotFoundError:
+			raise ArchiveError("Archive does not exist: {}".format(archivePath))
+
+		if self.__paths != (archivePath, indexPath) or self.__reader is None or self.__reader.stat != stat:
+			if self.__paths != (archivePath, indexPath):
+				self.__position = 0
+				self.__startWall = None
+
+			self.__reader = ArchiveReader(archivePath, indexPath)
+			self.__paths = (archivePath, indexPath)
+
+		return self.__reader
+
+	def getFrame(self, directory, name, realtime=True, loop=True):
+		with self.__lock:
+			reader = self.__getReader(*paths(directory, name))
+
+			if realtime:
+				now = time.monotonic()
+				if self.__startWall is None:
+					self.__startWall = now
+					self.__startArchive = float(reader.timestamps[min(self.__position, len(reader) - 1)])
+
+				t = self.__startArchive + (now - self.__startWall)
+				if t > reader.timestamps[-1] and loop and reader.duration > 0:
+					t = reader.start + (t - reader.start) % reader.duration
+				i = reader.seek(t)
+			else:
+				i = self.__position
+				if i >= len(reader):
+					if not loop:
+						raise ArchiveError("End of archive")
+					i = 0
+				self.__position = i + 1
+
+			return reader.frame(i)
+
+	# Przewiń do czasu z nagrania (sekundy od epoki, jak timestamp klatek)
+	def seek(self, directory, name, timestamp):
+		with self.__lock:
+			reader = self.__getReader(*paths(directory, name))
+			i = reader.seek(timestamp)
+
+			self.__position = i
+			self.__startWall = time.monotonic()
+			self.__startArchive = float(reader.timestamps[i])
+
+			return {'index': i, 'timestamp': self.__startArchive, 'frames': len(reader)}
+
+
+recorder = ArchiveRecorder()
+player = ArchivePlayer()
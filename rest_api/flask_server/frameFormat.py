@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import collections
+import numpy as np
+import time
+
+
+class Intrinsics(collections.namedtuple('Intrinsics', ['width', 'height', 'fx', 'fy', 'ppx', 'ppy'])):
+	"""
+	Pinhole model of depth image: pixel (u, v) looks in direction ((u - ppx) / fx, (v - ppy) / fy, 1).
+
+	Pixel centers have integer coordinates (as in librealsense). Hashable, so it can be cache key.
+	"""
+
+	__slots__ = ()
+
+	def cropped(self, x, y, width, height):
+		return Intrinsics(width, height, self.fx, self.fy, self.ppx - x, self.ppy - y)
+
+	# Co `step`-ty piksel, począwszy od pierwszego
+	def strided(self, step, width, height):
+		return Intrinsics(width, height, self.fx / step, self.fy / step, self.ppx / step, self.ppy / step)
+
+	def resized(self, width, height):
+		sx = width / self.width
+		sy = height / self.height
+		return Intrinsics(width, height, self.fx * sx, self.fy * sy, (self.ppx + 0.5) * sx - 0.5, (self.ppy + 0.5) * sy - 0.5)
+
+
+class InternalFrameFormat:
+	"""
+	Single RGB-D frame kept as numpy arrays.
+
+	color - uint8 array of shape (height, width, 3), RGB8
+	depth - uint16 array of shape (height, width), Z16 in native byte order
+
+	timestamp - capture time in seconds since epoch
+	intrinsics - Intrinsics of depth image or None when not known
+
+	Lists of ints (bytes) are built only in exporters, when client asks for JSON.
+	"""
+
+	__slots__ = ('width', 'height', 'color', 'depth', 'color_format', 'depth_format', 'timestamp', 'intrinsics')
+
+	def __init__(self, width = 0, height = 0, color = None, depth = None, color_format = 'RGB8', depth_format = 'Z16', timestamp = None, intrinsics = None):
+		if timestamp is None:
+			timestamp = time.time()
+		if color is None:
+			color = np.zeros((height, width, 3), dtype=np.uint8)
+		if depth is None:
+			depth = np.zeros((height, width), dtype=np.uint16)
+
+		self.width = width
+		self.height = height
+		self.color = np.ascontiguousarray(color, dtype=np.uint8)
+		self.depth = np.ascontiguousarray(depth, dtype=np.uint16)
+		self.color_format = color_format
+		self.depth_format = depth_format
+		self.timestamp = timestamp
+		self.intrinsics = intrinsics
+
+		assert(self.width >= 0)
+		assert(self.height >= 0)
+		assert(self.color.shape == (height, width, 3))
+		assert(self.depth.shape == (height, width))
+
+	@property
+	def color_bpp(self):
+		return self.color.shape[2] * self.color.itemsize
+
+	@property
+	def depth_bpp(self):
+		return self.depth.itemsize
+
+	# Kolor jako płaska tablica bajtów (bez kopiowania)
+	def colorBytes(self):
+		return self.color.reshape(-1)
+
+	# Głębokość jako płaska tablica bajtów w kolejności little endian
+	def depthBytes(self):
+		return self.depth.astype('<u2', copy=False).view(np.uint8).reshape(-1)
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+import metrics
+import threading
+import time
+
+
+class FrameGrabberError(Exception):
+	pass
+
+
+class FrameGrabber:
+	"""
+	Background thread which reads frames from device and keeps only the newest one.
+
+	Subclasses implement:
+	  _open()   - open device (called in grabber thread)
+	  _warmUp() - optional, called once after _open(); long warm-up should
+	              return early when _stopping() is true
+	  _read()   - return one InternalFrameFormat (blocking)
+	  _close()  - release device (called in grabber thread)
+
+	Time of _open, _warmUp and _read goes to metrics (stages open, warm_up, read)
+	with label `input`.
+
+	State machine:
+	  stopped -> starting -> running -> stopped   (stop())
+	                     \\-> failed               (exception in _open/_warmUp/_read)
+	"""
+
+	STOPPED = 'stopped'
+	STARTING = 'starting'
+	RUNNING = 'running'
+	FAILED = 'failed'
+
+	def __init__(self, name, input=''):
+		self.name = name
+		self.input = input
+		self.__condition = threading.Condition()
+		self.__stopEvent = threading.Event()
+		self.__thread = None
+		self.__state = FrameGrabber.STOPPED
+		self.__error = None
+		self.__frame = None
+		self.__sequence = 0
+		self.__startSequence = 0
+
+	@property
+	def state(self):
+		with self.__condition:
+			return self.__state
+
+	@property
+	def error(self):
+		with self.__condition:
+			return self.__error
+
+	@property
+	def sequence(self):
+		with self.__condition:
+			return self.__sequence
+
+	def start(self):
+		with self.__condition:
+			if self.__state in (FrameGrabber.STARTING, FrameGrabber.RUNNING):
+				return
+
+			self.__state = FrameGrabber.STARTING
+			self.__error = None
+			self.__frame = None
+			self.__startSequence = self.__sequence
+			self.__stopEvent.clear()
+			self.__thread = threading.Thread(target=self.__run, name=self.name, daemon=True)
+			self.__thread.start()
+
+	def stop(self, timeout=5.0):
+		self.__stopEvent.set()
+
+		thread = self.__thread
+		if thread is not None and thread is not threading.current_thread():
+			thread.join(timeout)
+
+		with self.__condition:
+			if self.__state != FrameGrabber.FAILED:
+				self.__state = FrameGrabber.STOPPED
+			self.__condition.notify_all()
+
+	# Najnowsza klatka; czeka aż pojawi się klatka nowsza niż `newerThan` (numer sekwencyjny)
+	def getFrame(self, timeout=5.0, newerThan=0):
+		return self.waitForFrame(timeout, newerThan)[0]
+
+	# Jak getFrame(), ale zwraca też numer sekwencyjny klatki
+	def waitForFrame(self, timeout=5.0, newerThan=0):
+		deadline = time.monotonic() + timeout
+
+		with self.__condition:
+			# Frames from before last start() are never returned
+			while self.__sequence <= max(newerThan, self.__startSequence):
+				if self.__state == FrameGrabber.FAILED:
+					raise FrameGrabberError("{}: {}".format(self.name, self.__error)) from self.__error
+				if self.__state == FrameGrabber.STOPPED:
+					raise FrameGrabberError("{}: grabber is stopped".format(self.name))
+
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					raise FrameGrabberError("{}: timeout while waiting for frame".format(self.name))
+
+				self.__condition.wait(remaining)
+
+			return (self.__frame, self.__sequence)
+
+	# Czy wołano stop() (do przerwania długich operacji w wątku grabbera)
+	def _stopping(self):
+		return self.__stopEvent.is_set()
+
+	def _open(self):
+		raise NotImplementedError
+
+	def _warmUp(self):
+		pass
+
+	def _read(self):
+		raise NotImplementedError
+
+	def _close(self):
+		pass
+
+	def __setState(self, state, error=None):
+		with self.__condition:
+			self.__state = state
+			self.__error = error
+			self.__condition.notify_all()
+
+	def __run(self):
+		try:
+			with metrics.span('open', self.input):
+				self._open()
+			try:
+				with metrics.span('warm_up', self.input):
+					self._warmUp()
+				self.__setState(FrameGrabber.RUNNING)
+
+				while not self.__stopEvent.is_set():
+					with metrics.span('read', self.input):
+						frame = self._read()
+
+					with self.__condition:
+						self.__frame = frame
+						self.__sequence = self.__sequence + 1
+						self.__condition.notify_all()
+			finally:
+				self._close()
+		except Exception as e:
+			self.__setState(FrameGrabber.FAILED, e)
+		else:
+			self.__setState(FrameGrabber.STOPPED)
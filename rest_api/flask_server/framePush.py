@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import camera
+import collections
+from frameFormat import InternalFrameFormat
+import frameTransform
+import threading
+import time
+
+
+MAX_FPS = 60.0
+
+# Frames waiting for one subscriber; when full the oldest one is dropped
+QUEUE_SIZE = 4
+
+
+# Jedna wiadomość binarna: nagłówek formatu `raw` i płaszczyzny koloru i głębokości
+def encodeFrame(frame: InternalFrameFormat):
+	return b''.join(camera.exportToRaw(frame).chunks)
+
+
+class Subscription:
+	"""
+	One subscriber: downscale factor, maximal fps and bounded send queue.
+
+	Publisher thread only appends to the queue, it never waits for slow
+	subscriber. When queue is full the oldest frame is dropped.
+	"""
+
+	def __init__(self, input, downscale=1, fps=MAX_FPS, queueSize=QUEUE_SIZE):
+		self.input = input
+		self.downscale = downscale
+		self.fps = fps
+		self.__condition = threading.Condition()
+		self.__queue = collections.deque(maxlen=queueSize)
+		self.__nextTime = 0.0
+		self.__closed = False
+		self.__error = None
+		self.__queued = 0
+		self.__dropped = 0
+
+	def wants(self, now):
+		period = 1.0 / self.fps
+
+		with self.__condition:
+			# Quarter of period tolerance, otherwise jitter of capture halves the rate
+			if now + period / 4 < self.__nextTime:
+				return False
+
+			self.__nextTime = max(self.__nextTime + period, now)
+			return True
+
+	def put(self, data):
+		with self.__condition:
+			if len(self.__queue) == self.__queue.maxlen:
+				self.__dropped = self.__dropped + 1
+			self.__queue.append(data)
+			self.__queued = self.__queued + 1
+			self.__condition.notify_all()
+
+	# Następna wiadomość albo None gdy subskrypcja została zamknięta
+	def get(self, timeout=None):
+		deadline = None if timeout is None else time.monotonic() + timeout
+
+		with self.__condition:
+			while not self.__queue and not self.__closed:
+				remaining = None if deadline is None else deadline - time.monotonic()
+				if remaining is not None and remaining <= 0:
+					return None
+				self.__condition.wait(remaining)
+
+			if self.__closed:
+				return None
+
+			return self.__queue.popleft()
+
+	def close(self, error=None):
+		with self.__condition:
+			self.__closed = True
+			self.__error = error
+			self.__queue.clear()
+			self.__condition.notify_all()
+
+	@property
+	def closed(self):
+		with self.__condition:
+			return self.__closed
+
+	def status(self):
+		with self.__condition:
+			return {
+				'input': self.input,
+				'downscale': self.downscale,
+				'fps': self.fps,
+				'queued': self.__queued,
+				'dropped': self.__dropped,
+				'error': None if self.__error is None else str(self.__error),
+			}
+
+
+class FramePublisher:
+	"""
+	Capture thread for one input shared by all its subscribers.
+
+	It runs at the highest fps requested by subscribers. Every frame is
+	downscaled and encoded once per distinct downscale factor.
+	"""
+
+	def __init__(self, input, capture):
+		self.input = input
+		self.__capture = capture
+		self.__lock = threading.Lock()
+		self.__subscriptions = []
+		self.__stopped = False
+		self.__thread = threading.Thread(target=self.__run, name="push-{}".format(input), daemon=True)
+
+	def start(self):
+		self.__thread.start()
+
+	# Zwraca False gdy wydawca już się zatrzymał (trzeba stworzyć nowego)
+	def add(self, subscription):
+		with self.__lock:
+			if self.__stopped:
+				return False
+			self.__subscriptions.append(subscription)
+			return True
+
+	def remove(self, subscription):
+		with self.__lock:
+			if subscription in self.__subscriptions:
+				self.__subscriptions.remove(subscription)
+
+	def subscriptions(self):
+		with self.__lock:
+			return list(self.__subscriptions)
+
+	def __active(self):
+		with self.__lock:
+			self.__subscriptions = [s for s in self.__subscriptions if not s.closed]
+			if not self.__subscriptions:
+				self.__stopped = True
+			return list(self.__subscriptions)
+
+	def __run(self):
+		nextTime = time.monotonic()
+
+		try:
+			while True:
+				subscriptions = self.__active()
+				if not subscriptions:
+					return
+
+				frame = self.__capture()
+				now = time.monotonic()
+
+				encoded = {}
+				for s in subscriptions:
+					if not s.wants(now):
+						continue
+					if s.downscale not in encoded:
+						encoded[s.downscale] = encodeFrame(frameTransform.stride(frame, s.downscale))
+					s.put(encoded[s.downscale])
+
+				period = 1.0 / max(s.fps for s in subscriptions)
+				nextTime = max(nextTime + period, time.monotonic())
+				time.sleep(max(0.0, nextTime - time.monotonic()))
+		except Exception as e:
+			with self.__lock:
+				self.__stopped = True
+				subscriptions = self.__subscriptions
+				self.__subscriptions = []
+
+			for s in subscriptions:
+				s.close(e)
+
+
+class FramePushHub:
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__publishers = {}
+
+	# `capture()` zwraca InternalFrameFormat z danego wejścia
+	def subscribe(self, input, capture, downscale=1, fps=MAX_FPS, queueSize=QUEUE_SIZE):
+		subscription = Subscription(input, downscale, min(fps, MAX_FPS), queueSize)
+
+		with self.__lock:
+			p = self.__publishers.get(input)
+			if p is None or not p.add(subscription):
+				p = FramePublisher(input, capture)
+				p.add(subscription)
+				p.start()
+				self.__publishers[input] = p
+
+		return subscription
+
+	def unsubscribe(self, subscription):
+		subscription.close()
+
+		with self.__lock:
+			p = self.__publishers.get(subscription.input)
+
+		if p is not None:
+			p.remove(subscription)
+
+	def status(self):
+		with self.__lock:
+			publishers = list(self.__publishers.values())
+
+		return [s.status() for p in publishers for s in p.subscriptions()]
+
+
+hub = FramePushHub()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+import numpy as np
+from PIL import Image
+
+
+# Interpolacja koloru (głębokość nigdy nie jest mieszana, patrz DEPTH_INTERPOLATIONS)
+INTERPOLATIONS = {
+	'nearest': Image.NEAREST,
+	'bilinear': Image.BILINEAR,
+	'bicubic': Image.BICUBIC,
+	'area': Image.BOX,
+	'lanczos': Image.LANCZOS,
+}
+
+# nearest: middle pixel of block, min: nearest valid (non zero) depth in block
+DEPTH_INTERPOLATIONS = ('nearest', 'min')
+
+
+class FrameTransformError(ValueError):
+	pass
+
+
+# `intrinsics(old)` zwraca parametry kamery dla nowej klatki
+def _frame(frame, color, depth, intrinsics):
+	return InternalFrameFormat(width=color.shape[1], height=color.shape[0], color=color, depth=depth,
+		color_format=frame.color_format, depth_format=frame.depth_format, timestamp=frame.timestamp,
+		intrinsics=None if frame.intrinsics is None else intrinsics(frame.intrinsics))
+
+
+# Wycinek (x, y, w, h) przycięty do granic klatki
+def crop(frame: InternalFrameFormat, x, y, width, height):
+	x2 = min(x + width, frame.width)
+	y2 = min(y + height, frame.height)
+
+	if x < 0 or y < 0 or x >= x2 or y >= y2:
+		raise FrameTransformError("Region {},{},{},{} is outside of {}x{} frame".format(x, y, width, height, frame.width, frame.height))
+
+	return _frame(frame, frame.color[y:y2, x:x2], frame.depth[y:y2, x:x2], lambda i: i.cropped(x, y, x2 - x, y2 - y))
+
+
+# Co `step`-ty piksel w obu osiach
+def stride(frame: InternalFrameFormat, step):
+	if step == 1:
+		return frame
+
+	color = frame.color[::step, ::step]
+	depth = frame.depth[::step, ::step]
+
+	return _frame(frame, color, depth, lambda i: i.strided(step, depth.shape[1], depth.shape[0]))
+
+
+# Początki bloków, z których powstaje każdy piksel wyniku
+def _blockStarts(size, newSize):
+	return (np.arange(newSize) * size) // newSize
+
+
+def _depthNearest(depth, width, height):
+	(h, w) = depth.shape
+	rows = ((2 * np.arange(height) + 1) * h) // (2 * height)
+	cols = ((2 * np.arange(width) + 1) * w) // (2 * width)
+
+	return depth[rows[:, None], cols]
+
+
+def _depthMin(depth, width, height):
+	(h, w) = depth.shape
+
+	# Unsigned wrap-around turns invalid 0 into maximum, so it never wins (and 0 comes back at the end)
+	d = depth - np.uint16(1)
+	d = np.minimum.reduceat(d, _blockStarts(h, height), axis=0)
+	d = np.minimum.reduceat(d, _blockStarts(w, width), axis=1)
+
+	return d + np.uint16(1)
+
+
+def resize(frame: InternalFrameFormat, width, height, interpolation='area', depthInterpolation='nearest'):
+	if (width, height) == (frame.width, frame.height):
+		return frame
+
+	color = np.asarray(Image.fromarray(frame.color).resize((width, height), INTERPOLATIONS[interpolation]))
+
+	if depthInterpolation == 'min':
+		depth = _depthMin(frame.depth, width, height)
+	else:
+		depth = _depthNearest(frame.depth, width, height)
+
+	return _frame(frame, color, depth, lambda i: i.resized(width, height))
+
+
+def _parseInts(text, count, name):
+	try:
+		values = [int(v) for v in text.split(',')]
+	except ValueError:
+		raise FrameTransformError("{} must be {} integers separated by commas: {}".format(name, count, text))
+
+	if len(values) != count:
+		raise FrameTransformError("{} must be {} integers separated by commas: {}".format(name, count, text))
+
+	return values
+
+
+def _parseChoice(text, choices, name):
+	if text not in choices:
+		raise FrameTransformError("{} must be one of: {}".format(name, ", ".join(choices)))
+
+	return text
+
+
+# Parametry zapytania: roi=x,y,w,h  stride=n  scale=s  interpolation=...  depth_interpolation=...
+# Kolejność: wycinek, potem co n-ty piksel, potem skalowanie
+def transformFrame(frame: InternalFrameFormat, params):
+	if 'roi' in params:
+		(x, y, w, h) = _parseInts(params['roi'], 4, 'roi')
+		frame = crop(frame, x, y, w, h)
+
+	if 'stride' in params:
+		(step,) = _parseInts(params['stride'], 1, 'stride')
+		if step < 1:
+			raise FrameTransformError("stride must be positive: {}".format(step))
+		frame = stride(frame, step)
+
+	if 'scale' in params:
+		try:
+			scale = float(params['scale'])
+		except ValueError:
+			raise FrameTransformError("scale must be number: {}".format(params['scale']))
+
+		if not 0 < scale <= 1:
+			raise FrameTransformError("scale must be in range (0, 1]: {}".format(scale))
+
+		interpolation = _parseChoice(params.get('interpolation', 'area'), INTERPOLATIONS, 'interpolation')
+		depthInterpolation = _parseChoice(params.get('depth_interpolation', 'nearest'), DEPTH_INTERPOLATIONS, 'depth_interpolation')
+
+		width = max(1, round(frame.width * scale))
+		height = max(1, round(frame.height * scale))
+		frame = resize(frame, width, height, interpolation, depthInterpolation)
+
+	return frame
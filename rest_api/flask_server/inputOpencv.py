@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+
+# Biblioteka ładuje się razem z wejściem (backends.preload), a nie przy pierwszej klatce;
+# opencvPool importuje ją dopiero przy otwarciu urządzenia, żeby testy mogły użyć atrapy
+import cv2
+import opencvPool
+
+
+# Pobierz ze zwykłej kamerki korzystając z opencv
+# Urządzenie jest otwarte w puli (wspólne dla wszystkich zapytań)
+class WorkerOpencv:
+	def __init__(self, device, idleTimeout=None):
+		self.__device = device
+		self.__idleTimeout = idleTimeout
+
+	def getFrame(self, width, height):
+		return opencvPool.pool.getFrame(self.__device, width, height, idleTimeout=self.__idleTimeout)
+
+
+def capture(width, height, cfg):
+	return WorkerOpencv(cfg["device"], cfg["idle_timeout"]).getFrame(width, height)
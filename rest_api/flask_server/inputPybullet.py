@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import metrics
+import pybullet as pb
+import pybulletClient
+
+
+# Pobierz z symulatora pybullet
+# Połączenie z serwerem jest trzymane między zapytaniami
+class WorkerPybullet:
+	def __init__(self, mode, host, port, linearDepth=False):
+		self.__mode = mode
+		self.__host = host
+		self.__port = port
+		self.__linearDepth = linearDepth
+
+	def getFrame(self, width, height, eyePosition, eyeUpVector, targetPosition, fov, aspect, nearDistance, farDistance):
+		viewMatrix = pybulletClient.viewMatrix(tuple(eyePosition), tuple(targetPosition), tuple(eyeUpVector))
+		projectionMatrix = pybulletClient.projectionMatrix(fov, aspect, nearDistance, farDistance)
+
+		with metrics.span('render', 'pybullet'):
+			try:
+				(width2, height2, rgbaImg, depthImg) = self.__render(width, height, viewMatrix, projectionMatrix)
+			except pb.error:
+				# Server could be restarted, try once again with new connection
+				(width2, height2, rgbaImg, depthImg) = self.__render(width, height, viewMatrix, projectionMatrix)
+
+		with metrics.span('convert', 'pybullet'):
+			return pybulletClient.convertCameraImage(width2, height2, rgbaImg, depthImg, nearDistance, farDistance, self.__linearDepth, projectionMatrix)
+
+	def __render(self, width, height, viewMatrix, projectionMatrix):
+		connection = pybulletClient.manager.getConnection(self.__mode, self.__host, self.__port)
+
+		try:
+			with connection.lock:
+				width2, height2, rgbaImg, depthImg, _segImg = pb.getCameraImage(
+					width=width,
+					height=height,
+					viewMatrix=viewMatrix,
+					projectionMatrix=projectionMatrix,
+					physicsClientId=connection.clientId)
+		except pb.error:
+			pybulletClient.manager.drop(connection)
+			raise
+
+		return (width2, height2, rgbaImg, depthImg)
+
+
+def capture(width, height, cfg):
+	w = WorkerPybullet(mode=cfg['mode'], host=cfg['host'], port=cfg['port'], linearDepth=cfg['linear_depth'])
+	return w.getFrame(width, height, eyePosition=cfg['eye_position'], eyeUpVector=cfg['eye_up_vector'],
+		targetPosition=cfg['target_position'], fov=cfg['fov'], aspect=cfg['aspect'],
+		nearDistance=cfg['near_distance'], farDistance=cfg['far_distance'])
@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+
+# Biblioteka ładuje się razem z wejściem (backends.preload), a nie przy pierwszej klatce;
+# realsensePipeline importuje ją dopiero przy otwarciu urządzenia, żeby testy mogły użyć atrapy
+import pyrealsense2
+import realsensePipeline
+
+
+# Pobranie przez bilbiotekę realsense w pythonie
+# Pipeline działa w tle, tu bierzemy tylko najnowszą klatkę
+class WorkerUSBRealsense:
+	def getFrame(self, width, height):
+		return realsensePipeline.manager.getFrame(width, height)
+
+
+def capture(width, height, cfg):
+	return WorkerUSBRealsense().getFrame(width, height)
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+import frameArchive
+
+
+# Odtwarzanie nagrania (frameArchive) z oryginalnym czasem albo klatka po klatce
+class WorkerReplay:
+	def __init__(self, directory, name, realtime=True, loop=True):
+		self.__directory = directory
+		self.__name = name
+		self.__realtime = realtime
+		self.__loop = loop
+
+	def getFrame(self):
+		return frameArchive.player.getFrame(self.__directory, self.__name, self.__realtime, self.__loop)
+
+
+# Rozdzielczość jest taka, jak w nagraniu
+def capture(width, height, cfg):
+	return WorkerReplay(cfg["directory"], cfg["name"], cfg["realtime"], cfg["loop"]).getFrame()
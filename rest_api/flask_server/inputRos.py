@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+import metrics
+import rosImage
+import rosIngest
+
+
+# Pobierz z serwera ros-owego
+# Subskrypcje działają cały czas, tu bierzemy najnowszą zsynchronizowaną parę
+class WorkerRos:
+	def __init__(self, host, port, slop=rosIngest.SYNC_SLOP):
+		self.__host = host
+		self.__port = port
+		self.__slop = slop
+
+	def getFrame(self, topicColor, topicDepth, timeout=5.0):
+		ingest = rosIngest.manager.getIngest(self.__host, self.__port, topicColor, topicDepth, self.__slop)
+		with metrics.span('wait_for_frames', 'ros'):
+			(c, d) = ingest.getPair(timeout)
+
+		with metrics.span('decode', 'ros'):
+			((cw, ch, cd), (dw, dh, dd), timestamp) = self.__decode(c, d)
+
+		assert(cw == dw)
+		assert(ch == dh)
+
+		return InternalFrameFormat(width=cw, height=ch, color=cd, depth=dd, timestamp=timestamp)
+
+	def __decode(self, c, d):
+		colorData = rosImage.decodeColor(c)
+		depthData = rosImage.decodeDepth(d)
+
+		timestamp = rosIngest.stampToSeconds(c)
+
+		return ((c["width"], c["height"], colorData), (d["width"], d["height"], depthData), timestamp)
+
+
+# Rozdzielczość jest taka, jak w tematach ROS
+def capture(width, height, cfg):
+	w = WorkerRos(cfg["host"], cfg["port"], cfg["sync_slop"])
+	return w.getFrame(cfg["topic_color"], cfg["topic_depth"])
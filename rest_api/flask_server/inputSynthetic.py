@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+
+import syntheticCamera
+
+
+# Sztuczne, deterministyczne klatki (bez sprzętu, do testów i benchmarków)
+class WorkerSynthetic:
+	def getFrame(self, width, height):
+		return syntheticCamera.camera.getFrame(width, height)
+
+
+def capture(width, height, cfg):
+	return WorkerSynthetic().getFrame(width, height)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+
+import bisect
+import contextvars
+import threading
+import time
+
+
+# Upper bounds of histogram buckets [s] (+Inf is added when rendering)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Spany zmierzone w wątku bieżącego zapytania (do nagłówka Server-Timing)
+_requestTimings = contextvars.ContextVar('requestTimings', default=None)
+_requestStart = contextvars.ContextVar('requestStart', default=None)
+
+
+class _Histogram:
+	__slots__ = ('counts', 'sum')
+
+	def __init__(self):
+		self.counts = [0] * (len(BUCKETS) + 1)
+		self.sum = 0.0
+
+
+class MetricsRegistry:
+	"""
+	Latency histograms per (stage, input, output) and request counters per
+	(input, output, status).
+
+	Recording is one lock and one bisect, so it can stay enabled all the time.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__histograms = {}
+		self.__requests = {}
+
+	def observe(self, stage, input, output, seconds):
+		i = bisect.bisect_left(BUCKETS, seconds)
+
+		with self.__lock:
+			h = self.__histograms.get((stage, input, output))
+			if h is None:
+				h = self.__histograms[(stage, input, output)] = _Histogram()
+			h.counts[i] = h.counts[i] + 1
+			h.sum = h.sum + seconds
+
+		timings = _requestTimings.get()
+		if timings is not None:
+			timings[stage] = timings.get(stage, 0.0) + seconds
+
+	def countRequest(self, input, output, status):
+		with self.__lock:
+			key = (input, output, str(status))
+			self.__requests[key] = self.__requests.get(key, 0) + 1
+
+	def clear(self):
+		with self.__lock:
+			self.__histograms = {}
+			self.__requests = {}
+
+	# Format tekstowy Prometheusa
+	def render(self):
+		with self.__lock:
+			histograms = [(key, list(h.counts), h.sum) for (key, h) in sorted(self.__histograms.items())]
+			requests = sorted(self.__requests.items())
+
+		lines = [
+			'# HELP camera_stage_duration_seconds Time spent in one stage of frame processing.',
+			'# TYPE camera_stage_duration_seconds histogram',
+		]
+
+		for ((stage, input, output), counts, total) in histograms:
+			labels = 'stage="{}",input="{}",output="{}"'.format(_escape(stage), _escape(input), _escape(output))
+
+			cumulative = 0
+			for (bound, count) in zip(BUCKETS + (float('inf'),), counts):
+				cumulative = cumulative + count
+				lines.append('camera_stage_duration_seconds_bucket{{{},le="{}"}} {}'.format(labels, _formatBound(bound), cumulative))
+
+			lines.append('camera_stage_duration_seconds_sum{{{}}} {!r}'.format(labels, total))
+			lines.append('camera_stage_duration_seconds_count{{{}}} {}'.format(labels, cumulative))
+
+		lines.append('# HELP camera_requests_total Camera requests by input, output format and HTTP status.')
+		lines.append('# TYPE camera_requests_total counter')
+
+		for ((input, output, status), count) in requests:
+			lines.append('camera_requests_total{{input="{}",output="{}",status="{}"}} {}'.format(_escape(input), _escape(output), _escape(status), count))
+
+		return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+	return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatBound(bound):
+	return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class span:
+	"""
+	Measures block of code:
+
+	  with metrics.span('export', input, output):
+	      ...
+
+	Time is added to histogram (also when block raises) and, when called in
+	thread of an HTTP request, to its Server-Timing header.
+	"""
+
+	__slots__ = ('stage', 'input', 'output', 'start')
+
+	def __init__(self, stage, input='', output=''):
+		self.stage = stage
+		self.input = input
+		self.output = output
+
+	def __enter__(self):
+		self.start = time.perf_counter()
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		registry.observe(self.stage, self.input, self.output, time.perf_counter() - self.start)
+		return False
+
+
+# Początek zapytania: od teraz spany z tego wątku trafiają do Server-Timing
+def startRequest():
+	_requestTimings.set({})
+	_requestStart.set(time.perf_counter())
+
+
+# Wartość nagłówka Server-Timing (milisekundy), np. "capture;dur=12.3, export;dur=4.56"
+# Czas tego samego etapu wywołanego kilka razy jest sumowany
+def serverTiming():
+	timings = _requestTimings.get()
+	if timings is None:
+		return None
+
+	entries = ['{};dur={:.3f}'.format(stage, seconds * 1000) for (stage, seconds) in timings.items()]
+	entries.append('total;dur={:.3f}'.format((time.perf_counter() - _requestStart.get()) * 1000))
+
+	return ', '.join(entries)
+
+
+registry = MetricsRegistry()
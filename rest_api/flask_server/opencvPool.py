@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+import frameGrabber
+import metrics
+import numpy as np
+import threading
+import time
+
+
+# First frames after opening device are often stale or badly exposed
+WARMUP_FRAMES = 5
+
+# Close device if nobody asked for frame for this many seconds
+IDLE_TIMEOUT = 30.0
+
+
+# Cienka warstwa na cv.VideoCapture (w testach można podmienić)
+class VideoCaptureDevice:
+	def __init__(self, device):
+		import cv2 as cv
+
+		self.__cv = cv
+		self.__videoCapture = cv.VideoCapture(device)
+		if not self.__videoCapture.isOpened():
+			raise Exception("Could not open video device")
+
+	def setResolution(self, width, height):
+		self.__videoCapture.set(self.__cv.CAP_PROP_FRAME_WIDTH, width)
+		self.__videoCapture.set(self.__cv.CAP_PROP_FRAME_HEIGHT, height)
+
+	def read(self):
+		(rc, frame) = self.__videoCapture.read()
+		if not rc:
+			raise Exception("Could not get frame from video device")
+
+		return frame
+
+	def release(self):
+		self.__videoCapture.release()
+
+
+# Zamień klatkę BGR z opencv na InternalFrameFormat
+def convertFrame(frame):
+	color = frame[:, :, ::-1]  # BGR => RGB
+
+	height, width = color.shape[:2]
+	depth = np.zeros((height, width), dtype=np.uint16)
+
+	return InternalFrameFormat(width=width, height=height, color=color, depth=depth, timestamp=time.time())
+
+
+class OpencvCapture(frameGrabber.FrameGrabber):
+	"""
+	One open video device with grabber thread.
+
+	Resolution is applied (in grabber thread) only when requested one changes.
+	"""
+
+	def __init__(self, device, width, height, captureFactory=VideoCaptureDevice, warmUpFrames=WARMUP_FRAMES):
+		super().__init__("opencv-{}".format(device), "opencv")
+		self.device = device
+		self.__captureFactory = captureFactory
+		self.__warmUpFrames = warmUpFrames
+		self.__capture = None
+		self.__lock = threading.Lock()
+		self.__resolution = (width, height)
+		self.__resolutionVersion = 1
+		self.__appliedVersion = 0
+		self.__appliedSequence = 0
+
+	def requestResolution(self, width, height):
+		with self.__lock:
+			if self.__resolution != (width, height):
+				self.__resolution = (width, height)
+				self.__resolutionVersion = self.__resolutionVersion + 1
+			return self.__resolutionVersion
+
+	def __applyResolution(self):
+		with self.__lock:
+			if self.__appliedVersion == self.__resolutionVersion:
+				return
+			(width, height) = self.__resolution
+			version = self.__resolutionVersion
+
+		self.__capture.setResolution(width, height)
+
+		with self.__lock:
+			self.__appliedVersion = version
+			# Next frame stored by grabber has this number
+			self.__appliedSequence = self.sequence + 1
+
+	def getFrame(self, width, height, timeout=5.0):
+		version = self.requestResolution(width, height)
+		deadline = time.monotonic() + timeout
+
+		(frame, sequence) = self.waitForFrame(timeout)
+		while True:
+			with self.__lock:
+				if self.__appliedVersion >= version and sequence >= self.__appliedSequence:
+					return frame
+
+			(frame, sequence) = self.waitForFrame(max(0.0, deadline - time.monotonic()), newerThan=sequence)
+
+	def _open(self):
+		self.__capture = self.__captureFactory(self.device)
+		self.__applyResolution()
+
+	def _warmUp(self):
+		for _ in range(self.__warmUpFrames):
+			if self._stopping():
+				return
+			self.__capture.read()
+
+	def _read(self):
+		self.__applyResolution()
+		frame = self.__capture.read()
+		with metrics.span('convert', self.input):
+			return convertFrame(frame)
+
+	def _close(self):
+		if self.__capture is not None:
+			self.__capture.release()
+			self.__capture = None
+
+
+class OpencvCapturePool:
+	"""
+	Process-wide open video devices keyed by device (number or path).
+
+	Many HTTP clients share one device. Devices not used for `idleTimeout`
+	seconds are closed by janitor thread.
+	"""
+
+	def __init__(self, captureFactory=VideoCaptureDevice, idleTimeout=IDLE_TIMEOUT, warmUpFrames=WARMUP_FRAMES):
+		self.__lock = threading.Lock()
+		self.__captures = {}
+		self.__lastUsed = {}
+		self.__captureFactory = captureFactory
+		self.__warmUpFrames = warmUpFrames
+		self.__janitor = None
+		self.idleTimeout = idleTimeout
+
+	def getFrame(self, device, width, height, idleTimeout=None, timeout=5.0):
+		with self.__lock:
+			if idleTimeout is not None:
+				self.idleTimeout = idleTimeout
+
+			c = self.__captures.get(device)
+			if c is None or c.state in (c.FAILED, c.STOPPED):
+				c = OpencvCapture(device, width, height, self.__captureFactory, self.__warmUpFrames)
+				c.start()
+				self.__captures[device] = c
+
+			self.__lastUsed[device] = time.monotonic()
+			self.__startJanitor()
+
+		return c.getFrame(width, height, timeout)
+
+	def devices(self):
+		with self.__lock:
+			return list(self.__captures.keys())
+
+	# Nowa rozdzielczość dla otwartych urządzeń (ustawiana w wątkach grabberów)
+	def setResolution(self, width, height):
+		with self.__lock:
+			captures = list(self.__captures.values())
+
+		for c in captures:
+			c.requestResolution(width, height)
+
+		return [c.device for c in captures]
+
+	def close(self, device):
+		with self.__lock:
+			c = self.__captures.pop(device, None)
+			self.__lastUsed.pop(device, None)
+
+		if c is None:
+			return False
+
+		c.stop()
+		return True
+
+	def evictIdle(self):
+		now = time.monotonic()
+		evicted = []
+
+		with self.__lock:
+			for device, lastUsed in list(self.__lastUsed.items()):
+				if now - lastUsed >= self.idleTimeout:
+					evicted.append(self.__captures.pop(device))
+					del self.__lastUsed[device]
+
+		# Joining grabber thread may take a while, do it without lock
+		for c in evicted:
+			c.stop()
+
+		return [c.device for c in evicted]
+
+	def stop(self):
+		with self.__lock:
+			captures = list(self.__captures.values())
+			self.__captures.clear()
+			self.__lastUsed.clear()
+
+		for c in captures:
+			c.stop()
+
+	def __startJanitor(self):
+		if self.__janitor is None:
+			self.__janitor = threading.Thread(target=self.__runJanitor, name="opencv-pool-janitor", daemon=True)
+			self.__janitor.start()
+
+	def __runJanitor(self):
+		while True:
+			time.sleep(max(0.1, min(self.idleTimeout / 2, 5.0)))
+			self.evictIdle()
+
+
+pool = OpencvCapturePool()
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+import pointcloud
+import rosUpload
+
+
+# Wysłanie obrazów koloru i głębokości do serwera ROS
+def exportImages(frame, params, uploadRosCfg, outputImageCfg):
+	u = rosUpload.uploaders.getUploader(uploadRosCfg["host"], uploadRosCfg["port"])
+	u.exportToRos(frame, uploadRosCfg["topic_color"], uploadRosCfg["topic_depth"])
+	return {}
+
+
+# Wysłanie chmury punktów jako PointCloud2
+def exportPointCloud(frame, params, uploadRosCfg, outputImageCfg):
+	cloud = pointcloud.pointCloudFromParams(frame, params)
+	u = rosUpload.uploaders.getUploader(uploadRosCfg["host"], uploadRosCfg["port"])
+	u.exportPointCloudToRos(cloud, uploadRosCfg["topic_pointcloud"])
+	return {'points': len(cloud)}
+
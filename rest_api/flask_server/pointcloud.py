@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+import functools
+import math
+import numpy as np
+import struct
+
+
+# Z16 depth is in millimeters
+DEPTH_UNIT = 0.001
+
+FIELDS_XYZ = 'xyz'
+FIELDS_XYZRGB = 'xyzrgb'
+
+# magic, version, header size, number of points, point step, fields (0 xyz, 1 xyzrgb), timestamp
+POINTCLOUD_MAGIC = b'PCLD'
+POINTCLOUD_VERSION = 1
+POINTCLOUD_HEADER = struct.Struct('<4sHHIHBxd')
+
+# Smallest voxel side in meters (depth resolution is 1 mm)
+MIN_VOXEL = 0.0001
+
+
+class PointCloudError(ValueError):
+	pass
+
+
+class PointCloud:
+	"""
+	Points in camera optical frame (x right, y down, z forward), meters.
+
+	data - float32 array of shape (n, 3) with x, y, z or (n, 4) with x, y, z, rgb,
+	       where rgb is uint32 0x00RRGGBB stored in place of float32 (as in PCL and PointCloud2)
+
+	Points are kept packed, so sending them needs no conversion.
+	"""
+
+	__slots__ = ('data', 'timestamp')
+
+	def __init__(self, data, timestamp=None):
+		self.data = data
+		self.timestamp = timestamp
+
+	@classmethod
+	def fromArrays(cls, points, colors=None, timestamp=None):
+		data = np.empty((len(points), 3 if colors is None else 4), dtype=np.float32)
+		data[:, :3] = points
+		if colors is not None:
+			data[:, 3].view(np.uint32)[:] = _packColors(colors)
+
+		return cls(data, timestamp)
+
+	@property
+	def hasColors(self):
+		return self.data.shape[1] == 4
+
+	@property
+	def fields(self):
+		return FIELDS_XYZRGB if self.hasColors else FIELDS_XYZ
+
+	@property
+	def point_step(self):
+		return self.data.shape[1] * 4
+
+	@property
+	def points(self):
+		return self.data[:, :3]
+
+	# Kolory (n, 3) uint8 albo None
+	@property
+	def colors(self):
+		if not self.hasColors:
+			return None
+
+		packed = self.data[:, 3].view(np.uint32)
+		return np.stack([(packed >> 16) & 0xff, (packed >> 8) & 0xff, packed & 0xff], axis=1).astype(np.uint8)
+
+	def __len__(self):
+		return len(self.data)
+
+	# Bajty little endian, bez kopiowania
+	def toBytes(self):
+		return self.data.astype('<f4', copy=False).reshape(-1).view(np.uint8)
+
+
+# Kolory (..., 3) uint8 => uint32 0x00RRGGBB
+def _packColors(colors):
+	colors = colors.reshape(-1, 3)
+	packed = np.zeros((len(colors), 4), dtype=np.uint8)
+
+	# Bytes of little endian uint32 are B, G, R, 0
+	packed[:, 0] = colors[:, 2]
+	packed[:, 1] = colors[:, 1]
+	packed[:, 2] = colors[:, 0]
+
+	return packed.view('<u4').reshape(-1).astype(np.uint32, copy=False)
+
+
+# Kierunki promieni x/z i y/z dla każdego piksela (spłaszczone), liczone raz dla danych parametrów kamery
+@functools.lru_cache(maxsize=8)
+def rayGrid(intrinsics):
+	u = (np.arange(intrinsics.width, dtype=np.float32) - intrinsics.ppx) / intrinsics.fx
+	v = (np.arange(intrinsics.height, dtype=np.float32) - intrinsics.ppy) / intrinsics.fy
+
+	rays = np.empty((2, intrinsics.height, intrinsics.width), dtype=np.float32)
+	rays[0] = u[None, :]
+	rays[1] = v[:, None]
+	rays.flags.writeable = False
+
+	return rays.reshape(2, -1)
+
+
+# Chmura punktów z głębokości; piksele bez głębokości (0) są pomijane
+# Wszystko liczone od razu w spakowanej tablicy wynikowej
+def deproject(frame: InternalFrameFormat, withColor=True):
+	if frame.intrinsics is None:
+		raise PointCloudError("Camera intrinsics of this input are not known")
+
+	depth = frame.depth.reshape(-1)
+	valid = np.flatnonzero(depth)
+	rays = rayGrid(frame.intrinsics)
+
+	data = np.empty((len(valid), 4 if withColor else 3), dtype=np.float32)
+	z = data[:, 2]
+	np.multiply(np.take(depth, valid), np.float32(DEPTH_UNIT), out=z, casting='unsafe')
+	np.multiply(np.take(rays[0], valid), z, out=data[:, 0])
+	np.multiply(np.take(rays[1], valid), z, out=data[:, 1])
+
+	if withColor:
+		# Packing all pixels and then taking valid ones is faster than taking 3-byte rows
+		np.take(_packColors(frame.color), valid, out=data[:, 3].view(np.uint32))
+
+	return PointCloud(data, frame.timestamp)
+
+
+# Jeden punkt (średnia) na każdy zajęty sześcian o boku `voxelSize` metrów
+def voxelDownsample(cloud: PointCloud, voxelSize):
+	if voxelSize <= 0 or len(cloud) == 0:
+		return cloud
+
+	points = cloud.points
+	cells = np.floor(points / voxelSize).astype(np.int64)
+	cells -= cells.min(axis=0)
+
+	# One int64 key per voxel; np.unique over rows would be much slower
+	# Gdy klucz nie mieści się w int64 (bardzo małe voxele), unique po wierszach
+	size = [int(i) + 1 for i in cells.max(axis=0)]
+	if size[0] * size[1] * size[2] <= np.iinfo(np.int64).max:
+		keys = (cells[:, 0] * size[1] + cells[:, 1]) * size[2] + cells[:, 2]
+		(_, inverse, counts) = np.unique(keys, return_inverse=True, return_counts=True)
+	else:
+		(_, inverse, counts) = np.unique(cells, axis=0, return_inverse=True, return_counts=True)
+		inverse = inverse.reshape(-1)
+
+	def mean(values):
+		return np.stack([np.bincount(inverse, weights=values[:, i]) for i in range(3)], axis=1) / counts[:, None]
+
+	colors = cloud.colors
+	if colors is not None:
+		colors = np.rint(mean(colors)).astype(np.uint8)
+
+	return PointCloud.fromArrays(mean(points), colors, cloud.timestamp)
+
+
+# Parametry zapytania: fields=xyz|xyzrgb  voxel=<metry>
+def pointCloudFromParams(frame: InternalFrameFormat, params):
+	fields = params.get('fields', FIELDS_XYZRGB)
+	if fields not in (FIELDS_XYZ, FIELDS_XYZRGB):
+		raise PointCloudError("fields must be one of: {}, {}".format(FIELDS_XYZ, FIELDS_XYZRGB))
+
+	try:
+		voxel = float(params.get('voxel', 0.0))
+	except ValueError:
+		raise PointCloudError("voxel must be number: {}".format(params['voxel']))
+
+	# 0 wyłącza próbkowanie; nan zwinąłby chmurę do jednego punktu
+	if not (voxel == 0 or (math.isfinite(voxel) and voxel >= MIN_VOXEL)):
+		raise PointCloudError("voxel must be 0 or number of meters not smaller than {}: {}".format(MIN_VOXEL, voxel))
+
+	return voxelDownsample(deproject(frame, fields == FIELDS_XYZRGB), voxel)
+
+
+def header(cloud: PointCloud):
+	return POINTCLOUD_HEADER.pack(
+		POINTCLOUD_MAGIC,
+		POINTCLOUD_VERSION,
+		POINTCLOUD_HEADER.size,
+		len(cloud),
+		cloud.point_step,
+		1 if cloud.hasColors else 0,
+		cloud.timestamp)
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+
+import collections
+import cProfile
+import io
+import itertools
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+
+
+# How often the sampler looks at stack of profiled thread [s]
+SAMPLE_INTERVAL = 0.001
+
+# Default number of kept profiles
+KEEP = 20
+
+
+class StackSampler:
+	"""
+	Samples stack of one thread in background and counts identical stacks.
+
+	Result is in "collapsed" format (one line "outer;inner;leaf count"),
+	which flamegraph.pl, speedscope and similar tools read.
+	"""
+
+	def __init__(self, threadId, interval=SAMPLE_INTERVAL):
+		self.__threadId = threadId
+		self.__interval = interval
+		self.__stopEvent = threading.Event()
+		self.__thread = None
+		self.stacks = collections.Counter()
+
+	def start(self):
+		self.__thread = threading.Thread(target=self.__run, name="profile-sampler", daemon=True)
+		self.__thread.start()
+
+	def stop(self):
+		self.__stopEvent.set()
+		self.__thread.join()
+
+	@property
+	def samples(self):
+		return sum(self.stacks.values())
+
+	def collapsed(self):
+		return ''.join('{} {}\n'.format(stack, count) for (stack, count) in self.stacks.most_common())
+
+	def __run(self):
+		while not self.__stopEvent.wait(self.__interval):
+			frame = sys._current_frames().get(self.__threadId)
+			# Profiled thread may already be in stop()
+			if frame is not None and not self.__stopEvent.is_set():
+				self.stacks[_collapse(frame)] += 1
+
+
+def _frameName(code):
+	return '{}:{}'.format(os.path.basename(code.co_filename), getattr(code, 'co_qualname', code.co_name))
+
+
+# Stos od najbardziej zewnętrznej funkcji
+def _collapse(frame):
+	names = []
+	while frame is not None:
+		names.append(_frameName(frame.f_code))
+		frame = frame.f_back
+
+	return ';'.join(reversed(names))
+
+
+class Profile:
+	__slots__ = ('id', 'timestamp', 'path', 'input', 'output', 'status', 'seconds', 'stats', 'collapsed', 'samples')
+
+	def __init__(self, id, timestamp, path, input, output, status, seconds, stats, collapsed, samples):
+		self.id = id
+		self.timestamp = timestamp
+		self.path = path
+		self.input = input
+		self.output = output
+		self.status = status
+		self.seconds = seconds
+		self.stats = stats
+		self.collapsed = collapsed
+		self.samples = samples
+
+	# Plik w formacie pstats (jak z cProfile.Profile.dump_stats), do `pstats.Stats(path)` albo snakeviz
+	def pstatsDump(self):
+		return marshal.dumps(self.stats)
+
+	# Najdroższe funkcje (wg czasu łącznego) jako tekst
+	def text(self, limit=40):
+		stream = io.StringIO()
+		s = pstats.Stats(stream=stream)
+		s.stats = self.stats
+		s.get_top_level_stats()
+		s.sort_stats('cumulative').print_stats(limit)
+		return stream.getvalue()
+
+	def summary(self):
+		return {
+			'id': self.id,
+			'timestamp': self.timestamp,
+			'path': self.path,
+			'input': self.input,
+			'output': self.output,
+			'status': self.status,
+			'seconds': self.seconds,
+			'samples': self.samples,
+		}
+
+
+class Profiler:
+	"""
+	Runs function under deterministic profiler (cProfile, exact call counts
+	and times) and stack sampler (collapsed stacks for flamegraphs) at the
+	same time and keeps last `keep` profiles in ring buffer.
+
+	Only one profiler can be active in process (sys.monitoring since Python
+	3.12), so profiled calls run one after another.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__runLock = threading.Lock()
+		self.__profiles = collections.deque()
+		self.__ids = itertools.count(1)
+
+	# Zwraca (wynik `fn()`, profil); `describe(result)` => status zapisany w profilu
+	# Profil jest zapisywany także gdy `fn()` rzuci wyjątek (status "error")
+	def run(self, fn, path, input, output, keep=KEEP, describe=lambda result: None):
+		with self.__runLock:
+			return self.__run(fn, path, input, output, keep, describe)
+
+	def __run(self, fn, path, input, output, keep, describe):
+		profiler = cProfile.Profile()
+		sampler = StackSampler(threading.get_ident())
+		status = 'error'
+
+		start = time.perf_counter()
+		sampler.start()
+		profiler.enable()
+		try:
+			result = fn()
+			status = describe(result)
+		finally:
+			profiler.disable()
+			sampler.stop()
+			seconds = time.perf_counter() - start
+
+			profiler.create_stats()
+			with self.__lock:
+				profile = Profile(next(self.__ids), time.time(), path, input, output, status, seconds,
+					profiler.stats, sampler.collapsed(), sampler.samples)
+				self.__profiles.append(profile)
+				while len(self.__profiles) > max(keep, 1):
+					self.__profiles.popleft()
+
+		return (result, profile)
+
+	def profiles(self):
+		with self.__lock:
+			return [p.summary() for p in reversed(self.__profiles)]
+
+	def get(self, id):
+		with self.__lock:
+			for p in self.__profiles:
+				if p.id == id:
+					return p
+
+		return None
+
+	def clear(self):
+		with self.__lock:
+			self.__profiles.clear()
+
+
+profiler = Profiler()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+from frameFormat import Intrinsics
+import functools
+import numpy as np
+import pybullet as pb
+import threading
+import time
+
+
+# Metric depth is sent in millimeters (like Z16 from realsense)
+DEPTH_SCALE = 1000.0
+
+
+# Tryby połączenia: udp, tcp (przez most sieciowy), direct i shared_memory (lokalnie, np. w testach)
+def connect(mode, host, port):
+	if mode == "udp":
+		clientId = pb.connect(pb.UDP, host, port)
+	elif mode == "tcp":
+		clientId = pb.connect(pb.TCP, host, port)
+	elif mode == "direct":
+		clientId = pb.connect(pb.DIRECT)
+	elif mode == "shared_memory":
+		clientId = pb.connect(pb.SHARED_MEMORY)
+	else:
+		raise NotImplementedError("Not recognised pybullet mode: {}".format(mode))
+
+	if clientId < 0:
+		raise Exception("Could not connect to pybullet server ({} {}:{})".format(mode, host, port))
+
+	return clientId
+
+
+class PybulletConnection:
+	def __init__(self, mode, host, port):
+		self.key = (mode, host, port)
+		self.clientId = connect(mode, host, port)
+		# One client must not be used by many threads at once
+		self.lock = threading.Lock()
+
+	@property
+	def is_connected(self):
+		return bool(pb.getConnectionInfo(physicsClientId=self.clientId)['isConnected'])
+
+	def disconnect(self):
+		try:
+			pb.disconnect(physicsClientId=self.clientId)
+		except pb.error:
+			pass
+
+
+class PybulletConnectionManager:
+	"""
+	Keeps one pybullet client per (mode, host, port). Broken connection is
+	replaced by new one on next use.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__connections = {}
+
+	def getConnection(self, mode, host, port):
+		key = (mode, host, port)
+
+		with self.__lock:
+			c = self.__connections.get(key)
+
+			if c is not None and not c.is_connected:
+				c.disconnect()
+				c = None
+
+			if c is None:
+				c = PybulletConnection(mode, host, port)
+				self.__connections[key] = c
+
+			return c
+
+	def drop(self, connection):
+		with self.__lock:
+			if self.__connections.get(connection.key) is connection:
+				del self.__connections[connection.key]
+
+		connection.disconnect()
+
+	def stop(self):
+		with self.__lock:
+			connections = list(self.__connections.values())
+			self.__connections.clear()
+
+		for c in connections:
+			c.disconnect()
+
+		return len(connections) > 0
+
+
+# Macierze kamery zależą tylko od konfiguracji, więc liczymy je raz dla danych parametrów
+@functools.lru_cache(maxsize=32)
+def viewMatrix(eyePosition, targetPosition, eyeUpVector):
+	return pb.computeViewMatrix(
+		cameraEyePosition=eyePosition,
+		cameraTargetPosition=targetPosition,
+		cameraUpVector=eyeUpVector)
+
+
+@functools.lru_cache(maxsize=32)
+def projectionMatrix(fov, aspect, nearDistance, farDistance):
+	return pb.computeProjectionMatrixFOV(
+		fov=fov,
+		aspect=aspect,
+		nearVal=nearDistance,
+		farVal=farDistance)
+
+
+# Parametry kamery z macierzy projekcji OpenGL (kolejność kolumnowa, jak zwraca pybullet)
+# Oś y obrazka rośnie w dół, więc kierunek y jest odwrócony względem OpenGL
+def intrinsics(projectionMatrix, width, height):
+	fx = projectionMatrix[0] * width / 2
+	fy = projectionMatrix[5] * height / 2
+	ppx = (1 - projectionMatrix[8]) * width / 2 - 0.5
+	ppy = (1 + projectionMatrix[9]) * height / 2 - 0.5
+
+	return Intrinsics(width, height, fx, fy, ppx, ppy)
+
+
+# Zamień wynik getCameraImage na InternalFrameFormat (tylko operacje na tablicach)
+# Parametry kamery są znane tylko dla głębokości liniowej (w innym wypadku to nie są milimetry)
+def convertCameraImage(width, height, rgbaImg, depthImg, nearDistance, farDistance, linearDepth=False, projectionMatrix=None):
+	rgba = np.asarray(rgbaImg, dtype=np.uint8).reshape(height, width, 4)
+
+	# RGBA => RGB; copying channel by channel is much faster than one strided copy of rgba[:, :, :3]
+	color = np.empty((height, width, 3), dtype=np.uint8)
+	for i in range(3):
+		color[:, :, i] = rgba[:, :, i]
+
+	# pybullet returns depth buffer as float in range [0.0 ; 1.0]
+	depthBuffer = np.asarray(depthImg).reshape(height, width)
+
+	if linearDepth:
+		# Depth buffer => distance from camera plane [m] => [mm]
+		depth = np.multiply(depthBuffer, nearDistance - farDistance, dtype=np.float64)
+		depth += farDistance
+		np.divide(farDistance * nearDistance * DEPTH_SCALE, depth, out=depth)
+	else:
+		depth = np.multiply(depthBuffer, 65535, dtype=np.float64)  # [0.0 ; 1.0]  => [0 ; 65535]
+
+	np.clip(depth, 0, 65535, out=depth)  # Make sure that range is correct
+
+	cameraIntrinsics = None
+	if linearDepth and projectionMatrix is not None:
+		cameraIntrinsics = intrinsics(projectionMatrix, width, height)
+
+	return InternalFrameFormat(width=width, height=height, color=color, depth=depth.astype(np.uint16), timestamp=time.time(), intrinsics=cameraIntrinsics)
+
+
+manager = PybulletConnectionManager()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+from frameFormat import Intrinsics
+import frameGrabber
+import metrics
+import numpy as np
+import threading
+import time
+
+
+# Ignore frames in the beginning, so autoexposure apply
+WARMUP_FRAMES = 100
+
+
+def startRealsensePipeline(width, height):
+	import pyrealsense2 as rs
+
+	cfg = rs.config()
+	cfg.enable_stream(rs.stream.color, width=width, height=height, format=rs.format.rgb8)
+	cfg.enable_stream(rs.stream.depth, width=width, height=height, format=rs.format.z16)
+
+	pipe = rs.pipeline()
+	pipe.start(cfg)
+
+	return pipe
+
+
+# Zamień zestaw klatek z realsense na InternalFrameFormat
+def convertFrameset(frames):
+	color = frames.get_color_frame()
+	depth = frames.get_depth_frame()
+
+	width = color.get_width()
+	height = color.get_height()
+
+	# Copy out of librealsense buffers, they are reused by the pipeline
+	colorData = np.array(color.get_data(), dtype=np.uint8).reshape(height, width, 3)
+	depthData = np.array(depth.get_data(), dtype=np.uint16).reshape(height, width)
+
+	# Color and depth streams are not aligned, intrinsics are those of depth stream
+	i = depth.profile.as_video_stream_profile().get_intrinsics()
+	intrinsics = Intrinsics(i.width, i.height, i.fx, i.fy, i.ppx, i.ppy)
+
+	return InternalFrameFormat(width=width, height=height, color=colorData, depth=depthData, timestamp=time.time(), intrinsics=intrinsics)
+
+
+class RealsensePipeline(frameGrabber.FrameGrabber):
+	"""
+	Long-lived realsense pipeline for one (width, height) setting.
+
+	`pipelineFactory(width, height)` returns started object with methods
+	`wait_for_frames()` and `stop()` (rs.pipeline or fake one in tests).
+	`convert(frames)` turns result of `wait_for_frames()` into InternalFrameFormat.
+	"""
+
+	def __init__(self, width, height, pipelineFactory=startRealsensePipeline, convert=convertFrameset, warmUpFrames=WARMUP_FRAMES):
+		super().__init__("realsense-{}x{}".format(width, height), "usb_realsense")
+		self.width = width
+		self.height = height
+		self.__pipelineFactory = pipelineFactory
+		self.__convert = convert
+		self.__warmUpFrames = warmUpFrames
+		self.__pipe = None
+
+	def _open(self):
+		self.__pipe = self.__pipelineFactory(self.width, self.height)
+
+	def _warmUp(self):
+		for _ in range(self.__warmUpFrames):
+			if self._stopping():
+				return
+			self.__pipe.wait_for_frames()
+
+	def _read(self):
+		with metrics.span('wait_for_frames', self.input):
+			frames = self.__pipe.wait_for_frames()
+		with metrics.span('convert', self.input):
+			return self.__convert(frames)
+
+	def _close(self):
+		if self.__pipe is not None:
+			self.__pipe.stop()
+			self.__pipe = None
+
+
+class RealsensePipelineManager:
+	"""
+	Keeps one warm pipeline. It is restarted only when requested resolution
+	changes or when previous pipeline failed.
+	"""
+
+	def __init__(self, pipelineFactory=startRealsensePipeline, convert=convertFrameset, warmUpFrames=WARMUP_FRAMES):
+		self.__lock = threading.Lock()
+		self.__pipeline = None
+		self.__pipelineFactory = pipelineFactory
+		self.__convert = convert
+		self.__warmUpFrames = warmUpFrames
+
+	def getPipeline(self, width, height):
+		with self.__lock:
+			p = self.__pipeline
+
+			if p is not None and (p.width != width or p.height != height or p.state in (p.FAILED, p.STOPPED)):
+				p.stop()
+				p = None
+
+			if p is None:
+				p = RealsensePipeline(width, height, self.__pipelineFactory, self.__convert, self.__warmUpFrames)
+				p.start()
+				self.__pipeline = p
+
+			return p
+
+	# Uruchom ponownie z nową rozdzielczością, ale tylko jeśli pipeline już działa
+	def restart(self, width, height):
+		with self.__lock:
+			if self.__pipeline is None:
+				return False
+
+			self.__pipeline.stop()
+			self.__pipeline = RealsensePipeline(width, height, self.__pipelineFactory, self.__convert, self.__warmUpFrames)
+			self.__pipeline.start()
+			return True
+
+	def getFrame(self, width, height, timeout=10.0):
+		return self.getPipeline(width, height).getFrame(timeout=timeout)
+
+	def stop(self):
+		with self.__lock:
+			if self.__pipeline is not None:
+				self.__pipeline.stop()
+				self.__pipeline = None
+
+
+manager = RealsensePipelineManager()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+import config
+import sys
+import time
+
+
+# Zmienione klucze jako "sekcja.klucz"
+def diff(old, new):
+	changed = set()
+
+	for section in set(old) | set(new):
+		oldValues = old.get(section, {})
+		newValues = new.get(section, {})
+		for key in set(oldValues) | set(newValues):
+			if oldValues.get(key) != newValues.get(key):
+				changed.add("{}.{}".format(section, key))
+
+	return changed
+
+
+# Akcje zwracają opis tego co zrobiły albo None gdy backend nie był używany
+# Moduły backendów importujemy w akcjach, wołanych tylko gdy moduł jest już załadowany (patrz RULES)
+
+def _restartRealsense(cfg):
+	import realsensePipeline
+
+	if realsensePipeline.manager.restart(cfg['camera']['width'], cfg['camera']['height']):
+		return 'restarted'
+	return None
+
+
+def _resizeOpencv(cfg):
+	import opencvPool
+
+	if opencvPool.pool.setResolution(cfg['camera']['width'], cfg['camera']['height']):
+		return 'resolution_changed'
+	return None
+
+
+def _closeOpencv(cfg):
+	import opencvPool
+
+	device = cfg['worker_opencv']['device']
+	closed = [d for d in opencvPool.pool.devices() if d != device and opencvPool.pool.close(d)]
+
+	return 'closed' if closed else None
+
+
+def _setOpencvIdleTimeout(cfg):
+	import opencvPool
+
+	opencvPool.pool.idleTimeout = cfg['worker_opencv']['idle_timeout']
+	return 'updated'
+
+
+def _restartRos(cfg):
+	import rosIngest
+
+	ros = cfg['worker_ros']
+	if rosIngest.manager.restart(ros['host'], ros['port'], ros['topic_color'], ros['topic_depth'], ros['sync_slop']):
+		return 'restarted'
+	return None
+
+
+def _reconnectPybullet(cfg):
+	import pybulletClient
+
+	if pybulletClient.manager.stop():
+		return 'disconnected'
+	return None
+
+
+def _clearPybulletProjection(cfg):
+	import pybulletClient
+
+	pybulletClient.projectionMatrix.cache_clear()
+	return 'projection_matrix_cleared'
+
+
+def _clearPybulletView(cfg):
+	import pybulletClient
+
+	pybulletClient.viewMatrix.cache_clear()
+	return 'view_matrix_cleared'
+
+
+def _clearCapturedFrames(cfg):
+	import captureScheduler
+
+	if captureScheduler.scheduler.clear():
+		return 'frames_dropped'
+	return None
+
+
+def _closeUploader(cfg):
+	import rosUpload
+
+	if rosUpload.uploaders.stop():
+		return 'disconnected'
+	return None
+
+
+# (klucze konfiguracji, backend, moduł backendu, akcja)
+# Gdy moduł nie był jeszcze zaimportowany, backend nie był używany i nie ma czego zmieniać
+RULES = [
+	({'camera.width', 'camera.height'}, 'usb_realsense', 'realsensePipeline', _restartRealsense),
+	({'camera.width', 'camera.height'}, 'opencv', 'opencvPool', _resizeOpencv),
+	({'worker_opencv.device'}, 'opencv', 'opencvPool', _closeOpencv),
+	({'worker_opencv.idle_timeout'}, 'opencv', 'opencvPool', _setOpencvIdleTimeout),
+	({'worker_ros.host', 'worker_ros.port', 'worker_ros.topic_color', 'worker_ros.topic_depth'}, 'ros', 'rosIngest', _restartRos),
+	({'worker_pybullet.mode', 'worker_pybullet.host', 'worker_pybullet.port'}, 'pybullet', 'pybulletClient', _reconnectPybullet),
+	({'worker_pybullet.fov', 'worker_pybullet.aspect', 'worker_pybullet.near_distance', 'worker_pybullet.far_distance'}, 'pybullet', 'pybulletClient', _clearPybulletProjection),
+	({'worker_pybullet.eye_position', 'worker_pybullet.eye_up_vector', 'worker_pybullet.target_position'}, 'pybullet', 'pybulletClient', _clearPybulletView),
+	({'upload_ros.host', 'upload_ros.port'}, 'upload_ros', 'rosUpload', _closeUploader),
+	# Po restartach kamer: klatka zrobiona w trakcie zmiany też nie może być użyta ponownie
+	({'camera.width', 'camera.height'}, 'capture_engine', 'captureScheduler', _clearCapturedFrames),
+]
+
+
+# Słuchacz config.addListener: wykonuje tylko akcje dotyczące zmienionych kluczy
+def onConfigChange(old, new):
+	changed = diff(old, new)
+	results = []
+
+	for (keys, backend, module, action) in RULES:
+		if not (changed & keys) or module not in sys.modules:
+			continue
+
+		start = time.perf_counter()
+		try:
+			result = action(new)
+			error = None
+		except Exception as e:
+			result = 'failed'
+			error = str(e)
+
+		if result is None:
+			continue
+
+		results.append({
+			'backend': backend,
+			'action': result,
+			'keys': sorted(changed & keys),
+			'seconds': time.perf_counter() - start,
+			'error': error,
+		})
+
+	return results
+
+
+config.addListener(onConfigChange)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import base64
+import numpy as np
+
+
+class RosImageError(ValueError):
+	pass
+
+
+# encoding => (dtype, channels)
+ENCODINGS = {
+	'rgb8': (np.uint8, 3),
+	'bgr8': (np.uint8, 3),
+	'rgba8': (np.uint8, 4),
+	'bgra8': (np.uint8, 4),
+	'mono8': (np.uint8, 1),
+	'mono16': (np.uint16, 1),
+	'8UC1': (np.uint8, 1),
+	'8UC3': (np.uint8, 3),
+	'16UC1': (np.uint16, 1),
+	'32FC1': (np.float32, 1),
+
+	# Names used by older versions of UploaderRos
+	'RGB8': (np.uint8, 3),
+	'Z16': (np.uint16, 1),
+}
+
+COLOR_ENCODINGS = ('rgb8', 'bgr8', 'rgba8', 'bgra8', 'mono8', '8UC1', '8UC3', 'RGB8')
+DEPTH_ENCODINGS = ('16UC1', 'mono16', '32FC1', 'Z16')
+
+# 32FC1 depth is in meters, Z16 in millimeters
+DEPTH_SCALE = 1000.0
+
+
+# Pole `data` jako bufor bajtów (rosbridge wysyła base64, czasem listę liczb)
+def _rawData(data):
+	if isinstance(data, str):
+		return base64.b64decode(data)
+	if isinstance(data, (bytes, bytearray, memoryview)):
+		return data
+
+	return np.asarray(data, dtype=np.uint8).tobytes()
+
+
+def decodeImage(msg):
+	"""
+	Map sensor_msgs/Image onto numpy array without copying.
+
+	Returns read-only array of shape (height, width, channels) with dtype in
+	byte order given by `is_bigendian`. Padding at the end of rows (`step`)
+	is skipped through strides.
+	"""
+	encoding = msg["encoding"]
+	if encoding not in ENCODINGS:
+		raise RosImageError("Unsupported image encoding: {}".format(encoding))
+
+	(dtype, channels) = ENCODINGS[encoding]
+	dtype = np.dtype(dtype).newbyteorder('>' if msg.get("is_bigendian", 0) else '<')
+
+	width = msg["width"]
+	height = msg["height"]
+	pixelSize = dtype.itemsize * channels
+	step = msg.get("step") or width * pixelSize
+
+	if step < width * pixelSize:
+		raise RosImageError("Image step {} is smaller than row size {} ({}x{} {})".format(step, width * pixelSize, width, height, encoding))
+
+	buf = _rawData(msg["data"])
+	if len(buf) < step * (height - 1) + width * pixelSize:
+		raise RosImageError("Image data has {} bytes, expected {} ({}x{} {}, step {})".format(len(buf), step * height, width, height, encoding, step))
+
+	return np.ndarray(
+		shape=(height, width, channels),
+		dtype=dtype,
+		buffer=buf,
+		strides=(step, pixelSize, dtype.itemsize))
+
+
+# Obrazek kolorowy jako RGB (widok, kopia powstaje dopiero w InternalFrameFormat)
+def decodeColor(msg):
+	encoding = msg["encoding"]
+	if encoding not in COLOR_ENCODINGS:
+		raise RosImageError("Unsupported color image encoding: {}".format(encoding))
+
+	image = decodeImage(msg)
+
+	if encoding in ('bgr8', 'bgra8', '8UC3'):
+		return image[:, :, 2::-1]  # BGR(A) => RGB
+	if encoding == 'rgba8':
+		return image[:, :, :3]  # RGBA => RGB
+	if image.shape[2] == 1:
+		return np.broadcast_to(image, image.shape[:2] + (3,))  # mono => RGB
+
+	return image
+
+
+# Głębokość jako uint16 w milimetrach (Z16)
+def decodeDepth(msg):
+	encoding = msg["encoding"]
+	if encoding not in DEPTH_ENCODINGS:
+		raise RosImageError("Unsupported depth image encoding: {}".format(encoding))
+
+	image = decodeImage(msg)[:, :, 0]
+
+	if encoding == '32FC1':
+		depth = image * DEPTH_SCALE
+		depth[~np.isfinite(depth)] = 0
+		np.clip(depth, 0, 65535, out=depth)
+		return depth.astype(np.uint16)
+
+	return image
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+
+import collections
+import roslibpy
+import threading
+import time
+
+
+# How many last messages are kept per topic
+BUFFER_SIZE = 10
+
+# Max difference of header.stamp (seconds) between color and depth in one pair
+SYNC_SLOP = 0.05
+
+
+class RosIngestError(Exception):
+	pass
+
+
+# header.stamp w sekundach (ROS1: secs/nsecs, ROS2: sec/nanosec)
+def stampToSeconds(msg):
+	stamp = msg["header"]["stamp"]
+
+	if "secs" in stamp:
+		return stamp["secs"] + stamp["nsecs"] * 1e-9
+
+	return stamp["sec"] + stamp["nanosec"] * 1e-9
+
+
+class RosIngest:
+	"""
+	Long-lived subscription of color and depth topics.
+
+	Last BUFFER_SIZE messages of every topic are kept in ring buffer. Every new
+	message is matched with the closest (by header.stamp) message of the other
+	topic; pairs not further apart than `slop` seconds become the newest
+	synchronized pair. Waiting clients are woken up by condition variable.
+	"""
+
+	def __init__(self, host, port, topicColor, topicDepth, slop=SYNC_SLOP, bufferSize=BUFFER_SIZE):
+		self.host = host
+		self.port = port
+		self.topicColor = topicColor
+		self.topicDepth = topicDepth
+		self.slop = slop
+
+		self.__condition = threading.Condition()
+		self.__colorBuffer = collections.deque(maxlen=bufferSize)
+		self.__depthBuffer = collections.deque(maxlen=bufferSize)
+		self.__pair = None
+		self.__pairStamp = None
+		self.__sequence = 0
+
+		self.__ros = None
+		self.__listenerColor = None
+		self.__listenerDepth = None
+
+	@property
+	def sequence(self):
+		with self.__condition:
+			return self.__sequence
+
+	@property
+	def is_connected(self):
+		return self.__ros is not None and self.__ros.is_connected
+
+	def start(self):
+		self.__ros = roslibpy.Ros(host=self.host, port=self.port)
+		self.__ros.run()
+
+		self.__listenerColor = roslibpy.Topic(self.__ros, self.topicColor, 'sensor_msgs/Image')
+		self.__listenerDepth = roslibpy.Topic(self.__ros, self.topicDepth, 'sensor_msgs/Image')
+
+		self.__listenerColor.subscribe(self.onColor)
+		self.__listenerDepth.subscribe(self.onDepth)
+
+	def stop(self):
+		if self.__listenerColor is not None:
+			self.__listenerColor.unsubscribe()
+		if self.__listenerDepth is not None:
+			self.__listenerDepth.unsubscribe()
+
+		if self.__ros is not None and self.__ros.is_connected:
+			# BUG
+			# For some reason calling close()
+			# causes error "server did not drop TCP connection in time"
+			# in websocket library. This error causes situation that
+			# you can not reconnect again until you restart program.
+
+			self.__ros.close()
+
+		self.__ros = None
+		self.__listenerColor = None
+		self.__listenerDepth = None
+
+		with self.__condition:
+			self.__condition.notify_all()
+
+	def onColor(self, msg):
+		self.__add(msg, self.__colorBuffer, self.__depthBuffer, isColor=True)
+
+	def onDepth(self, msg):
+		self.__add(msg, self.__depthBuffer, self.__colorBuffer, isColor=False)
+
+	# Najnowsza zsynchronizowana para (color, depth); czeka tylko gdy jeszcze jej nie ma
+	def getPair(self, timeout=5.0, newerThan=0):
+		deadline = time.monotonic() + timeout
+
+		with self.__condition:
+			while self.__sequence <= newerThan:
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					raise RosIngestError("Timeout while waiting for synchronized color and depth from {}:{}".format(self.host, self.port))
+
+				self.__condition.wait(remaining)
+
+			return self.__pair
+
+	def __add(self, msg, buffer, otherBuffer, isColor):
+		stamp = stampToSeconds(msg)
+
+		with self.__condition:
+			buffer.append((stamp, msg))
+
+			best = None
+			bestDiff = None
+			for (otherStamp, other) in otherBuffer:
+				diff = abs(otherStamp - stamp)
+				if diff <= self.slop and (best is None or diff < bestDiff):
+					best = (otherStamp, other)
+					bestDiff = diff
+
+			if best is None:
+				return
+
+			pairStamp = max(stamp, best[0])
+			if self.__pairStamp is not None and pairStamp < self.__pairStamp:
+				return
+
+			self.__pair = (msg, best[1]) if isColor else (best[1], msg)
+			self.__pairStamp = pairStamp
+			self.__sequence = self.__sequence + 1
+			self.__condition.notify_all()
+
+
+class RosIngestManager:
+	"""
+	Keeps one RosIngest. New one is created only when host, port or topics
+	change or when connection to rosbridge was lost.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__ingest = None
+
+	def getIngest(self, host, port, topicColor, topicDepth, slop=SYNC_SLOP):
+		with self.__lock:
+			i = self.__ingest
+
+			# Nowa subskrypcja także po zerwaniu połączenia (np. restart rosbridge)
+			if i is not None and ((i.host, i.port, i.topicColor, i.topicDepth) != (host, port, topicColor, topicDepth) or not i.is_connected):
+				i.stop()
+				i = None
+				self.__ingest = None
+
+			if i is None:
+				i = RosIngest(host, port, topicColor, topicDepth, slop)
+				i.start()
+				self.__ingest = i
+
+			i.slop = slop
+
+			return i
+
+	# Połącz ponownie z nowymi ustawieniami, ale tylko jeśli subskrypcja już działa
+	def restart(self, host, port, topicColor, topicDepth, slop=SYNC_SLOP):
+		with self.__lock:
+			if self.__ingest is None:
+				return False
+
+			self.__ingest.stop()
+			self.__ingest = None
+
+			# Zapamiętana tylko gdy połączenie się udało (jak w getIngest)
+			i = RosIngest(host, port, topicColor, topicDepth, slop)
+			i.start()
+			self.__ingest = i
+			return True
+
+	def stop(self):
+		with self.__lock:
+			if self.__ingest is not None:
+				self.__ingest.stop()
+				self.__ingest = None
+
+
+manager = RosIngestManager()
@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from typing import List, Tuple
+from typing import List, Tuple, Union
 
 import roslibpy as r
 
@@ -62,7 +62,7 @@ class Image(r.Message):
 				encoding: str,
 				is_bigendian: int,
 				step: int,
-				data: List[int]):
+				data: Union[List[int], str]):
 		super().__init__({
 			'header': header.data,
 			'height': height,
@@ -109,7 +109,7 @@ class PointCloud2(r.Message):
 				is_bigendian: bool,
 				point_step: int,
 				row_step: int,
-				data: List[int],
+				data: Union[List[int], str],
 				is_dense: bool):
 		super().__init__({
 			'header': header.data,
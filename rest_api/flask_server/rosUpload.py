@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+import base64
+from frameFormat import InternalFrameFormat
+import roslibpy
+import rosMsgs
+import threading
+import time
+
+
+# Default publishing rate of republisher (frames per second)
+REPUBLISH_RATE = 10.0
+
+
+# Wiadomości sensor_msgs/Image dla koloru i głębokości (dane jako base64)
+def imageMessages(frame: InternalFrameFormat, seq=0):
+	assert(frame.color_bpp == 3)
+	assert(frame.depth_bpp == 2)
+
+	secs = int(frame.timestamp)
+	nsecs = int((frame.timestamp - secs) * 1e9)
+	header = roslibpy.Header(seq, roslibpy.Time(secs, nsecs), 'frame???')  # TODO: set frame_id
+	bigEndian = 0  # depthBytes() is always little endian
+
+	# rosbridge accepts uint8[] as base64 string, which is much smaller than list of ints
+	color = base64.b64encode(frame.colorBytes()).decode('ascii')
+	depth = base64.b64encode(frame.depthBytes()).decode('ascii')
+
+	color_image = rosMsgs.Image(header, frame.height, frame.width, 'rgb8', bigEndian, frame.width * frame.color_bpp, color)
+	depth_image = rosMsgs.Image(header, frame.height, frame.width, '16UC1', bigEndian, frame.width * frame.depth_bpp, depth)
+
+	return (color_image, depth_image)
+
+
+# Wiadomość sensor_msgs/PointCloud2 (nieuporządkowana chmura, height = 1)
+def pointCloudMessage(cloud, seq=0):
+	secs = int(cloud.timestamp)
+	nsecs = int((cloud.timestamp - secs) * 1e9)
+	header = roslibpy.Header(seq, roslibpy.Time(secs, nsecs), 'frame???')  # TODO: set frame_id
+
+	names = ['x', 'y', 'z', 'rgb'] if cloud.hasColors else ['x', 'y', 'z']
+	fields = [rosMsgs.PointField(name, 4 * i, rosMsgs.PointField.datatype_FLOAT32, 1) for (i, name) in enumerate(names)]
+
+	data = base64.b64encode(cloud.toBytes()).decode('ascii')
+
+	return rosMsgs.PointCloud2(header, 1, len(cloud), fields, False, cloud.point_step, cloud.point_step * len(cloud), data, True)
+
+
+# Wyślij obrazek do serwera Rosa
+# Połączenie i ogłoszone tematy zostają otwarte między kolejnymi obrazkami
+class UploaderRos:
+	def __init__(self, host, port):
+		self.host = host
+		self.port = port
+		self.__ros = roslibpy.Ros(host=host, port=port)
+		self.__ros.run()
+		self.__lock = threading.Lock()
+		self.__talkers = {}
+		self.__seq = 0
+
+	@property
+	def is_connected(self):
+		return self.__ros.is_connected
+
+	def close(self):
+		with self.__lock:
+			for talker in self.__talkers.values():
+				talker.unadvertise()
+			self.__talkers = {}
+
+		if self.__ros.is_connected:
+			self.__ros.close()  # BUG (see WorkerRos)
+
+	def __talker(self, topic, msgType=rosMsgs.Image.msg_type):
+		if topic not in self.__talkers:
+			talker = roslibpy.Topic(self.__ros, topic, msgType)
+			talker.advertise()
+			self.__talkers[topic] = talker
+
+		return self.__talkers[topic]
+
+	def exportToRos(self, frame: InternalFrameFormat, topicColor, topicDepth):
+		with self.__lock:
+			self.__seq = self.__seq + 1
+			talkerColor = self.__talker(topicColor)
+			talkerDepth = self.__talker(topicDepth)
+			seq = self.__seq
+
+		(color_image, depth_image) = imageMessages(frame, seq)
+
+		talkerColor.publish(color_image)
+		talkerDepth.publish(depth_image)
+
+	def exportPointCloudToRos(self, cloud, topic):
+		with self.__lock:
+			self.__seq = self.__seq + 1
+			talker = self.__talker(topic, rosMsgs.PointCloud2.msg_type)
+			seq = self.__seq
+
+		talker.publish(pointCloudMessage(cloud, seq))
+
+
+class UploaderRosManager:
+	"""
+	Keeps one UploaderRos; new one is created only when host or port change
+	or when connection to rosbridge was lost.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__uploader = None
+
+	def getUploader(self, host, port):
+		with self.__lock:
+			u = self.__uploader
+
+			# Nowe połączenie także po zerwaniu starego (np. restart rosbridge)
+			if u is not None and ((u.host, u.port) != (host, port) or not u.is_connected):
+				u.close()
+				u = None
+				self.__uploader = None
+
+			if u is None:
+				u = UploaderRos(host, port)
+				self.__uploader = u
+
+			return u
+
+	def stop(self):
+		with self.__lock:
+			if self.__uploader is None:
+				return False
+
+			self.__uploader.close()
+			self.__uploader = None
+			return True
+
+
+class RosRepublisher:
+	"""
+	Bridge mode: captures frames from one input at `rate` and republishes them to ROS.
+
+	Capturing and publishing run in separate threads connected by one-slot
+	mailbox. When publishing (base64 + JSON + websocket) is slower than
+	capturing, older unpublished frame is dropped instead of queued.
+
+	Every start() has its own stop event, so threads of previous run which
+	did not finish within stop() timeout (e.g. blocked in capture) only end
+	later and never touch state of the new run.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__condition = threading.Condition(self.__lock)
+		self.__stopEvent = threading.Event()
+		self.__threads = []
+		self.__pending = None
+		self.__input = None
+		self.__rate = None
+		self.__topics = None
+		self.__captured = 0
+		self.__published = 0
+		self.__dropped = 0
+		self.__error = None
+
+	@property
+	def running(self):
+		with self.__lock:
+			return any(t.is_alive() for t in self.__threads)
+
+	# `capture()` zwraca InternalFrameFormat, `getUploader()` zwraca UploaderRos
+	def start(self, input, capture, getUploader, topicColor, topicDepth, rate=REPUBLISH_RATE):
+		if rate <= 0:
+			raise ValueError("Rate must be positive: {}".format(rate))
+
+		self.stop()
+
+		stopEvent = threading.Event()
+
+		with self.__lock:
+			self.__stopEvent = stopEvent
+			self.__pending = None
+			self.__input = input
+			self.__rate = rate
+			self.__topics = (topicColor, topicDepth)
+			self.__captured = 0
+			self.__published = 0
+			self.__dropped = 0
+			self.__error = None
+			self.__threads = [
+				threading.Thread(target=self.__runCapture, args=(capture, rate, stopEvent), name="ros-republish-capture", daemon=True),
+				threading.Thread(target=self.__runPublish, args=(getUploader, topicColor, topicDepth, stopEvent), name="ros-republish-publish", daemon=True),
+			]
+			for t in self.__threads:
+				t.start()
+
+	def stop(self, timeout=5.0):
+		with self.__condition:
+			self.__stopEvent.set()
+			self.__condition.notify_all()
+			threads = self.__threads
+
+		for t in threads:
+			t.join(timeout)
+
+		with self.__lock:
+			self.__threads = []
+
+	def status(self):
+		running = self.running
+
+		with self.__lock:
+			return {
+				'running': running,
+				'input': self.__input,
+				'rate': self.__rate,
+				'topic_color': self.__topics[0] if self.__topics else None,
+				'topic_depth': self.__topics[1] if self.__topics else None,
+				'captured': self.__captured,
+				'published': self.__published,
+				'dropped': self.__dropped,
+				'error': None if self.__error is None else str(self.__error),
+			}
+
+	def __fail(self, e, stopEvent):
+		with self.__condition:
+			if not stopEvent.is_set():
+				self.__error = e
+			stopEvent.set()
+			self.__condition.notify_all()
+
+	def __runCapture(self, capture, rate, stopEvent):
+		period = 1.0 / rate
+		nextTime = time.monotonic()
+
+		try:
+			while not stopEvent.is_set():
+				frame = capture()
+
+				with self.__condition:
+					# Zatrzymany w czasie robienia zdjęcia (skrzynka może już należeć do nowego startu)
+					if stopEvent.is_set():
+						return
+
+					if self.__pending is not None:
+						self.__dropped = self.__dropped + 1
+					self.__pending = frame
+					self.__captured = self.__captured + 1
+					self.__condition.notify_all()
+
+				nextTime = max(nextTime + period, time.monotonic())
+				stopEvent.wait(max(0.0, nextTime - time.monotonic()))
+		except Exception as e:
+			self.__fail(e, stopEvent)
+
+	def __runPublish(self, getUploader, topicColor, topicDepth, stopEvent):
+		try:
+			while True:
+				with self.__condition:
+					while self.__pending is None and not stopEvent.is_set():
+						self.__condition.wait()
+
+					if stopEvent.is_set():
+						return
+
+					frame = self.__pending
+					self.__pending = None
+
+				# Po każdej klatce, żeby zerwane połączenie zostało odnowione
+				getUploader().exportToRos(frame, topicColor, topicDepth)
+
+				with self.__condition:
+					if stopEvent.is_set():
+						return
+					self.__published = self.__published + 1
+		except Exception as e:
+			self.__fail(e, stopEvent)
+
+
+uploaders = UploaderRosManager()
+republisher = RosRepublisher()
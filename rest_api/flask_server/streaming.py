@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+
+import threading
+import time
+
+
+DEFAULT_FPS = 10.0
+MAX_FPS = 60.0
+
+# How long producer waits for new viewer after last one left
+IDLE_GRACE = 2.0
+
+BOUNDARY = 'frame'
+
+
+class StreamError(Exception):
+	pass
+
+
+class StreamProducer:
+	"""
+	One capture + one encode per frame, shared by all viewers of the same stream.
+
+	Only the newest encoded part is kept. Every viewer waits for part newer
+	than the one it sent last, so slow viewer skips frames instead of
+	buffering them.
+	"""
+
+	def __init__(self, key, capture, encode, fps):
+		self.key = key
+		self.fps = fps
+		self.__capture = capture
+		self.__encode = encode
+		self.__condition = threading.Condition()
+		self.__viewers = 0
+		self.__lastViewerLeft = time.monotonic()
+		self.__part = None
+		self.__sequence = 0
+		self.__error = None
+		self.__stopped = False
+		self.__thread = threading.Thread(target=self.__run, name="stream-{}".format(key), daemon=True)
+
+	@property
+	def stopped(self):
+		with self.__condition:
+			return self.__stopped
+
+	def start(self):
+		self.__thread.start()
+
+	# Zwraca False gdy producent już się zatrzymał (trzeba stworzyć nowego)
+	def join(self):
+		with self.__condition:
+			if self.__stopped:
+				return False
+			self.__viewers = self.__viewers + 1
+			return True
+
+	def leave(self):
+		with self.__condition:
+			self.__viewers = self.__viewers - 1
+			if self.__viewers == 0:
+				self.__lastViewerLeft = time.monotonic()
+
+	# (mimetype, dane, numer) części nowszej niż `newerThan`
+	def waitForPart(self, newerThan, timeout=10.0):
+		deadline = time.monotonic() + timeout
+
+		with self.__condition:
+			while self.__sequence <= newerThan:
+				if self.__error is not None:
+					raise StreamError(str(self.__error)) from self.__error
+				if self.__stopped:
+					raise StreamError("Stream stopped")
+
+				remaining = deadline - time.monotonic()
+				if remaining <= 0:
+					raise StreamError("Timeout while waiting for frame")
+
+				self.__condition.wait(remaining)
+
+			return self.__part + (self.__sequence,)
+
+	def __idle(self):
+		with self.__condition:
+			if self.__viewers == 0 and time.monotonic() - self.__lastViewerLeft >= IDLE_GRACE:
+				self.__stopped = True
+				self.__condition.notify_all()
+				return True
+			return False
+
+	def __run(self):
+		period = 1.0 / self.fps
+		nextTime = time.monotonic()
+
+		try:
+			while not self.__idle():
+				frame = self.__capture()
+				part = self.__encode(frame)
+
+				with self.__condition:
+					self.__part = part
+					self.__sequence = self.__sequence + 1
+					self.__condition.notify_all()
+
+				nextTime = max(nextTime + period, time.monotonic())
+				time.sleep(max(0.0, nextTime - time.monotonic()))
+		except Exception as e:
+			with self.__condition:
+				self.__error = e
+				self.__stopped = True
+				self.__condition.notify_all()
+
+
+class StreamHub:
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__producers = {}
+
+	# Dołącz do istniejącego producenta albo stwórz nowego
+	def join(self, key, capture, encode, fps):
+		with self.__lock:
+			p = self.__producers.get(key)
+			if p is not None and p.join():
+				return p
+
+			# Zapomnij producentów zatrzymanych z braku widzów
+			for k in [k for (k, p) in self.__producers.items() if p.stopped]:
+				del self.__producers[k]
+
+			p = StreamProducer(key, capture, encode, fps)
+			p.join()
+			p.start()
+			self.__producers[key] = p
+			return p
+
+	def streams(self):
+		with self.__lock:
+			return [k for (k, p) in self.__producers.items() if not p.stopped]
+
+
+# Generator części multipart/x-mixed-replace dla jednego widza
+def multipart(producer):
+	sequence = 0
+	try:
+		while True:
+			try:
+				(mimetype, data, sequence) = producer.waitForPart(sequence)
+			except StreamError:
+				return
+
+			yield "--{}\r\nContent-Type: {}\r\nContent-Length: {}\r\n\r\n".format(BOUNDARY, mimetype, len(data)).encode('ascii')
+			yield data
+			yield b"\r\n"
+	finally:
+		producer.leave()
+
+
+hub = StreamHub()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+
+from frameFormat import InternalFrameFormat
+from frameFormat import Intrinsics
+import functools
+import math
+import numpy as np
+import threading
+import time
+
+
+# Horizontal field of view of synthetic pinhole camera [degrees]
+FOV = 60.0
+
+# Pattern moves by this many pixels per frame, so consecutive frames differ
+SHIFT = 4
+
+
+# Wzór dla danej rozdzielczości (liczony raz): gradient z kratką w kolorze,
+# pochyła płaszczyzna z kulą w głębokości [mm] i pas bez głębokości (0)
+@functools.lru_cache(maxsize=4)
+def _pattern(width, height):
+	x = np.linspace(0.0, 1.0, width, dtype=np.float32)[None, :]
+	y = np.linspace(0.0, 1.0, height, dtype=np.float32)[:, None]
+
+	checker = ((np.arange(width)[None, :] // 32 + np.arange(height)[:, None] // 32) % 2).astype(np.float32)
+
+	color = np.empty((height, width, 3), dtype=np.uint8)
+	color[:, :, 0] = (255 * x).astype(np.uint8)
+	color[:, :, 1] = (255 * y).astype(np.uint8)
+	color[:, :, 2] = (64 + 128 * checker).astype(np.uint8)
+
+	depth = np.repeat(1000.0 + 2000.0 * y, width, axis=1)
+	r2 = (x - 0.5) ** 2 + ((y - 0.5) * height / max(width, 1)) ** 2
+	depth = np.where(r2 < 0.04, depth - 4000.0 * np.sqrt(np.maximum(0.04 - r2, 0.0)), depth)
+	depth = depth.astype(np.uint16)
+	depth[:, :max(1, width // 64)] = 0
+
+	color.flags.writeable = False
+	depth.flags.writeable = False
+
+	return (color, depth)
+
+
+@functools.lru_cache(maxsize=4)
+def intrinsics(width, height):
+	f = width / 2 / math.tan(math.radians(FOV) / 2)
+	return Intrinsics(width, height, f, f, (width - 1) / 2, (height - 1) / 2)
+
+
+# Deterministyczna klatka: ta sama rozdzielczość i numer dają zawsze te same tablice
+def syntheticArrays(width, height, sequence):
+	(color, depth) = _pattern(width, height)
+	shift = (sequence * SHIFT) % max(width, 1)
+
+	return (np.roll(color, shift, axis=1), np.roll(depth, shift, axis=1))
+
+
+def syntheticFrame(width, height, sequence):
+	(color, depth) = syntheticArrays(width, height, sequence)
+
+	return InternalFrameFormat(width=width, height=height, color=color, depth=depth, timestamp=time.time(), intrinsics=intrinsics(width, height))
+
+
+class SyntheticCamera:
+	"""
+	Camera without hardware. Every call returns next frame of the sequence.
+	"""
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__sequence = 0
+
+	def getFrame(self, width, height):
+		with self.__lock:
+			sequence = self.__sequence
+			self.__sequence = self.__sequence + 1
+
+		return syntheticFrame(width, height, sequence)
+
+
+camera = SyntheticCamera()
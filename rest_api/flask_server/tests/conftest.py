@@ -0,0 +1,111 @@
+import collections
+import importlib
+import os
+import pytest
+import sys
+import types
+
+# Moduły serwera są importowane płasko (jak w app.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeRosbridge:
+	"""In-process rosbridge: connections subscribe and advertise topics, tests publish and drop connections."""
+
+	def __init__(self):
+		self.running = True
+		self.connections = []
+		self.published = []
+
+	def module(self):
+		bridge = self
+
+		# Jak w roslibpy: UserDict, wartości w `data`
+		class Message(collections.UserDict):
+			def __init__(self, values=None):
+				super().__init__(values or {})
+
+		class Header(Message):
+			def __init__(self, seq=None, stamp=None, frame_id=None):
+				super().__init__({'seq': seq, 'stamp': stamp, 'frame_id': frame_id})
+
+		class Time(Message):
+			def __init__(self, secs=0, nsecs=0):
+				super().__init__({'secs': secs, 'nsecs': nsecs})
+
+		class Ros:
+			def __init__(self, host, port):
+				self.host = host
+				self.port = port
+				self.is_connected = False
+				self.subscriptions = {}
+
+			def run(self, timeout=None):
+				if not bridge.running:
+					raise ConnectionError("rosbridge at {}:{} is not running".format(self.host, self.port))
+				self.is_connected = True
+				bridge.connections.append(self)
+
+			def close(self):
+				self.is_connected = False
+
+		class Topic:
+			def __init__(self, ros, name, messageType):
+				self.ros = ros
+				self.name = name
+
+			def subscribe(self, callback):
+				self.ros.subscriptions[self.name] = callback
+
+			def unsubscribe(self):
+				self.ros.subscriptions.pop(self.name, None)
+
+			def advertise(self):
+				pass
+
+			def unadvertise(self):
+				pass
+
+			def publish(self, msg):
+				if not self.ros.is_connected:
+					raise ConnectionError("Not connected to rosbridge")
+				bridge.published.append((self.ros, self.name, msg))
+
+		return types.SimpleNamespace(Message=Message, Header=Header, Time=Time, Ros=Ros, Topic=Topic)
+
+	def publish(self, topic, stamp):
+		msg = {'header': {'stamp': {'secs': int(stamp), 'nsecs': int(round((stamp % 1) * 1e9))}}, 'topic': topic}
+		for ros in self.connections:
+			callback = ros.subscriptions.get(topic)
+			if ros.is_connected and callback is not None:
+				callback(msg)
+
+	# Restart rosbridge: wszystkie połączenia zerwane
+	def drop(self):
+		for ros in self.connections:
+			ros.is_connected = False
+		self.connections = []
+
+
+@pytest.fixture
+def bridge():
+	return FakeRosbridge()
+
+
+# fakeRoslibpy('rosUpload') importuje moduł serwera z atrapą zamiast roslibpy;
+# po teście sys.modules wraca do stanu sprzed testu (bez atrapy i modułów, które jej użyły)
+@pytest.fixture
+def fakeRoslibpy(bridge):
+	saved = dict(sys.modules)
+
+	def load(name):
+		for module in ('roslibpy', 'rosMsgs', 'rosIngest', 'rosUpload', name):
+			sys.modules.pop(module, None)
+		sys.modules['roslibpy'] = bridge.module()
+		return importlib.import_module(name)
+
+	yield load
+
+	for name in set(sys.modules) - set(saved):
+		del sys.modules[name]
+	sys.modules.update(saved)
@@ -0,0 +1,47 @@
+import captureScheduler
+import reconfigure
+
+
+# Silnik procesu; jego pętla działa do końca testów, każdy test używa własnego wejścia
+scheduler = captureScheduler.scheduler
+
+
+def counter():
+	calls = []
+
+	def capture():
+		calls.append(len(calls))
+		return len(calls)
+
+	return capture
+
+
+def test_reuse_window():
+	capture = counter()
+
+	assert scheduler.capture('reuse', 'key', capture, reuseWindow=60.0) == 1
+	assert scheduler.capture('reuse', 'key', capture, reuseWindow=60.0) == 1
+	assert scheduler.capture('reuse', 'other', capture, reuseWindow=60.0) == 2
+
+
+def test_clear():
+	capture = counter()
+
+	scheduler.capture('clear', 'key', capture, reuseWindow=60.0)
+	assert scheduler.clear()
+
+	assert scheduler.capture('clear', 'key', capture, reuseWindow=60.0) == 2
+
+
+def test_clear_before_start():
+	assert not captureScheduler.CaptureScheduler().clear()
+
+
+def test_clear_on_resolution_change():
+	capture = counter()
+	scheduler.capture('resolution', 'key', capture, reuseWindow=60.0)
+
+	results = reconfigure.onConfigChange({'camera': {'width': 1280}}, {'camera': {'width': 640}})
+
+	assert {'backend': 'capture_engine', 'action': 'frames_dropped'}.items() <= results[-1].items()
+	assert scheduler.capture('resolution', 'key', capture, reuseWindow=60.0) == 2
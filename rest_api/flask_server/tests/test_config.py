@@ -0,0 +1,53 @@
+import config
+import os
+import pytest
+import threading
+
+
+@pytest.fixture
+def listeners(tmp_path, monkeypatch):
+	monkeypatch.setattr(config, 'configPath', str(tmp_path / 'config.toml'))
+	monkeypatch.setattr(config, '_cachedStat', None)
+	monkeypatch.setattr(config, '_cachedConfig', None)
+	monkeypatch.setattr(config, '_listeners', [])
+
+	calls = []
+
+	# Słuchacz sprawdza z innego wątku, czy _lock jest wolny
+	def listener(old, new):
+		acquired = []
+
+		def tryLock():
+			if config._lock.acquire(timeout=0.5):
+				config._lock.release()
+				acquired.append(True)
+
+		thread = threading.Thread(target=tryLock)
+		thread.start()
+		thread.join()
+		calls.append((old['camera']['width'], new['camera']['width'], acquired == [True]))
+		return []
+
+	config.addListener(listener)
+	return calls
+
+
+def test_save_notifies_without_lock(listeners):
+	config.genDefault()
+	cfg = config.getConfig()
+	cfg['camera']['width'] = 640
+	config.saveConfig(cfg)
+
+	assert listeners == [(1280, 640, True)]
+
+
+def test_deleted_file_notifies_without_lock(listeners):
+	config.genDefault()
+	cfg = config.getConfig()
+	cfg['camera']['width'] = 640
+	config.saveConfig(cfg)
+	os.unlink(config.configPath)
+
+	assert config.getConfig()['camera']['width'] == 1280
+	assert os.path.exists(config.configPath)
+	assert listeners == [(1280, 640, True), (640, 1280, True)]
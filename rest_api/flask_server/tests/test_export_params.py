@@ -0,0 +1,27 @@
+import camera
+import pytest
+
+
+IMAGE_CFG = {'png_compression_level': 6, 'jpeg_quality': 90, 'webp_quality': 80}
+
+
+def test_defaults():
+	assert camera._quality({}, 90) == 90
+	assert camera._compression({}, IMAGE_CFG) == 6
+
+
+@pytest.mark.parametrize('value,expected', [('0', 0), ('75', 75), ('100', 100)])
+def test_quality(value, expected):
+	assert camera._quality({'quality': value}, 90) == expected
+
+
+@pytest.mark.parametrize('params', [{'quality': 'abc'}, {'quality': '1.5'}, {'quality': '-1'}, {'quality': '101'}])
+def test_bad_quality(params):
+	with pytest.raises(camera.ExportParamError):
+		camera._quality(params, 90)
+
+
+@pytest.mark.parametrize('params', [{'compression': 'x'}, {'compression': '-1'}, {'compression': '10'}])
+def test_bad_compression(params):
+	with pytest.raises(camera.ExportParamError):
+		camera._compression(params, IMAGE_CFG)
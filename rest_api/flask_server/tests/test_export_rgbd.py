@@ -0,0 +1,77 @@
+import camera
+from frameFormat import InternalFrameFormat
+import numpy as np
+import pytest
+
+
+# Pętla po pikselach z wersji sprzed wektoryzacji, jako wzorzec
+def legacyRGBD(frame):
+	color = frame.colorBytes().tolist()
+	depth = frame.depthBytes().tolist()
+	color_length = len(color)
+	depth_length = len(depth)
+
+	rgbd = []
+	i = 0
+	j = 0
+	n = 0
+	while i < color_length and j < depth_length:
+		for k in range(0, frame.color_bpp):
+			rgbd.append(color[i + k])
+			n = n + 1
+		for k in range(0, frame.depth_bpp):
+			rgbd.append(depth[j + k])
+			n = n + 1
+		i = i + frame.color_bpp
+		j = j + frame.depth_bpp
+
+	return {
+		'width': frame.width,
+		'height': frame.height,
+		'rgbd': rgbd,
+		'rgbd_length': n,
+		'color_bpp': frame.color_bpp,
+		'depth_bpp': frame.depth_bpp,
+	}
+
+
+class BytesFrame:
+	"""Frame with any number of bytes per pixel (exporter needs only these attributes)."""
+
+	def __init__(self, width, height, color_bpp, depth_bpp, rng):
+		self.width = width
+		self.height = height
+		self.color_bpp = color_bpp
+		self.depth_bpp = depth_bpp
+		self.__color = rng.integers(0, 256, width * height * color_bpp, dtype=np.uint8)
+		self.__depth = rng.integers(0, 256, width * height * depth_bpp, dtype=np.uint8)
+
+	def colorBytes(self):
+		return self.__color
+
+	def depthBytes(self):
+		return self.__depth
+
+
+SIZES = [(0, 0), (1, 1), (3, 5), (7, 1), (1, 9), (33, 17), (640, 480)]
+
+
+@pytest.mark.parametrize('width,height', SIZES)
+def test_internal_frame(width, height):
+	rng = np.random.default_rng(width * 1000 + height)
+	frame = InternalFrameFormat(
+		width=width,
+		height=height,
+		color=rng.integers(0, 256, (height, width, 3), dtype=np.uint8),
+		depth=rng.integers(0, 65536, (height, width), dtype=np.uint16))
+
+	assert camera.exportToRGBD(frame) == legacyRGBD(frame)
+
+
+@pytest.mark.parametrize('color_bpp', [1, 3, 4])
+@pytest.mark.parametrize('depth_bpp', [1, 2, 4])
+@pytest.mark.parametrize('width,height', SIZES[:-1])
+def test_bpp(width, height, color_bpp, depth_bpp):
+	frame = BytesFrame(width, height, color_bpp, depth_bpp, np.random.default_rng(color_bpp * 10 + depth_bpp))
+
+	assert camera.exportToRGBD(frame) == legacyRGBD(frame)
@@ -0,0 +1,66 @@
+import frameArchive
+from frameFormat import InternalFrameFormat
+import numpy as np
+import pytest
+
+
+def frame(value, timestamp, width=8, height=6):
+	return InternalFrameFormat(width=width, height=height,
+		color=np.full((height, width, 3), value, dtype=np.uint8),
+		depth=np.full((height, width), value * 100, dtype=np.uint16),
+		timestamp=timestamp)
+
+
+def record(directory, name, values, overwrite=False):
+	writer = frameArchive.ArchiveWriter(*frameArchive.paths(str(directory), name), overwrite=overwrite)
+	for (i, value) in enumerate(values):
+		writer.write(frame(value, 100.0 + i))
+	writer.close()
+
+
+def test_round_trip(tmp_path):
+	record(tmp_path, 'a', [1, 2, 3])
+	reader = frameArchive.ArchiveReader(*frameArchive.paths(str(tmp_path), 'a'))
+
+	assert len(reader) == 3
+	assert reader.seek(101.5) == 1
+	assert np.array_equal(reader.frame(2).color, frame(3, 0).color)
+	assert np.array_equal(reader.frame(2).depth, frame(3, 0).depth)
+
+
+def test_existing_archive_is_kept(tmp_path):
+	record(tmp_path, 'a', [1, 2])
+
+	with pytest.raises(frameArchive.ArchiveExists):
+		record(tmp_path, 'a', [7])
+
+	assert len(frameArchive.ArchiveReader(*frameArchive.paths(str(tmp_path), 'a'))) == 2
+
+
+def test_overwrite_keeps_mapped_frames(tmp_path):
+	record(tmp_path, 'a', [1, 2])
+	old = frameArchive.ArchiveReader(*frameArchive.paths(str(tmp_path), 'a')).frame(1)
+
+	writer = frameArchive.ArchiveWriter(*frameArchive.paths(str(tmp_path), 'a'), overwrite=True)
+	writer.write(frame(9, 200.0))
+
+	# Do zamknięcia stare nagranie zostaje na miejscu
+	assert len(frameArchive.ArchiveReader(*frameArchive.paths(str(tmp_path), 'a'))) == 2
+
+	writer.close()
+	new = frameArchive.ArchiveReader(*frameArchive.paths(str(tmp_path), 'a'))
+
+	assert len(new) == 1
+	assert np.array_equal(new.frame(0).color, frame(9, 0).color)
+	assert np.array_equal(old.color, frame(2, 0).color)
+	assert sorted(p.name for p in tmp_path.iterdir()) == ['a.idx', 'a.rgbd']
+
+
+def test_recorder_refuses_existing(tmp_path):
+	record(tmp_path, 'a', [1])
+	recorder = frameArchive.ArchiveRecorder()
+
+	with pytest.raises(frameArchive.ArchiveExists):
+		recorder.start('synthetic', str(tmp_path), 'a')
+
+	assert not recorder.status()['recording']
@@ -0,0 +1,51 @@
+import numpy as np
+import pointcloud
+import pytest
+
+
+POINTS = np.array([[0.0, 0.1, 1.0], [0.2, -0.3, 2.5]], dtype=np.float32)
+COLORS = np.array([[255, 0, 10], [1, 2, 3]], dtype=np.uint8)
+
+
+@pytest.mark.parametrize('colors,fields,flag', [(None, pointcloud.FIELDS_XYZ, 0), (COLORS, pointcloud.FIELDS_XYZRGB, 1)])
+def test_header(colors, fields, flag):
+	cloud = pointcloud.PointCloud.fromArrays(POINTS, colors, timestamp=12.5)
+	(magic, version, headerSize, count, pointStep, headerFlag, timestamp) = pointcloud.POINTCLOUD_HEADER.unpack(pointcloud.header(cloud))
+
+	assert cloud.hasColors == (colors is not None)
+	assert cloud.fields == fields
+	assert (magic, version, headerSize) == (pointcloud.POINTCLOUD_MAGIC, pointcloud.POINTCLOUD_VERSION, pointcloud.POINTCLOUD_HEADER.size)
+	assert (count, pointStep, headerFlag, timestamp) == (2, cloud.point_step, flag, 12.5)
+
+
+def test_colors_round_trip():
+	cloud = pointcloud.PointCloud.fromArrays(POINTS, COLORS)
+
+	assert np.array_equal(cloud.points, POINTS)
+	assert np.array_equal(cloud.colors, COLORS)
+	assert pointcloud.PointCloud.fromArrays(POINTS).colors is None
+
+
+@pytest.mark.parametrize('voxel', ['nan', 'inf', '-0.01', '1e-9'])
+def test_bad_voxel(voxel):
+	# Parametry są sprawdzane przed deprojekcją
+	with pytest.raises(pointcloud.PointCloudError):
+		pointcloud.pointCloudFromParams(None, {'voxel': voxel})
+
+
+def test_voxel_downsample():
+	points = np.array([[0.0, 0.0, 1.0], [0.004, 0.0, 1.0], [0.5, 0.5, 2.0]], dtype=np.float32)
+	cloud = pointcloud.voxelDownsample(pointcloud.PointCloud.fromArrays(points, COLORS[[0, 0, 1]]), 0.01)
+
+	assert len(cloud) == 2
+	assert np.allclose(sorted(cloud.points[:, 0]), [0.002, 0.5])
+
+
+def test_voxel_key_outside_int64():
+	# Rozmiar siatki 65537 x 2^24 x 2^24 > int64; z kluczem int64 punkt 2^16 zawinąłby się na 0
+	edge = 2.0 ** 24 - 1
+	points = np.array([[0.0, 0.0, 0.0], [2.0 ** 16, 0.0, 0.0], [0.0, edge, edge]], dtype=np.float32)
+	cloud = pointcloud.voxelDownsample(pointcloud.PointCloud.fromArrays(points), 1.0)
+
+	assert len(cloud) == 3
+	assert np.array_equal(cloud.points[np.lexsort(cloud.points.T[::-1])], points[[0, 2, 1]])
@@ -0,0 +1,129 @@
+import pytest
+
+pb = pytest.importorskip('pybullet')
+
+import inputPybullet
+import pybulletClient
+import reconfigure
+
+
+# Tryb DIRECT: symulator w tym samym procesie, bez serwera
+CFG = {
+	'mode': 'direct',
+	'host': '127.0.0.1',
+	'port': 6667,
+	'eye_position': [0, 0, 3],
+	'eye_up_vector': [0, 1, 0],
+	'target_position': [0, 0, 0],
+	'fov': 45.0,
+	'aspect': 1.0,
+	'near_distance': 0.1,
+	'far_distance': 3.1,
+	'linear_depth': False,
+}
+
+
+@pytest.fixture
+def manager():
+	manager = pybulletClient.PybulletConnectionManager()
+	yield manager
+	manager.stop()
+
+
+@pytest.fixture
+def defaultManager():
+	# inputPybullet używa singletonu z modułu
+	yield pybulletClient.manager
+	pybulletClient.manager.stop()
+
+
+@pytest.fixture(autouse=True)
+def clearMatrices():
+	pybulletClient.viewMatrix.cache_clear()
+	pybulletClient.projectionMatrix.cache_clear()
+
+
+def test_reuse(manager):
+	first = manager.getConnection('direct', '127.0.0.1', 6667)
+
+	assert manager.getConnection('direct', '127.0.0.1', 6667) is first
+	assert first.is_connected
+
+
+def test_connection_per_key(manager):
+	first = manager.getConnection('direct', '127.0.0.1', 6667)
+	second = manager.getConnection('direct', '127.0.0.1', 6668)
+
+	assert second is not first
+	assert second.clientId != first.clientId
+	assert first.is_connected and second.is_connected
+
+
+def test_reconnect_after_drop(manager):
+	first = manager.getConnection('direct', '127.0.0.1', 6667)
+	manager.drop(first)
+	assert not first.is_connected
+
+	second = manager.getConnection('direct', '127.0.0.1', 6667)
+	assert second is not first
+	assert second.is_connected
+
+
+def test_reconnect_after_disconnect(manager):
+	first = manager.getConnection('direct', '127.0.0.1', 6667)
+	# Np. restart serwera: klient przestaje być połączony bez udziału managera
+	pb.disconnect(physicsClientId=first.clientId)
+
+	second = manager.getConnection('direct', '127.0.0.1', 6667)
+	assert second is not first
+	assert second.is_connected
+
+
+def test_stop(manager):
+	assert not manager.stop()
+
+	connection = manager.getConnection('direct', '127.0.0.1', 6667)
+	assert manager.stop()
+	assert not connection.is_connected
+
+
+def test_projection_matrix_cache():
+	first = pybulletClient.projectionMatrix(45.0, 1.0, 0.1, 3.1)
+	assert pybulletClient.projectionMatrix(45.0, 1.0, 0.1, 3.1) is first
+	assert pybulletClient.projectionMatrix.cache_info().hits == 1
+
+	other = pybulletClient.projectionMatrix(60.0, 1.0, 0.1, 3.1)
+	assert other != first
+	assert pybulletClient.projectionMatrix.cache_info().misses == 2
+
+
+def test_projection_matrix_cleared_on_config_change():
+	pybulletClient.projectionMatrix(45.0, 1.0, 0.1, 3.1)
+	pybulletClient.viewMatrix((0, 0, 3), (0, 0, 0), (0, 1, 0))
+
+	results = reconfigure.onConfigChange({'worker_pybullet': {'fov': 45.0}}, {'worker_pybullet': {'fov': 60.0}})
+
+	assert [r['action'] for r in results] == ['projection_matrix_cleared']
+	assert pybulletClient.projectionMatrix.cache_info().currsize == 0
+	# Macierz widoku nie zależy od fov
+	assert pybulletClient.viewMatrix.cache_info().currsize == 1
+
+
+def test_frame(defaultManager):
+	frame = inputPybullet.capture(64, 48, CFG)
+
+	assert frame.color.shape[:2] == (48, 64)
+	assert frame.depth.shape == (48, 64)
+	assert pybulletClient.projectionMatrix.cache_info().misses == 1
+
+	inputPybullet.capture(64, 48, CFG)
+	assert pybulletClient.projectionMatrix.cache_info().hits == 1
+
+
+def test_frame_after_server_restart(defaultManager):
+	inputPybullet.capture(64, 48, CFG)
+	first = defaultManager.getConnection('direct', '127.0.0.1', 6667)
+	pb.disconnect(physicsClientId=first.clientId)
+
+	inputPybullet.capture(64, 48, CFG)
+	assert defaultManager.getConnection('direct', '127.0.0.1', 6667) is not first
@@ -0,0 +1,136 @@
+import frameGrabber
+import pytest
+import realsensePipeline
+import threading
+import time
+
+
+class FakePipeline:
+	"""Started pipeline: every wait_for_frames() returns next number, after `failAfter` reads raises."""
+
+	def __init__(self, width, height, interval=0.001, failAfter=None):
+		self.width = width
+		self.height = height
+		self.interval = interval
+		self.failAfter = failAfter
+		self.reads = 0
+		self.stopped = False
+
+	def wait_for_frames(self):
+		time.sleep(self.interval)
+		if self.failAfter is not None and self.reads >= self.failAfter:
+			raise RuntimeError("device disconnected")
+
+		self.reads = self.reads + 1
+		return (self.width, self.height, self.reads)
+
+	def stop(self):
+		self.stopped = True
+
+
+class FakeFactory:
+	def __init__(self, **kwargs):
+		self.kwargs = kwargs
+		self.pipelines = []
+		self.lock = threading.Lock()
+
+	def __call__(self, width, height):
+		with self.lock:
+			pipe = FakePipeline(width, height, **self.kwargs)
+			self.pipelines.append(pipe)
+			return pipe
+
+
+WARM_UP = 5
+
+
+def makeManager(factory):
+	return realsensePipeline.RealsensePipelineManager(pipelineFactory=factory, convert=lambda frames: frames, warmUpFrames=WARM_UP)
+
+
+@pytest.fixture
+def factory():
+	return FakeFactory()
+
+
+@pytest.fixture
+def manager(factory):
+	manager = makeManager(factory)
+	yield manager
+	manager.stop()
+
+
+def test_single_warm_up(factory, manager):
+	first = manager.getFrame(640, 480)
+	for _ in range(5):
+		manager.getFrame(640, 480)
+
+	assert len(factory.pipelines) == 1
+	# Pierwsza podana klatka jest po rozgrzewce
+	assert first[2] > WARM_UP
+
+
+def test_newest_frame(factory, manager):
+	first = manager.getFrame(640, 480)[2]
+	time.sleep(0.05)
+	second = manager.getFrame(640, 480)[2]
+
+	# Klatki czytane w tle w międzyczasie są pomijane, nie kolejkowane
+	assert second > first + 1
+	assert second >= factory.pipelines[0].reads - 1
+
+
+def test_restart_only_on_resolution_change(factory, manager):
+	p = manager.getPipeline(640, 480)
+	assert manager.getPipeline(640, 480) is p
+
+	q = manager.getPipeline(1280, 720)
+	assert q is not p
+	assert p.state == p.STOPPED
+	assert factory.pipelines[0].stopped
+	assert manager.getFrame(1280, 720)[:2] == (1280, 720)
+	assert len(factory.pipelines) == 2
+
+
+def test_restart(factory, manager):
+	assert not makeManager(factory).restart(640, 480)
+
+	manager.getFrame(640, 480)
+	assert manager.restart(320, 240)
+	assert manager.getFrame(320, 240)[:2] == (320, 240)
+	assert len(factory.pipelines) == 2
+
+
+def test_recovery_after_failure():
+	factory = FakeFactory(failAfter=WARM_UP + 3)
+	manager = makeManager(factory)
+
+	try:
+		p = manager.getPipeline(640, 480)
+		deadline = time.monotonic() + 2.0
+		while p.state != p.FAILED and time.monotonic() < deadline:
+			time.sleep(0.005)
+		assert p.state == p.FAILED
+
+		with pytest.raises(frameGrabber.FrameGrabberError):
+			p.getFrame(timeout=0.1, newerThan=p.sequence)
+
+		factory.kwargs['failAfter'] = None
+		assert manager.getFrame(640, 480)[2] > WARM_UP
+		assert len(factory.pipelines) == 2
+	finally:
+		manager.stop()
+
+
+def test_stop_during_warm_up():
+	factory = FakeFactory(interval=0.01)
+	pipeline = realsensePipeline.RealsensePipeline(640, 480, factory, lambda frames: frames, warmUpFrames=10000)
+	pipeline.start()
+	time.sleep(0.05)
+
+	start = time.monotonic()
+	pipeline.stop()
+
+	assert time.monotonic() - start < 1.0
+	assert pipeline.state == pipeline.STOPPED
+	assert factory.pipelines[0].stopped
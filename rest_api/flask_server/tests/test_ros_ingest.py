@@ -0,0 +1,102 @@
+import pytest
+
+
+COLOR = '/camera/color/image_raw'
+DEPTH = '/camera/depth/image_rect_raw'
+
+
+@pytest.fixture
+def rosIngest(fakeRoslibpy):
+	return fakeRoslibpy('rosIngest')
+
+
+@pytest.fixture
+def manager(rosIngest):
+	manager = rosIngest.RosIngestManager()
+	yield manager
+	manager.stop()
+
+
+def test_pair(bridge, manager):
+	ingest = manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+
+	bridge.publish(COLOR, 10.00)
+	bridge.publish(DEPTH, 10.01)
+
+	(color, depth) = ingest.getPair(timeout=0.1)
+	assert (color['topic'], depth['topic']) == (COLOR, DEPTH)
+
+
+def test_pair_outside_slop(bridge, manager, rosIngest):
+	ingest = manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH, slop=0.05)
+
+	bridge.publish(COLOR, 10.0)
+	bridge.publish(DEPTH, 10.2)
+
+	with pytest.raises(rosIngest.RosIngestError):
+		ingest.getPair(timeout=0.05)
+
+
+def test_reuse(bridge, manager):
+	first = manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+
+	assert manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH) is first
+	assert len(bridge.connections) == 1
+
+
+def test_new_topics(bridge, manager):
+	first = manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+	second = manager.getIngest('127.0.0.1', 9090, COLOR, '/other/depth')
+
+	assert second is not first
+	assert not first.is_connected
+
+
+def test_reconnect_after_rosbridge_restart(bridge, manager):
+	first = manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+	bridge.drop()
+	assert not first.is_connected
+
+	second = manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+	assert second is not first
+	assert second.is_connected
+
+	bridge.publish(COLOR, 20.0)
+	bridge.publish(DEPTH, 20.0)
+	assert second.getPair(timeout=0.1)[0]['header']['stamp']['secs'] == 20
+
+
+def test_rosbridge_down(bridge, manager):
+	manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+	bridge.drop()
+	bridge.running = False
+
+	with pytest.raises(ConnectionError):
+		manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+
+	bridge.running = True
+	assert manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH).is_connected
+
+
+def test_restart_without_ingest(bridge, manager):
+	assert not manager.restart('127.0.0.1', 9090, COLOR, DEPTH)
+	assert bridge.connections == []
+
+
+def test_restart_failed(bridge, manager):
+	manager.getIngest('127.0.0.1', 9090, COLOR, DEPTH)
+	bridge.running = False
+
+	with pytest.raises(ConnectionError):
+		manager.restart('127.0.0.1', 9091, COLOR, DEPTH)
+
+	# Nieudany restart nie zostawia niepołączonej subskrypcji z nowymi ustawieniami
+	bridge.running = True
+	assert not manager.restart('127.0.0.1', 9091, COLOR, DEPTH)
+
+	ingest = manager.getIngest('127.0.0.1', 9091, COLOR, DEPTH)
+	assert ingest.is_connected
+
+	bridge.publish(COLOR, 30.0)
+	bridge.publish(DEPTH, 30.0)
+	assert ingest.getPair(timeout=0.1) is not None
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+import syntheticCamera
+import threading
+import time
+
+
+@pytest.fixture
+def rosUpload(fakeRoslibpy):
+	return fakeRoslibpy('rosUpload')
+
+
+class FakeUploader:
+	def __init__(self):
+		self.frames = []
+
+	def exportToRos(self, frame, topicColor, topicDepth):
+		self.frames.append(frame)
+
+
+def waitFor(condition, timeout=2.0):
+	deadline = time.monotonic() + timeout
+	while not condition():
+		if time.monotonic() > deadline:
+			return False
+		time.sleep(0.005)
+	return True
+
+
+def test_uploader_reuse_and_reconnect(bridge, rosUpload):
+	manager = rosUpload.UploaderRosManager()
+
+	first = manager.getUploader('127.0.0.1', 9090)
+	assert manager.getUploader('127.0.0.1', 9090) is first
+
+	bridge.drop()
+	second = manager.getUploader('127.0.0.1', 9090)
+	assert second is not first
+	assert second.is_connected
+
+	second.exportToRos(syntheticCamera.syntheticFrame(4, 3, 0), '/color', '/depth')
+	assert [name for (ros, name, msg) in bridge.published] == ['/color', '/depth']
+
+	manager.stop()
+
+
+def test_republish(rosUpload):
+	republisher = rosUpload.RosRepublisher()
+	uploader = FakeUploader()
+
+	republisher.start('synthetic', lambda: syntheticCamera.syntheticFrame(4, 3, 0), lambda: uploader, '/color', '/depth', rate=200.0)
+	assert waitFor(lambda: len(uploader.frames) >= 3)
+	republisher.stop()
+
+	status = republisher.status()
+	assert not status['running']
+	assert status['published'] == len(uploader.frames)
+
+
+# Wątki poprzedniego startu, które nie skończyły się w stop(), nie mieszają się z nowym
+def test_restart_with_blocked_capture(rosUpload):
+	republisher = rosUpload.RosRepublisher()
+	release = threading.Event()
+	blocked = threading.Event()
+	old = syntheticCamera.syntheticFrame(4, 3, 1)
+	new = syntheticCamera.syntheticFrame(4, 3, 2)
+
+	def blockedCapture():
+		blocked.set()
+		release.wait()
+		return old
+
+	oldUploader = FakeUploader()
+	republisher.start('synthetic', blockedCapture, lambda: oldUploader, '/color', '/depth', rate=100.0)
+	assert blocked.wait(1.0)
+	republisher.stop(timeout=0.05)
+
+	newUploader = FakeUploader()
+	republisher.start('synthetic', lambda: new, lambda: newUploader, '/color', '/depth', rate=100.0)
+	release.set()
+
+	assert waitFor(lambda: len(newUploader.frames) >= 3)
+	republisher.stop()
+
+	assert oldUploader.frames == []
+	assert all(f is new for f in newUploader.frames)
+	assert republisher.status()['captured'] >= len(newUploader.frames)
+	assert not any(t.name.startswith('ros-republish') for t in threading.enumerate())